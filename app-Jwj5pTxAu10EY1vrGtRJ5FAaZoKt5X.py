@@ -3,19 +3,35 @@ from flask_cors import CORS
 import traceback
 import datetime
 import uuid
+import subprocess
+import sys
+import click
 
 # Import everything from our modules
 from config import (
     FLASK_SECRET_KEY, ADMIN_ROLE, VIEWER_ROLE, db,
     USERS_COLLECTION, RESOURCES_COLLECTION, SESSIONS_COLLECTION, CHAT_HISTORY_COLLECTION,
-    USER_STATUS_PENDING, USER_STATUS_APPROVED, USER_STATUS_REJECTED
+    USER_STATUS_PENDING, USER_STATUS_APPROVED, USER_STATUS_REJECTED,
+    MONGO_WARM_UP, connection_manager, register_after_fork
+)
+from services import (
+    AuthService, ResourceService, AIService, FileService,
+    email_sender_pool, resource_catalog
+)
+from utils import (
+    login_required, admin_required, validate_request_data, format_response,
+    get_current_user, get_current_token, session_cache, revocation_list,
+    resource_count_cache,
+    session_reaper, reap_expired_sessions, summarize_import_times,
+    ensure_indexes, verify_indexes, explain_hot_queries, index_check, backfill_search_fields,
+    data_versions, conditional_get, compress_response, reconcile_rollups, rollup_seed,
+    dashboard_cache
 )
-from services import AuthService, ResourceService, AIService, FileService
-from utils import login_required, admin_required, validate_request_data, format_response
 
 app = Flask(__name__)
 app.secret_key = FLASK_SECRET_KEY
 CORS(app, supports_credentials=True, origins=["*"])
+app.after_request(compress_response)
 
 # Initialize services
 auth_service = AuthService()
@@ -23,6 +39,88 @@ resource_service = ResourceService()
 ai_service = AIService()
 file_service = FileService()
 
+def start_background_tasks():
+    """Start per-process background work; re-run in every forked worker"""
+    if db is None:
+        return
+    if MONGO_WARM_UP:
+        connection_manager.warm_up()
+    # Declared indexes are verified in the background (create them with `flask indexes`)
+    index_check.start()
+    rollup_seed.start()
+    session_reaper.start()
+    email_sender_pool.start()
+
+start_background_tasks()
+register_after_fork(start_background_tasks)
+
+@app.cli.command('reap-sessions')
+def reap_sessions_command():
+    """Remove expired sessions and report how many were deleted"""
+    removed = reap_expired_sessions()
+    print(f"Removed {removed} expired sessions")
+
+@app.cli.command('indexes')
+@click.option('--verify-only', is_flag=True, help='Do not create missing indexes')
+def indexes_command(verify_only):
+    """Create or verify declared indexes and explain the hot queries"""
+    if not verify_only:
+        for index in ensure_indexes():
+            print(f"✅ {index['collection']}.{index['name']} (serves {', '.join(index['serves'])})")
+    
+    missing_indexes = verify_indexes()
+    for index in missing_indexes:
+        print(f"❌ Missing index on {index['collection']} {index['keys']} (serves {', '.join(index['serves'])})")
+    
+    collscans = []
+    for query in explain_hot_queries():
+        if query['collscan']:
+            collscans.append(query['name'])
+            print(f"❌ {query['name']}: COLLSCAN on {query['collection']}")
+        else:
+            print(f"✅ {query['name']}: {', '.join(query['indexes'])}")
+    
+    if missing_indexes or collscans:
+        raise click.ClickException(
+            f"{len(missing_indexes)} missing indexes, {len(collscans)} hot queries fall back to COLLSCAN"
+        )
+
+@app.cli.command('backfill-search-fields')
+def backfill_search_fields_command():
+    """Populate normalized shadow fields and trigram arrays on existing resources"""
+    updated = backfill_search_fields()
+    print(f"Updated search fields on {updated} resources")
+
+@app.cli.command('reconcile-rollups')
+def reconcile_rollups_command():
+    """Rebuild the dashboard rollups from resources, correcting any drift"""
+    result = reconcile_rollups()
+    print(f"Checked {result['checked']} rollup groups: {result['corrected']} corrected, {result['removed']} removed")
+    if result['corrected'] or result['removed']:
+        data_versions.bump(RESOURCES_COLLECTION)
+
+@app.cli.command('import-report')
+@click.option('--module', default='app', help='Module to import')
+@click.option('--top', default=15, help='Number of slowest imports to list')
+@click.option('--max-ms', default=None, type=float, help='Fail if total import time exceeds this')
+def import_report_command(module, top, max_ms):
+    """Report worker startup import time using python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise click.ClickException(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    
+    report = summarize_import_times(result.stderr, top)
+    print(f"Total import time for {module}: {report['total_ms']:.1f} ms")
+    for entry in report['slowest']:
+        print(f"  {entry['cumulative_ms']:10.1f} ms  {entry['module']}")
+    
+    if max_ms is not None and report['total_ms'] > max_ms:
+        raise click.ClickException(f"Import time {report['total_ms']:.1f} ms exceeds {max_ms:.1f} ms")
+
 # Error handler
 @app.errorhandler(Exception)
 def handle_error(e):
@@ -33,8 +131,38 @@ def handle_error(e):
 # Health check endpoint
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    if not index_check.healthy():
+        return format_response(
+            error="Declared indexes are missing; run `flask indexes` to create them",
+            data=index_check.stats(),
+            status=503
+        )
     return format_response(message="Backend is running", status=200)
 
+@app.route('/api/metrics', methods=['GET'])
+@login_required
+@admin_required
+def metrics():
+    try:
+        return format_response(
+            data={
+                'session_cache': session_cache.stats(),
+                'revocation_list': revocation_list.stats(),
+                'count_cache': resource_count_cache.stats(),
+                'data_versions': data_versions.stats(),
+                'dashboard_cache': dashboard_cache.stats(),
+                'resource_catalog': resource_catalog.stats(),
+                'session_reaper': session_reaper.stats(),
+                'index_check': index_check.stats(),
+                'rollup_seed': rollup_seed.stats(),
+                'email_sender': email_sender_pool.stats()
+            },
+            status=200
+        )
+    except Exception as e:
+        app.logger.error(f"Metrics error: {str(e)}")
+        return format_response(error="Failed to fetch metrics", status=400)
+
 # ==================== AUTHENTICATION ROUTES ====================
 
 @app.route('/api/auth/register', methods=['POST'])
@@ -79,7 +207,7 @@ def verify_admin():
 @login_required
 def logout():
     try:
-        return auth_service.logout_user(request)
+        return auth_service.logout_user(get_current_token())
     except Exception as e:
         app.logger.error(f"Logout error: {str(e)}")
         return format_response(error="Logout failed", status=400)
@@ -88,7 +216,7 @@ def logout():
 @login_required
 def get_profile():
     try:
-        return auth_service.get_user_profile(request)
+        return auth_service.get_user_profile(get_current_user())
     except Exception as e:
         app.logger.error(f"Profile fetch error: {str(e)}")
         return format_response(error="Failed to fetch profile", status=400)
@@ -97,33 +225,77 @@ def get_profile():
 
 @app.route('/api/resources', methods=['GET'])
 @login_required
+@conditional_get(RESOURCES_COLLECTION)
 def get_resources():
     try:
         filters = request.args.to_dict()
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
+        cursor = request.args.get('cursor')
+        count = request.args.get('count')
+        fields = request.args.get('fields')
+        view = request.args.get('view')
+        sort = request.args.get('sort')
         
-        return resource_service.get_resources(filters, page, limit)
+        return resource_service.get_resources(filters, page, limit, cursor, count, fields, view, sort)
     except Exception as e:
         app.logger.error(f"Get resources error: {str(e)}")
         return format_response(error="Failed to fetch resources", status=400)
 
+@app.route('/api/resources/stream', methods=['GET'])
+@login_required
+def stream_resources():
+    try:
+        filters = request.args.to_dict()
+        fields = request.args.get('fields')
+        view = request.args.get('view')
+        return resource_service.stream_resources(filters, fields, view)
+    except Exception as e:
+        app.logger.error(f"Stream resources error: {str(e)}")
+        return format_response(error="Failed to stream resources", status=400)
+
 @app.route('/api/resources', methods=['POST'])
 @login_required
 @admin_required
 def create_resource():
     try:
         data = request.get_json()
-        return resource_service.create_resource(data, request)
+        return resource_service.create_resource(data, get_current_user())
     except Exception as e:
         app.logger.error(f"Create resource error: {str(e)}")
         return format_response(error="Failed to create resource", status=400)
 
+@app.route('/api/resources/bulk', methods=['POST'])
+@login_required
+@admin_required
+def bulk_resources():
+    try:
+        data = request.get_json() or {}
+        return resource_service.bulk_resources(data.get('operations'), get_current_user())
+    except Exception as e:
+        app.logger.error(f"Bulk resources error: {str(e)}")
+        return format_response(error="Failed to apply bulk operations", status=400)
+
+@app.route('/api/resources/batch', methods=['POST'])
+@login_required
+def get_resources_batch():
+    try:
+        data = request.get_json() or {}
+        fields = request.args.get('fields')
+        view = request.args.get('view')
+        return resource_service.get_resources_by_ids(data.get('ids'), fields, view)
+    except Exception as e:
+        app.logger.error(f"Batch get resources error: {str(e)}")
+        return format_response(error="Failed to fetch resources", status=400)
+
 @app.route('/api/resources/<resource_id>', methods=['GET'])
 @login_required
+@conditional_get(RESOURCES_COLLECTION)
 def get_resource(resource_id):
     try:
-        return resource_service.get_resource(resource_id)
+        fields = request.args.get('fields')
+        view = request.args.get('view')
+        return resource_service.get_resource(resource_id, fields, view)
     except Exception as e:
         app.logger.error(f"Get resource error: {str(e)}")
         return format_response(error="Failed to fetch resource", status=400)
@@ -134,7 +306,7 @@ def get_resource(resource_id):
 def update_resource(resource_id):
     try:
         data = request.get_json()
-        return resource_service.update_resource(resource_id, data, request)
+        return resource_service.update_resource(resource_id, data, get_current_user())
     except Exception as e:
         app.logger.error(f"Update resource error: {str(e)}")
         return format_response(error="Failed to update resource", status=400)
@@ -155,11 +327,27 @@ def search_resources():
     try:
         query = request.args.get('q', '')
         filters = request.args.to_dict()
-        return resource_service.search_resources(query, filters)
+        page = int(request.args.get('page', 1))
+        limit = int(request.args.get('limit', 20))
+        fields = request.args.get('fields')
+        view = request.args.get('view')
+        sort = request.args.get('sort')
+        return resource_service.search_resources(query, filters, page, limit, fields, view, sort)
     except Exception as e:
         app.logger.error(f"Search resources error: {str(e)}")
         return format_response(error="Search failed", status=400)
 
+@app.route('/api/resources/lookup', methods=['GET'])
+@login_required
+def lookup_resources():
+    try:
+        fragment = request.args.get('q', '')
+        limit = int(request.args.get('limit', 20))
+        return resource_service.lookup_resources(fragment, limit)
+    except Exception as e:
+        app.logger.error(f"Lookup resources error: {str(e)}")
+        return format_response(error="Lookup failed", status=400)
+
 # ==================== FILE UPLOAD/EXPORT ROUTES ====================
 
 @app.route('/api/upload/csv', methods=['POST'])
@@ -171,7 +359,7 @@ def upload_csv():
             return format_response(error="No file provided", status=400)
         
         file = request.files['file']
-        return file_service.upload_csv(file, request)
+        return file_service.upload_csv(file, get_current_user())
     except Exception as e:
         app.logger.error(f"CSV upload error: {str(e)}")
         return format_response(error="CSV upload failed", status=400)
@@ -185,7 +373,7 @@ def upload_excel():
             return format_response(error="No file provided", status=400)
         
         file = request.files['file']
-        return file_service.upload_excel(file, request)
+        return file_service.upload_excel(file, get_current_user())
     except Exception as e:
         app.logger.error(f"Excel upload error: {str(e)}")
         return format_response(error="Excel upload failed", status=400)
@@ -222,7 +410,7 @@ def natural_crud():
         if validation_error:
             return validation_error
         
-        return ai_service.natural_crud(data, request)
+        return ai_service.natural_crud(data, get_current_user())
     except Exception as e:
         app.logger.error(f"Natural CRUD error: {str(e)}")
         return format_response(error="Natural CRUD operation failed", status=400)
@@ -236,7 +424,7 @@ def chat():
         if validation_error:
             return validation_error
         
-        return ai_service.chat(data, request)
+        return ai_service.chat(data, get_current_user())
     except Exception as e:
         app.logger.error(f"Chat error: {str(e)}")
         return format_response(error="Chat request failed", status=400)
@@ -248,8 +436,9 @@ def chat_history():
         user_id = request.args.get('user_id')
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 50))
+        cursor = request.args.get('cursor')
         
-        return ai_service.chat_history(user_id, page, limit, request)
+        return ai_service.chat_history(user_id, page, limit, get_current_user(), cursor)
     except Exception as e:
         app.logger.error(f"Chat history error: {str(e)}")
         return format_response(error="Failed to fetch chat history", status=400)
@@ -258,15 +447,18 @@ def chat_history():
 
 @app.route('/api/dashboard/stats', methods=['GET'])
 @login_required
+@conditional_get(RESOURCES_COLLECTION, window_seconds=300)
 def dashboard_stats():
     try:
-        return resource_service.dashboard_stats()
+        metrics = request.args.get('metrics')
+        return resource_service.dashboard_stats(metrics)
     except Exception as e:
         app.logger.error(f"Dashboard stats error: {str(e)}")
         return format_response(error="Failed to fetch dashboard stats", status=400)
 
 @app.route('/api/dashboard/charts', methods=['GET'])
 @login_required
+@conditional_get(RESOURCES_COLLECTION)
 def dashboard_charts():
     try:
         chart_type = request.args.get('type', 'all')
@@ -277,10 +469,13 @@ def dashboard_charts():
 
 @app.route('/api/dashboard/recent-activity', methods=['GET'])
 @login_required
+@conditional_get(RESOURCES_COLLECTION)
 def recent_activity():
     try:
         limit = int(request.args.get('limit', 10))
-        return resource_service.recent_activity(limit)
+        fields = request.args.get('fields')
+        view = request.args.get('view')
+        return resource_service.recent_activity(limit, fields, view)
     except Exception as e:
         app.logger.error(f"Recent activity error: {str(e)}")
         return format_response(error="Failed to fetch recent activity", status=400)
@@ -289,18 +484,24 @@ def recent_activity():
 
 @app.route('/api/locations', methods=['GET'])
 @login_required
+@conditional_get(RESOURCES_COLLECTION)
 def get_locations():
     try:
-        return resource_service.get_unique_values('location')
+        prefix = request.args.get('prefix')
+        counts = request.args.get('counts', 'false').lower() == 'true'
+        return resource_service.get_unique_values('location', prefix, counts)
     except Exception as e:
         app.logger.error(f"Get locations error: {str(e)}")
         return format_response(error="Failed to fetch locations", status=400)
 
 @app.route('/api/departments', methods=['GET'])
 @login_required
+@conditional_get(RESOURCES_COLLECTION)
 def get_departments():
     try:
-        return resource_service.get_unique_values('department')
+        prefix = request.args.get('prefix')
+        counts = request.args.get('counts', 'false').lower() == 'true'
+        return resource_service.get_unique_values('department', prefix, counts)
     except Exception as e:
         app.logger.error(f"Get departments error: {str(e)}")
         return format_response(error="Failed to fetch departments", status=400)
@@ -482,7 +683,7 @@ def admin_verify_action():
                 {'$set': {'status': USER_STATUS_APPROVED}}
             )
             
-            # Send approval notification email
+            # Queue approval notification email
             try:
                 auth_service.send_approval_notification(email, user.get('name', ''), approved=True)
             except:
@@ -521,7 +722,7 @@ def admin_verify_action():
                 {'$set': {'status': USER_STATUS_REJECTED}}
             )
             
-            # Send rejection notification email
+            # Queue rejection notification email
             try:
                 auth_service.send_approval_notification(email, user.get('name', ''), approved=False)
             except:
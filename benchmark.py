@@ -0,0 +1,204 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import re
+import statistics
+import string
+import time
+
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+
+from utils import add_search_fields, build_ngram_query, normalize_value, json_dumps
+from services import build_dashboard_stats_pipeline, read_dashboard_stats, parse_dashboard_metrics
+
+MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
+BENCHMARK_DATABASE = os.getenv('BENCHMARK_DATABASE', 'campus_assets_benchmark')
+
+LOCATIONS = ['Lab 1', 'Lab 2', 'Lab 3', 'Library', 'Admin Block', 'Hostel A', 'Hostel B', 'Seminar Hall']
+DEPARTMENTS = ['CSE', 'ECE', 'EEE', 'MECH', 'CIVIL', 'ISE', 'ADMIN']
+DESCRIPTIONS = ['Dell Monitor', 'HP Laptop', 'Lenovo Desktop', 'Epson Projector', 'Cisco Switch', 'UPS']
+
+def random_identifier(prefix, length):
+    return prefix + ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
+
+def make_resource(i):
+    created_at = datetime.datetime.utcnow() - datetime.timedelta(minutes=i)
+    return {
+        'sl_no': str(i + 1),
+        'description': random.choice(DESCRIPTIONS),
+        'service_tag': random_identifier('', 7),
+        'identification_number': random_identifier('CA-', 9),
+        'procurement_date': created_at.strftime('%Y-%m-%d'),
+        'cost': round(random.uniform(500, 150000), 2),
+        'location': random.choice(LOCATIONS),
+        'department': random.choice(DEPARTMENTS),
+        'created_by': 'benchmark@example.com',
+        'created_at': created_at,
+        'updated_at': created_at
+    }
+
+def seed(collection, size, batch_size=10000):
+    """Fill a scratch collection with `size` synthetic resources"""
+    collection.drop()
+    print(f"🌱 Seeding {size} resources...")
+
+    for start in range(0, size, batch_size):
+        batch = [add_search_fields(make_resource(i)) for i in range(start, min(start + batch_size, size))]
+        collection.insert_many(batch, ordered=False)
+
+    collection.create_index([('created_at', -1), ('_id', -1)])
+    collection.create_index('service_tag_grams')
+    collection.create_index('identification_number_grams')
+
+def time_queries(run, queries):
+    """Run each query once and return per-query latencies in milliseconds"""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        run(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(f"  {label:<12} median {statistics.median(timings):9.2f} ms   p95 {p95:9.2f} ms")
+
+def benchmark_trigram(sizes, samples):
+    """Compare substring lookups: unanchored regex scan vs trigram index"""
+    client = MongoClient(MONGODB_URI)
+    collection = client[BENCHMARK_DATABASE]['resources']
+
+    for size in sizes:
+        seed(collection, size)
+
+        # Fragments look like what help-desk staff read off a sticker
+        sample_docs = list(collection.aggregate([{'$sample': {'size': samples}}]))
+        fragments = [
+            doc['service_tag'][-5:] if i % 2 else doc['identification_number'][-5:]
+            for i, doc in enumerate(sample_docs)
+        ]
+
+        def regex_lookup(fragment, limit=20):
+            pattern = {'$regex': re.escape(fragment), '$options': 'i'}
+            return list(collection.find({'$or': [
+                {'service_tag': pattern}, {'identification_number': pattern}
+            ]}).limit(limit))
+
+        def trigram_lookup(fragment, limit=20):
+            return list(collection.find(build_ngram_query(fragment)).limit(limit))
+
+        # Both paths must agree before their timings mean anything
+        for fragment in fragments[:10]:
+            regex_ids = {doc['_id'] for doc in regex_lookup(fragment, limit=0)}
+            trigram_ids = {doc['_id'] for doc in trigram_lookup(fragment, limit=0)}
+            assert regex_ids == trigram_ids, f"Result mismatch for {normalize_value(fragment)}"
+
+        print(f"\n📊 Substring lookup, {size} resources, {len(fragments)} fragments")
+        report('regex', time_queries(regex_lookup, fragments))
+        report('trigram', time_queries(trigram_lookup, fragments))
+
+    client.drop_database(BENCHMARK_DATABASE)
+
+def legacy_dashboard_stats(collection):
+    """The five round trips dashboard_stats made before the $facet pipeline"""
+    total_resources = collection.count_documents({})
+    location_stats = list(collection.aggregate([
+        {'$group': {'_id': '$location', 'count': {'$sum': 1}}},
+        {'$sort': {'count': -1}},
+        {'$limit': 10}
+    ]))
+    department_stats = list(collection.aggregate([
+        {'$group': {'_id': '$department', 'count': {'$sum': 1}}},
+        {'$sort': {'count': -1}},
+        {'$limit': 10}
+    ]))
+    total_cost = list(collection.aggregate([{'$group': {'_id': None, 'total': {'$sum': '$cost'}}}]))
+    week_ago = datetime.datetime.utcnow() - datetime.timedelta(days=7)
+    recent_additions = collection.count_documents({'created_at': {'$gte': week_ago}})
+    return {
+        'total_resources': total_resources,
+        'total_cost': total_cost[0]['total'] if total_cost else 0,
+        'recent_additions': recent_additions,
+        'location_stats': location_stats,
+        'department_stats': department_stats
+    }
+
+def benchmark_dashboard(sizes, runs):
+    """Compare dashboard_stats: five round trips vs one $facet aggregation"""
+    client = MongoClient(MONGODB_URI)
+    collection = client[BENCHMARK_DATABASE]['resources']
+    metrics = parse_dashboard_metrics(None)
+
+    def facet(_):
+        pipeline = build_dashboard_stats_pipeline(metrics, datetime.datetime.utcnow())
+        return read_dashboard_stats(list(collection.aggregate(pipeline))[0], metrics)
+
+    for size in sizes:
+        seed(collection, size)
+
+        legacy = legacy_dashboard_stats(collection)
+        current = facet(None)
+        assert legacy['total_resources'] == current['total_resources'], "Totals differ"
+        assert legacy['recent_additions'] == current['recent_additions'], "Recent additions differ"
+
+        print(f"\n📊 Dashboard stats, {size} resources, {runs} runs")
+        report('5 queries', time_queries(lambda _: legacy_dashboard_stats(collection), range(runs)))
+        report('$facet', time_queries(facet, range(runs)))
+
+    client.drop_database(BENCHMARK_DATABASE)
+
+def legacy_dumps(resources):
+    """Per-document conversion followed by the standard library encoder"""
+    for resource in resources:
+        resource['_id'] = str(resource['_id'])
+        if 'created_at' in resource:
+            resource['created_at'] = resource['created_at'].isoformat()
+        if 'updated_at' in resource:
+            resource['updated_at'] = resource['updated_at'].isoformat()
+    return json.dumps({'data': {'resources': resources}}).encode('utf-8')
+
+def benchmark_serialize(docs, runs):
+    """Compare encoding a page of resources before and after the native encoder"""
+    page = [dict(make_resource(i), _id=ObjectId()) for i in range(docs)]
+
+    def legacy(_):
+        legacy_dumps([dict(resource) for resource in page])
+
+    def native(_):
+        json_dumps({'data': {'resources': [dict(resource) for resource in page]}})
+
+    print(f"\n📊 Serializing {docs}-document pages, {runs} runs")
+    report('convert+json', time_queries(legacy, range(runs)))
+    report('json_dumps', time_queries(native, range(runs)))
+
+def main():
+    parser = argparse.ArgumentParser(description='Campus Assets backend benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    trigram = subparsers.add_parser('trigram', help='Trigram index vs regex substring lookup')
+    trigram.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    trigram.add_argument('--samples', type=int, default=100)
+
+    serialize = subparsers.add_parser('serialize', help='Response encoding of resource pages')
+    serialize.add_argument('--docs', type=int, default=1000)
+    serialize.add_argument('--runs', type=int, default=200)
+
+    dashboard = subparsers.add_parser('dashboard', help='dashboard_stats round trips vs $facet')
+    dashboard.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    dashboard.add_argument('--runs', type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.benchmark == 'trigram':
+        benchmark_trigram(args.sizes, args.samples)
+    elif args.benchmark == 'serialize':
+        benchmark_serialize(args.docs, args.runs)
+    elif args.benchmark == 'dashboard':
+        benchmark_dashboard(args.sizes, args.runs)
+
+if __name__ == '__main__':
+    main()
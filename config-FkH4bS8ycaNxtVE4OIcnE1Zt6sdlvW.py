@@ -1,9 +1,8 @@
 import os
 import json
+import threading
 from dotenv import load_dotenv
 from pymongo import MongoClient
-import firebase_admin
-from firebase_admin import credentials, auth
 
 # Load environment variables
 load_dotenv()
@@ -11,6 +10,7 @@ load_dotenv()
 # Environment Variables
 MONGODB_URI = os.getenv('MONGODB_URI')
 FIREBASE_CREDENTIALS_JSON = os.getenv('FIREBASE_CREDENTIALS_JSON')
+FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID')
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 SMTP_EMAIL = os.getenv('SMTP_EMAIL')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
@@ -21,6 +21,31 @@ FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'your-flask-secret')
 # Database name
 DATABASE_NAME = os.getenv('DATABASE_NAME', 'campus_assets')
 
+# Session cache settings
+SESSION_CACHE_MAX_SIZE = int(os.getenv('SESSION_CACHE_MAX_SIZE', '10000'))
+SESSION_CACHE_TTL_SECONDS = int(os.getenv('SESSION_CACHE_TTL_SECONDS', '300'))
+
+# Auth mode: 'session' checks the sessions collection on every request,
+# 'stateless' trusts the signed exp claim and only checks revoked token IDs
+AUTH_MODE_SESSION = 'session'
+AUTH_MODE_STATELESS = 'stateless'
+AUTH_MODE = os.getenv('AUTH_MODE', AUTH_MODE_SESSION)
+REVOCATION_SYNC_INTERVAL_SECONDS = int(os.getenv('REVOCATION_SYNC_INTERVAL_SECONDS', '30'))
+
+# Expired session cleanup (interval 0 disables the background reaper)
+SESSION_REAPER_INTERVAL_SECONDS = int(os.getenv('SESSION_REAPER_INTERVAL_SECONDS', '600'))
+SESSION_REAPER_BATCH_SIZE = int(os.getenv('SESSION_REAPER_BATCH_SIZE', '1000'))
+
+# Firebase ID token verification. Signing certificates are cached for their
+# max-age and refreshed in the background; FIREBASE_CERTS_FILE points at a
+# local {kid: PEM} JSON file to verify without network (load tests).
+# Tokens with an unknown kid trigger at most one refetch per
+# FIREBASE_KEY_MIN_REFRESH_SECONDS.
+FIREBASE_CERTS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+FIREBASE_CERTS_FILE = os.getenv('FIREBASE_CERTS_FILE')
+FIREBASE_KEY_REFRESH_MARGIN_SECONDS = int(os.getenv('FIREBASE_KEY_REFRESH_MARGIN_SECONDS', '300'))
+FIREBASE_KEY_MIN_REFRESH_SECONDS = int(os.getenv('FIREBASE_KEY_MIN_REFRESH_SECONDS', '60'))
+
 # Validate required environment variables
 required_vars = ['MONGODB_URI', 'FIREBASE_CREDENTIALS_JSON', 'GROQ_API_KEY', 'SMTP_EMAIL', 'SMTP_PASSWORD', 'MASTER_EMAIL']
 missing_vars = [var for var in required_vars if not os.getenv(var)]
@@ -28,50 +53,167 @@ if missing_vars:
     print(f"❌ Missing required environment variables: {', '.join(missing_vars)}")
     print("Please create a .env file with all required variables")
 
+# MongoDB connection pool settings (per worker process)
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_WARM_UP = os.getenv('MONGO_WARM_UP', 'false').lower() == 'true'
+
+# JSON encoder for API responses: 'orjson' (falls back to 'json' when the
+# package is not installed) or 'json' for the standard library
+JSON_ENCODER_ORJSON = 'orjson'
+JSON_ENCODER_STDLIB = 'json'
+JSON_ENCODER = os.getenv('JSON_ENCODER', JSON_ENCODER_ORJSON)
+
+_after_fork_callbacks = []
+
+def register_after_fork(callback):
+    """Run a callback in every child process after a fork (e.g. gunicorn workers)"""
+    _after_fork_callbacks.append(callback)
+
+class ConnectionManager:
+    """Lazily create one MongoClient per process, since MongoClient is not fork-safe"""
+
+    def __init__(self, uri, database_name):
+        self.uri = uri
+        self.database_name = database_name
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self):
+        return bool(self.uri)
+
+    def get_client(self):
+        if self._client is not None and self._pid == os.getpid():
+            return self._client
+        
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                self._client = MongoClient(
+                    self.uri,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    connect=False
+                )
+                self._pid = os.getpid()
+        
+        return self._client
+
+    def get_db(self):
+        return self.get_client()[self.database_name]
+
+    def warm_up(self):
+        """Open the pool ahead of the first request"""
+        try:
+            self.get_db().command('ping')
+            print(f"✅ MongoDB connection successful to database: {self.database_name}")
+        except Exception as e:
+            print(f"❌ MongoDB connection failed: {e}")
+            print("Please check your MongoDB connection string")
+
+    def reset(self):
+        """Forget the inherited client in a forked child without closing parent sockets"""
+        self._client = None
+        self._pid = None
+
+    def close(self):
+        if self._client is not None and self._pid == os.getpid():
+            self._client.close()
+        self.reset()
+
+class LazyDatabase:
+    """Proxy for the per-process database, resolved on first access"""
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def __getitem__(self, name):
+        return self._manager.get_db()[name]
+
+    def __getattr__(self, name):
+        return getattr(self._manager.get_db(), name)
+
+connection_manager = ConnectionManager(MONGODB_URI, DATABASE_NAME)
+
 # MongoDB setup
 db = None
-try:
-    if MONGODB_URI:
-        client = MongoClient(MONGODB_URI)
-        # Specify database name explicitly
-        db = client[DATABASE_NAME]
-        # Test connection
-        db.command('ping')
-        print(f"✅ MongoDB connection successful to database: {DATABASE_NAME}")
-    else:
-        print("❌ MONGODB_URI not provided")
-except Exception as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    print("Please check your MongoDB connection string")
-
-# Check if Firebase is initialized
-try:
-    import firebase_admin
-    firebase_initialized = firebase_admin._apps and len(firebase_admin._apps) > 0
-except Exception:
-    firebase_initialized = False
-
-# Firebase setup
-try:
-    if FIREBASE_CREDENTIALS_JSON and not firebase_initialized:
-        # Handle both file path and JSON string
-        if os.path.isfile(FIREBASE_CREDENTIALS_JSON):
-            cred = credentials.Certificate(FIREBASE_CREDENTIALS_JSON)
-        else:
-            # Assume it's a JSON string
-            firebase_config = json.loads(FIREBASE_CREDENTIALS_JSON)
-            cred = credentials.Certificate(firebase_config)
-        
-        firebase_admin.initialize_app(cred)
-        firebase_initialized = True
-        print("✅ Firebase initialization successful")
-    elif firebase_initialized:
-        print("✅ Firebase already initialized")
-    else:
-        print("❌ Firebase credentials not provided")
-except Exception as e:
-    print(f"❌ Firebase initialization failed: {e}")
-    print("Using mock Firebase for testing")
+if MONGODB_URI:
+    db = LazyDatabase(connection_manager)
+else:
+    print("❌ MONGODB_URI not provided")
+
+def _after_fork():
+    connection_manager.reset()
+    for callback in _after_fork_callbacks:
+        try:
+            callback()
+        except Exception as e:
+            print(f"❌ After-fork callback failed: {e}")
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+def post_fork(server, worker):
+    """gunicorn post_fork hook; os.register_at_fork already covers this on POSIX"""
+    if not hasattr(os, 'register_at_fork'):
+        _after_fork()
+
+# Firebase setup (deferred until first use)
+_firebase_lock = threading.Lock()
+firebase_initialized = False
+
+def _load_firebase_credentials():
+    # Handle both file path and JSON string
+    if os.path.isfile(FIREBASE_CREDENTIALS_JSON):
+        with open(FIREBASE_CREDENTIALS_JSON) as f:
+            return json.load(f)
+    # Assume it's a JSON string
+    return json.loads(FIREBASE_CREDENTIALS_JSON)
+
+def get_firebase_project_id():
+    """Return the Firebase project ID without initializing the Admin SDK"""
+    if FIREBASE_PROJECT_ID:
+        return FIREBASE_PROJECT_ID
+    if not FIREBASE_CREDENTIALS_JSON:
+        return None
+    try:
+        return _load_firebase_credentials().get('project_id')
+    except Exception:
+        return None
+
+def init_firebase():
+    """Initialize Firebase Admin once per process; return True when available"""
+    global firebase_initialized
+    if firebase_initialized:
+        return True
+    
+    with _firebase_lock:
+        if firebase_initialized:
+            return True
+        try:
+            import firebase_admin
+            from firebase_admin import credentials
+            
+            if firebase_admin._apps:
+                firebase_initialized = True
+                print("✅ Firebase already initialized")
+            elif FIREBASE_CREDENTIALS_JSON:
+                cred = credentials.Certificate(_load_firebase_credentials())
+                firebase_admin.initialize_app(cred)
+                firebase_initialized = True
+                print("✅ Firebase initialization successful")
+            else:
+                print("❌ Firebase credentials not provided")
+        except Exception as e:
+            print(f"❌ Firebase initialization failed: {e}")
+            print("Using mock Firebase for testing")
+    
+    return firebase_initialized
 
 # Constants
 ADMIN_ROLE = 'admin'
@@ -80,9 +222,95 @@ USER_STATUS_PENDING = 'pending'
 USER_STATUS_APPROVED = 'approved'
 USER_STATUS_REJECTED = 'rejected'
 
-# Email settings
-SMTP_SERVER = 'smtp.gmail.com'
-SMTP_PORT = 587
+# Email settings. Point SMTP_SERVER/SMTP_PORT at a local stand-in such as
+# `python -m aiosmtpd -n -l localhost:1025` with SMTP_USE_TLS=false for tests.
+SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+
+# Email outbox and background sender pool
+EMAIL_STATUS_PENDING = 'pending'
+EMAIL_STATUS_SENDING = 'sending'
+EMAIL_STATUS_SENT = 'sent'
+EMAIL_STATUS_FAILED = 'failed'
+EMAIL_SENDER_WORKERS = int(os.getenv('EMAIL_SENDER_WORKERS', '2'))
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '20'))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+EMAIL_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_RETRY_BASE_SECONDS', '30'))
+EMAIL_POLL_INTERVAL_SECONDS = int(os.getenv('EMAIL_POLL_INTERVAL_SECONDS', '5'))
+EMAIL_LEASE_SECONDS = int(os.getenv('EMAIL_LEASE_SECONDS', '300'))
+# Reused SMTP connections are checked with NOOP only after sitting idle this long
+EMAIL_IDLE_PROBE_SECONDS = int(os.getenv('EMAIL_IDLE_PROBE_SECONDS', '30'))
+
+# Listing totals: 'cached' (count_documents per normalized filter, dropped
+# on writes; the page-mode default), 'exact' (uncached count_documents),
+# 'facet' (page and total in one $match + $facet round trip; the page is
+# sorted in memory, so only worth it for small filtered sets), 'estimated'
+# (collection metadata when unfiltered) or 'has_more' (count capped at
+# COUNT_CAP past the page)
+COUNT_EXACT = 'exact'
+COUNT_CACHED = 'cached'
+COUNT_FACET = 'facet'
+COUNT_ESTIMATED = 'estimated'
+COUNT_HAS_MORE = 'has_more'
+COUNT_NONE = 'none'
+COUNT_STRATEGIES = [COUNT_EXACT, COUNT_CACHED, COUNT_FACET, COUNT_ESTIMATED, COUNT_HAS_MORE, COUNT_NONE]
+COUNT_CACHE_MAX_SIZE = int(os.getenv('COUNT_CACHE_MAX_SIZE', '1000'))
+COUNT_CACHE_TTL_SECONDS = int(os.getenv('COUNT_CACHE_TTL_SECONDS', '60'))
+COUNT_CAP = int(os.getenv('COUNT_CAP', '1000'))
+
+# Result cache for dashboard reads: per-method TTLs in seconds and a bound
+# on entries. Entries are dropped on writes in this process and are tied to
+# the resources data version, so writes by other workers invalidate them too
+RESULT_CACHE_MAX_SIZE = int(os.getenv('RESULT_CACHE_MAX_SIZE', '256'))
+RESULT_CACHE_TTLS = {
+    'dashboard_stats': int(os.getenv('RESULT_CACHE_TTL_DASHBOARD_STATS', '60')),
+    'dashboard_charts': int(os.getenv('RESULT_CACHE_TTL_DASHBOARD_CHARTS', '300')),
+    'recent_activity': int(os.getenv('RESULT_CACHE_TTL_RECENT_ACTIVITY', '30'))
+}
+
+# Data version counters behind read endpoint ETags. Each worker re-reads a
+# counter at most every DATA_VERSION_CACHE_SECONDS, which bounds how long a
+# write handled by another worker can be answered with 304
+DATA_VERSION_CACHE_SECONDS = float(os.getenv('DATA_VERSION_CACHE_SECONDS', '1'))
+
+# Response compression for JSON bodies of at least COMPRESSION_MIN_SIZE bytes
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5'))
+
+# Metrics computed by /api/dashboard/stats (?metrics= selects a subset)
+DASHBOARD_METRICS = [
+    'total_resources', 'total_cost', 'recent_additions', 'location_stats', 'department_stats'
+]
+DASHBOARD_RECENT_DAYS = 7
+DASHBOARD_TOP_GROUPS = 10
+
+# Dashboard counts and cost sums per group, kept current with $inc on every
+# resource write. Until a reconcile has been recorded (the ROLLUP_META_ID
+# document) the dashboard aggregates over resources; the first worker to
+# start seeds them, and every worker reconciles them again once the last
+# reconcile is ROLLUP_RECONCILE_INTERVAL_SECONDS old (0 disables) to repair
+# drift from lost increments. With DASHBOARD_USE_ROLLUPS=false the dashboard
+# always aggregates.
+ROLLUP_ALL = 'all'
+ROLLUP_LOCATION = 'location'
+ROLLUP_DEPARTMENT = 'department'
+ROLLUP_CREATED_MONTH = 'created_month'
+ROLLUP_PROCUREMENT_MONTH = 'procurement_month'
+ROLLUP_SOURCE_FIELDS = ['location', 'department', 'cost', 'created_at', 'procurement_date']
+DASHBOARD_USE_ROLLUPS = os.getenv('DASHBOARD_USE_ROLLUPS', 'true').lower() == 'true'
+ROLLUP_META_ID = 'meta'
+ROLLUP_SEED_CHECK_SECONDS = int(os.getenv('ROLLUP_SEED_CHECK_SECONDS', '30'))
+ROLLUP_RECONCILE_INTERVAL_SECONDS = int(os.getenv('ROLLUP_RECONCILE_INTERVAL_SECONDS', '3600'))
+
+# Fields served by the in-memory distinct value catalog (/api/locations,
+# /api/departments, AI context), with the rollup dimension that counts them.
+# It reads the rollups too once they are seeded, unless DASHBOARD_USE_ROLLUPS is off.
+CATALOG_FIELDS = {
+    'location': ROLLUP_LOCATION,
+    'department': ROLLUP_DEPARTMENT
+}
 
 # Resource required fields
 RESOURCE_REQUIRED_FIELDS = [
@@ -90,6 +318,83 @@ RESOURCE_REQUIRED_FIELDS = [
     'procurement_date', 'cost', 'location', 'department'
 ]
 
+# Case-folded shadow copies of filterable text fields, maintained on every
+# write so equality and prefix filters can use an ordinary index
+NORMALIZED_FIELDS = {
+    'location': 'location_norm',
+    'department': 'department_norm'
+}
+
+# Trigram arrays for substring lookups on identifier fields
+NGRAM_SIZE = 3
+NGRAM_FIELDS = {
+    'service_tag': 'service_tag_grams',
+    'identification_number': 'identification_number_grams'
+}
+LOOKUP_DEFAULT_LIMIT = 20
+LOOKUP_MAX_LIMIT = 100
+
+# Maximum number of IDs accepted by POST /api/resources/batch
+RESOURCE_BATCH_MAX_IDS = int(os.getenv('RESOURCE_BATCH_MAX_IDS', '100'))
+
+# POST /api/resources/bulk: operations per request and per bulk_write batch
+RESOURCE_BULK_MAX_OPERATIONS = int(os.getenv('RESOURCE_BULK_MAX_OPERATIONS', '5000'))
+RESOURCE_BULK_BATCH_SIZE = int(os.getenv('RESOURCE_BULK_BATCH_SIZE', '1000'))
+
+# Mongo cursor batch size for the NDJSON resource stream
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '500'))
+
+# Derived fields that are stored on resources but never returned by the API
+RESOURCE_INTERNAL_FIELDS = list(NORMALIZED_FIELDS.values()) + list(NGRAM_FIELDS.values())
+
+# Fields clients may select with ?fields=, and named ?view= presets
+# (None means every public field)
+RESOURCE_FIELDS = [
+    'sl_no', 'description', 'service_tag', 'identification_number',
+    'procurement_date', 'cost', 'location', 'department',
+    'created_by', 'created_at', 'updated_by', 'updated_at'
+]
+RESOURCE_VIEWS = {
+    'table': ['sl_no', 'description', 'service_tag', 'identification_number', 'location', 'department', 'cost'],
+    'card': ['description', 'service_tag', 'location', 'department', 'cost', 'procurement_date'],
+    'full': None
+}
+
+# Text filter match modes
+MATCH_EXACT = 'exact'
+MATCH_PREFIX = 'prefix'
+MATCH_CONTAINS = 'contains'
+MATCH_MODES = [MATCH_EXACT, MATCH_PREFIX, MATCH_CONTAINS]
+
+# Full-text search over resources: field weights of the text index and
+# page size limits for /api/resources/search
+RESOURCE_TEXT_WEIGHTS = {
+    'description': 10,
+    'service_tag': 5,
+    'identification_number': 5,
+    'sl_no': 3,
+    'location': 2,
+    'department': 2
+}
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# Sort shapes accepted by ?sort= on resource listings (e.g. sort=-cost or
+# sort=location,-cost). Each is a compound index ending in an _id tiebreak
+# in the direction of the last key, and is also walked backwards for the
+# fully reversed order. Text searches with an explicit sort reorder only
+# their SEARCH_SORT_CAP most relevant matches.
+RESOURCE_SORT_INDEXES = [
+    [('created_at', -1), ('_id', -1)],
+    [('cost', 1), ('_id', 1)],
+    [('procurement_date', 1), ('_id', 1)],
+    [('location', 1), ('_id', 1)],
+    [('department', 1), ('_id', 1)],
+    [('location', 1), ('cost', -1), ('_id', -1)],
+    [('department', 1), ('cost', -1), ('_id', -1)]
+]
+SEARCH_SORT_CAP = 1000
+
 # CSV column mappings
 CSV_COLUMN_MAPPING = {
     'SL No': 'sl_no',
@@ -107,3 +412,120 @@ USERS_COLLECTION = 'users'
 RESOURCES_COLLECTION = 'resources'
 SESSIONS_COLLECTION = 'sessions'
 CHAT_HISTORY_COLLECTION = 'chat_history'
+REVOKED_TOKENS_COLLECTION = 'revoked_tokens'
+EMAIL_OUTBOX_COLLECTION = 'email_outbox'
+DATA_VERSIONS_COLLECTION = 'data_versions'
+RESOURCE_ROLLUPS_COLLECTION = 'resource_rollups'
+
+# Index registry: every index the services rely on, keyed by collection.
+# 'serves' names the queries each index backs; `flask indexes` creates and
+# verifies them and explains HOT_QUERIES to catch COLLSCAN plans.
+INDEX_REGISTRY = {
+    SESSIONS_COLLECTION: [
+        {'keys': [('session_token', 1)], 'options': {'unique': True},
+         'serves': ['utils.get_user_from_token', 'AuthService.logout_user']},
+        {'keys': [('expires_at', 1)], 'options': {'expireAfterSeconds': 0},
+         'serves': ['TTL expiry', 'utils.reap_expired_sessions']}
+    ],
+    USERS_COLLECTION: [
+        {'keys': [('firebase_uid', 1)], 'options': {'unique': True},
+         'serves': ['AuthService.login_user', 'AuthService.get_user_profile']},
+        {'keys': [('email', 1)], 'options': {'unique': True},
+         'serves': ['AuthService.register_user', 'AuthService.verify_admin', 'admin_verify_page']}
+    ],
+    RESOURCES_COLLECTION: [
+        {'keys': [('created_at', -1), ('_id', -1)], 'options': {},
+         'serves': ['ResourceService.get_resources', 'ResourceService.recent_activity',
+                    'ResourceService.dashboard_stats']},
+        {'keys': [('location', 1), ('_id', 1)], 'options': {},
+         'serves': ['ResourceService.get_resources (sort=location)', 'ResourceService.get_unique_values',
+                    'FileService.export_csv', 'FileService.export_excel']},
+        {'keys': [('department', 1), ('_id', 1)], 'options': {},
+         'serves': ['ResourceService.get_resources (sort=department)', 'ResourceService.get_unique_values',
+                    'FileService.export_csv', 'FileService.export_excel']},
+        {'keys': [('cost', 1), ('_id', 1)], 'options': {},
+         'serves': ['ResourceService.get_resources (cost range, sort=cost)']},
+        {'keys': [('procurement_date', 1), ('_id', 1)], 'options': {},
+         'serves': ['ResourceService.get_resources (sort=procurement_date)']},
+        {'keys': [('location', 1), ('cost', -1), ('_id', -1)], 'options': {},
+         'serves': ['ResourceService.get_resources (sort=location,-cost)']},
+        {'keys': [('department', 1), ('cost', -1), ('_id', -1)], 'options': {},
+         'serves': ['ResourceService.get_resources (sort=department,-cost)']},
+        {'keys': [('location_norm', 1)], 'options': {},
+         'serves': ['utils.compile_text_filter (location)', 'ResourceService.get_resources',
+                    'ResourceService.search_resources', 'AIService._execute_read',
+                    'AIService._execute_update_bulk', 'AIService._execute_delete_bulk']},
+        {'keys': [('department_norm', 1)], 'options': {},
+         'serves': ['utils.compile_text_filter (department)', 'ResourceService.get_resources',
+                    'ResourceService.search_resources', 'AIService._execute_read',
+                    'AIService._execute_update_bulk', 'AIService._execute_delete_bulk']},
+        {'keys': [('service_tag_grams', 1)], 'options': {},
+         'serves': ['ResourceService.lookup_resources']},
+        {'keys': [('identification_number_grams', 1)], 'options': {},
+         'serves': ['ResourceService.lookup_resources']},
+        {'keys': [(field, 'text') for field in RESOURCE_TEXT_WEIGHTS],
+         'options': {'name': 'resources_text_search', 'weights': RESOURCE_TEXT_WEIGHTS},
+         'serves': ['ResourceService.search_resources']}
+    ],
+    CHAT_HISTORY_COLLECTION: [
+        {'keys': [('user_id', 1), ('timestamp', -1), ('_id', -1)], 'options': {},
+         'serves': ['AIService.chat_history']}
+    ],
+    REVOKED_TOKENS_COLLECTION: [
+        {'keys': [('jti', 1)], 'options': {'unique': True},
+         'serves': ['RevocationList.revoke']},
+        {'keys': [('expires_at', 1)], 'options': {'expireAfterSeconds': 0},
+         'serves': ['TTL expiry', 'RevocationList.sync']}
+    ],
+    EMAIL_OUTBOX_COLLECTION: [
+        {'keys': [('status', 1), ('next_attempt_at', 1)], 'options': {},
+         'serves': ['EmailOutbox.claim']}
+    ],
+    RESOURCE_ROLLUPS_COLLECTION: [
+        {'keys': [('dimension', 1), ('count', -1)], 'options': {},
+         'serves': ['utils.read_rollups']}
+    ]
+}
+
+# Representative shapes of the hot queries, explained by `flask indexes`
+HOT_QUERIES = [
+    {'name': 'utils.get_user_from_token', 'collection': SESSIONS_COLLECTION,
+     'filter': {'session_token': 'token'}},
+    {'name': 'AuthService.login_user', 'collection': USERS_COLLECTION,
+     'filter': {'firebase_uid': 'uid'}},
+    {'name': 'AuthService.register_user', 'collection': USERS_COLLECTION,
+     'filter': {'email': 'user@example.com'}},
+    {'name': 'ResourceService.get_resources', 'collection': RESOURCES_COLLECTION,
+     'filter': {}, 'sort': [('created_at', -1), ('_id', -1)]},
+    {'name': 'ResourceService.get_resources (cost range)', 'collection': RESOURCES_COLLECTION,
+     'filter': {'cost': {'$gte': 0, '$lte': 1000}}},
+    {'name': 'ResourceService.get_resources (sort=-cost)', 'collection': RESOURCES_COLLECTION,
+     'filter': {}, 'sort': [('cost', -1), ('_id', -1)]},
+    {'name': 'ResourceService.get_resources (sort=location,-cost)', 'collection': RESOURCES_COLLECTION,
+     'filter': {}, 'sort': [('location', 1), ('cost', -1), ('_id', -1)]},
+    {'name': 'FileService.export_csv', 'collection': RESOURCES_COLLECTION,
+     'filter': {'location': 'Lab 1'}},
+    {'name': 'ResourceService.get_resources (department exact)', 'collection': RESOURCES_COLLECTION,
+     'filter': {'$or': [{'department_norm': 'cse'},
+                        {'department_norm': {'$exists': False}, 'department': {'$regex': '^\\s*cse\\s*$', '$options': 'i'}}]}},
+    {'name': 'ResourceService.get_resources (location prefix)', 'collection': RESOURCES_COLLECTION,
+     'filter': {'$or': [{'location_norm': {'$regex': '^lab'}},
+                        {'location_norm': {'$exists': False}, 'location': {'$regex': '^\\s*lab', '$options': 'i'}}]}},
+    {'name': 'ResourceService.lookup_resources', 'collection': RESOURCES_COLLECTION,
+     'filter': {'$or': [{'service_tag_grams': {'$all': ['7hx', 'hx2']}, 'service_tag': {'$regex': '7hx2', '$options': 'i'}},
+                        {'service_tag_grams': {'$exists': False}, 'service_tag': {'$regex': '7hx2', '$options': 'i'}}]}},
+    {'name': 'ResourceService.search_resources', 'collection': RESOURCES_COLLECTION,
+     'filter': {'$text': {'$search': 'monitor'}}},
+    {'name': 'AIService.chat_history', 'collection': CHAT_HISTORY_COLLECTION,
+     'filter': {'user_id': 'uid'}, 'sort': [('timestamp', -1), ('_id', -1)]},
+    {'name': 'EmailOutbox.claim', 'collection': EMAIL_OUTBOX_COLLECTION,
+     'filter': {'status': 'pending', 'next_attempt_at': {'$lte': 0}}}
+]
+
+# Index verification after startup, in a background thread: 'off', 'warn' or
+# 'fail' (/api/health answers 503 while declared indexes are missing)
+INDEX_STARTUP_CHECK = os.getenv('INDEX_STARTUP_CHECK', 'warn')
+
+# Collections whose indexes the app creates itself at startup: the session
+# lookup, TTL expiry and outbox indexes the maintenance tasks depend on
+MAINTENANCE_INDEX_COLLECTIONS = [SESSIONS_COLLECTION, REVOKED_TOKENS_COLLECTION, EMAIL_OUTBOX_COLLECTION]
@@ -2,33 +2,571 @@ import datetime
 import jwt
 import uuid
 import smtplib
-import pandas as pd
 import io
 import re
+import os
+import time
+import threading
+import bisect
+import html
+from urllib.parse import quote
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from flask import jsonify, send_file
+from flask import jsonify, send_file, Response, stream_with_context
 from bson.objectid import ObjectId
 from bson.errors import InvalidId
-import requests
+from pymongo import ReturnDocument, InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError, OperationFailure
 import json
 
 from config import (
     db, ADMIN_ROLE, VIEWER_ROLE, JWT_SECRET, GROQ_API_KEY, 
-    SMTP_EMAIL, SMTP_PASSWORD, MASTER_EMAIL, SMTP_SERVER, SMTP_PORT,
+    SMTP_EMAIL, SMTP_PASSWORD, MASTER_EMAIL, SMTP_SERVER, SMTP_PORT, SMTP_USE_TLS,
+    EMAIL_OUTBOX_COLLECTION, EMAIL_STATUS_PENDING, EMAIL_STATUS_SENDING,
+    EMAIL_STATUS_SENT, EMAIL_STATUS_FAILED, EMAIL_SENDER_WORKERS, EMAIL_BATCH_SIZE,
+    EMAIL_MAX_ATTEMPTS, EMAIL_RETRY_BASE_SECONDS, EMAIL_POLL_INTERVAL_SECONDS,
+    EMAIL_LEASE_SECONDS, EMAIL_IDLE_PROBE_SECONDS,
+    FIREBASE_CERTS_URL, FIREBASE_CERTS_FILE, get_firebase_project_id, init_firebase,
+    FIREBASE_KEY_REFRESH_MARGIN_SECONDS, FIREBASE_KEY_MIN_REFRESH_SECONDS,
+    COUNT_CACHED, COUNT_FACET, COUNT_ESTIMATED, COUNT_HAS_MORE, COUNT_NONE,
+    COUNT_STRATEGIES, COUNT_CAP, RESOURCE_INTERNAL_FIELDS, MATCH_CONTAINS,
+    RESOURCE_TEXT_WEIGHTS, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT,
+    LOOKUP_DEFAULT_LIMIT, LOOKUP_MAX_LIMIT, STREAM_BATCH_SIZE, SEARCH_SORT_CAP,
+    RESOURCE_BATCH_MAX_IDS, RESOURCE_BULK_MAX_OPERATIONS, RESOURCE_BULK_BATCH_SIZE,
+    DASHBOARD_METRICS, DASHBOARD_RECENT_DAYS, DASHBOARD_TOP_GROUPS,
+    ROLLUP_SOURCE_FIELDS, ROLLUP_ALL, ROLLUP_LOCATION, ROLLUP_DEPARTMENT,
+    ROLLUP_CREATED_MONTH, ROLLUP_PROCUREMENT_MONTH, CATALOG_FIELDS,
     USER_STATUS_PENDING, USER_STATUS_APPROVED, USER_STATUS_REJECTED,
     RESOURCE_REQUIRED_FIELDS, CSV_COLUMN_MAPPING,
     USERS_COLLECTION, RESOURCES_COLLECTION, SESSIONS_COLLECTION, CHAT_HISTORY_COLLECTION
 )
-from firebase_admin import auth as firebase_auth
-from utils import format_response, validate_email, get_user_from_token
+from utils import (
+    format_response, validate_email, session_cache, revocation_list,
+    build_keyset_query, cursor_for, calculate_cursor_pagination_info,
+    resource_count_cache, build_search_query, compile_text_filter,
+    compile_resource_filters, and_clause, add_search_fields, search_terms, find_highlights,
+    build_ngram_query, build_projection, strip_fields,
+    data_versions, json_dumps, parse_sort, validate_object_id, clean_resource_data,
+    update_rollups, read_rollups, rollups_ready, dashboard_cache, normalize_value, BackgroundTask
+)
+
+# Listing sort orders; _id breaks ties so keyset cursors are stable
+RESOURCE_LIST_SORT = [('created_at', -1), ('_id', -1)]
+CHAT_HISTORY_SORT = [('timestamp', -1), ('_id', -1)]
+
+# Hide derived shadow fields from API responses
+RESOURCE_PUBLIC_PROJECTION = {field: 0 for field in RESOURCE_INTERNAL_FIELDS}
+
+# Fields the dashboard rollups are computed from
+ROLLUP_PROJECTION = {field: 1 for field in ROLLUP_SOURCE_FIELDS}
+
+def parse_dashboard_metrics(metrics):
+    """Parse ?metrics=a,b into a list of DASHBOARD_METRICS; raises ValueError"""
+    if not metrics:
+        return list(DASHBOARD_METRICS)
+    
+    selected = [metric.strip() for metric in metrics.split(',') if metric.strip()]
+    unknown = [metric for metric in selected if metric not in DASHBOARD_METRICS]
+    if unknown or not selected:
+        raise ValueError(f"Invalid metrics. Use any of: {', '.join(DASHBOARD_METRICS)}")
+    return selected
+
+def build_dashboard_stats_pipeline(metrics, now):
+    """Build one $facet aggregation computing the selected dashboard metrics in a single pass"""
+    facets = {}
+    
+    if {'total_resources', 'total_cost', 'recent_additions'} & set(metrics):
+        since = now - datetime.timedelta(days=DASHBOARD_RECENT_DAYS)
+        facets['totals'] = [{'$group': {
+            '_id': None,
+            'total_resources': {'$sum': 1},
+            'total_cost': {'$sum': '$cost'},
+            'recent_additions': {'$sum': {'$cond': [{'$gte': ['$created_at', since]}, 1, 0]}}
+        }}]
+    
+    for metric, field in (('location_stats', '$location'), ('department_stats', '$department')):
+        if metric in metrics:
+            facets[metric] = [
+                {'$group': {'_id': field, 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1}},
+                {'$limit': DASHBOARD_TOP_GROUPS}
+            ]
+    
+    return [{'$project': {'cost': 1, 'created_at': 1, 'location': 1, 'department': 1}}, {'$facet': facets}]
+
+def read_dashboard_stats(result, metrics):
+    """Shape the $facet result of build_dashboard_stats_pipeline into the stats payload"""
+    totals = result.get('totals') or [{}]
+    stats = {}
+    for metric in metrics:
+        if metric in ('location_stats', 'department_stats'):
+            stats[metric] = result[metric]
+        else:
+            stats[metric] = totals[0].get(metric, 0)
+    return stats
+
+def read_dashboard_stats_from_rollups(metrics, now):
+    """Compute the selected dashboard metrics from the rollup collection"""
+    dimensions = {
+        'total_resources': ROLLUP_ALL, 'total_cost': ROLLUP_ALL,
+        'location_stats': ROLLUP_LOCATION, 'department_stats': ROLLUP_DEPARTMENT
+    }
+    rollups = read_rollups({dimensions[metric] for metric in metrics if metric in dimensions})
+    totals = rollups.get(ROLLUP_ALL) or [{}]
+    
+    stats = {}
+    for metric in metrics:
+        if metric == 'recent_additions':
+            # Sliding window, answered by the created_at index
+            since = now - datetime.timedelta(days=DASHBOARD_RECENT_DAYS)
+            stats[metric] = db[RESOURCES_COLLECTION].count_documents({'created_at': {'$gte': since}})
+        elif metric == 'total_resources':
+            stats[metric] = totals[0].get('count', 0)
+        elif metric == 'total_cost':
+            stats[metric] = totals[0].get('total_cost', 0)
+        else:
+            stats[metric] = [
+                {'_id': rollup['value'], 'count': rollup['count']}
+                for rollup in rollups[dimensions[metric]][:DASHBOARD_TOP_GROUPS]
+            ]
+    return stats
+
+def _month_trend(rollups, limit=12):
+    """Turn YYYY-MM rollups into the chart's [{_id: {year, month}, total_cost, count}], oldest first"""
+    trend = []
+    for rollup in sorted((r for r in rollups if r['value']), key=lambda r: r['value']):
+        try:
+            year, month = int(rollup['value'][:4]), int(rollup['value'][5:7])
+        except ValueError:
+            continue
+        trend.append({
+            '_id': {'year': year, 'month': month},
+            'total_cost': rollup['total_cost'],
+            'count': rollup['count']
+        })
+    return trend[:limit]
+
+def _resources_changed():
+    """Invalidate data derived from the resources collection after a write"""
+    resource_count_cache.invalidate()
+    dashboard_cache.invalidate()
+    resource_catalog.invalidate()
+    try:
+        data_versions.bump(RESOURCES_COLLECTION)
+    except Exception as e:
+        print(f"❌ Failed to bump resources data version: {e}")
+
+class GoogleCertificateSource:
+    """Fetch Firebase ID token signing certificates from Google"""
+
+    def __init__(self, url=FIREBASE_CERTS_URL, default_max_age=3600):
+        self.url = url
+        self.default_max_age = default_max_age
+
+    def fetch(self):
+        """Return ({kid: PEM certificate}, max_age_seconds)"""
+        import requests
+        
+        response = requests.get(self.url, timeout=10)
+        response.raise_for_status()
+        
+        max_age = self.default_max_age
+        cache_control = response.headers.get('Cache-Control', '')
+        match = re.search(r'max-age=(\d+)', cache_control)
+        if match:
+            max_age = int(match.group(1))
+        
+        return response.json(), max_age
+
+class LocalCertificateSource:
+    """Serve signing certificates from memory or a local JSON file"""
+
+    def __init__(self, certificates=None, path=None, max_age=3600):
+        self.certificates = certificates
+        self.path = path
+        self.max_age = max_age
+
+    def fetch(self):
+        if self.path:
+            with open(self.path) as f:
+                return json.load(f), self.max_age
+        return dict(self.certificates or {}), self.max_age
+
+class FirebaseTokenVerifier(BackgroundTask):
+    """Verify Firebase ID tokens locally against signing keys refreshed in the background"""
+
+    def __init__(self, project_id, key_source, refresh_margin=FIREBASE_KEY_REFRESH_MARGIN_SECONDS,
+                 min_refresh_interval=FIREBASE_KEY_MIN_REFRESH_SECONDS):
+        super().__init__()
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.key_source = key_source
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._expires_at = 0
+        self._last_fetch = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def refresh_keys(self):
+        """Fetch and parse the current signing certificates"""
+        from cryptography.x509 import load_pem_x509_certificate
+        
+        with self._lock:
+            self._last_fetch = time.time()
+        certificates, max_age = self.key_source.fetch()
+        keys = {
+            kid: load_pem_x509_certificate(pem.encode('utf-8')).public_key()
+            for kid, pem in certificates.items()
+        }
+        with self._lock:
+            self._keys = keys
+            self._expires_at = time.time() + max_age
+
+    def _get_key(self, kid):
+        self._ensure_refresher()
+        with self._lock:
+            key = self._keys.get(kid)
+            expired = time.time() >= self._expires_at
+            loaded = bool(self._keys)
+        
+        if key is not None and not expired:
+            return key
+        
+        # Unknown kid usually means Google rotated keys before our max-age ran out.
+        # Only the first login of a process has to wait for the fetch; later
+        # ones keep verifying against the stale keys if the fetch fails.
+        try:
+            self._refresh_throttled(wait=not loaded, expired=expired)
+        except Exception as e:
+            if not loaded:
+                raise
+            print(f"Firebase key refresh failed, serving stale keys: {e}")
+        with self._lock:
+            return self._keys.get(kid)
+
+    def _refresh_throttled(self, wait, expired=False):
+        """Refetch keys unless another thread is already fetching or unexpired keys were fetched recently"""
+        if not self._refresh_lock.acquire(blocking=wait):
+            return
+        try:
+            with self._lock:
+                recent = time.time() - self._last_fetch < self.min_refresh_interval
+                loaded = bool(self._keys)
+            if loaded and recent and not expired:
+                return
+            self.refresh_keys()
+        finally:
+            self._refresh_lock.release()
+
+    def verify(self, id_token):
+        """Verify an ID token and return its claims with 'uid' set"""
+        header = jwt.get_unverified_header(id_token)
+        if header.get('alg') != 'RS256':
+            raise ValueError("ID token has incorrect algorithm")
+        
+        key = self._get_key(header.get('kid'))
+        if key is None:
+            raise ValueError("ID token signed with unknown key")
+        
+        claims = jwt.decode(
+            id_token,
+            key,
+            algorithms=['RS256'],
+            audience=self.project_id,
+            issuer=self.issuer
+        )
+        
+        if not claims.get('sub'):
+            raise ValueError("ID token has no subject")
+        
+        claims['uid'] = claims['sub']
+        return claims
+
+    def _ensure_refresher(self):
+        self._start_threads('firebase-key-refresh', self._run)
 
-# Check if Firebase is initialized
-try:
-    import firebase_admin
-    firebase_initialized = firebase_admin._apps and len(firebase_admin._apps) > 0
-except Exception:
-    firebase_initialized = False
+    def _run(self):
+        while True:
+            with self._lock:
+                wait = self._expires_at - self.refresh_margin - time.time()
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            try:
+                with self._refresh_lock:
+                    self.refresh_keys()
+            except Exception as e:
+                print(f"Firebase key refresh failed: {e}")
+                time.sleep(30)
+
+_firebase_token_verifier = None
+
+def get_firebase_token_verifier():
+    """Return the local ID token verifier, or None if the project is unknown"""
+    global _firebase_token_verifier
+    if _firebase_token_verifier is not None:
+        return _firebase_token_verifier
+    
+    project_id = get_firebase_project_id()
+    if not project_id:
+        return None
+    
+    if FIREBASE_CERTS_FILE:
+        key_source = LocalCertificateSource(path=FIREBASE_CERTS_FILE)
+    else:
+        key_source = GoogleCertificateSource()
+    
+    _firebase_token_verifier = FirebaseTokenVerifier(project_id, key_source)
+    return _firebase_token_verifier
+
+def connect_smtp():
+    """Open an SMTP connection using the configured server and credentials"""
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=30)
+    if SMTP_USE_TLS:
+        server.starttls()
+    # Local stand-in servers do not advertise AUTH
+    if SMTP_PASSWORD and server.has_extn('auth'):
+        server.login(SMTP_EMAIL, SMTP_PASSWORD)
+    return server
+
+class EmailOutbox:
+    """Durable queue of outgoing emails stored in MongoDB"""
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+
+    def enqueue(self, to, subject, html_body):
+        """Write an email to the outbox and wake the sender pool"""
+        now = datetime.datetime.utcnow()
+        result = db[EMAIL_OUTBOX_COLLECTION].insert_one({
+            'to': to,
+            'subject': subject,
+            'html_body': html_body,
+            'status': EMAIL_STATUS_PENDING,
+            'attempts': 0,
+            'next_attempt_at': now,
+            'created_at': now,
+            'last_error': None
+        })
+        self._wakeup.set()
+        return result.inserted_id
+
+    def claim(self):
+        """Lease the next due email, including ones abandoned by a dead worker"""
+        now = datetime.datetime.utcnow()
+        return db[EMAIL_OUTBOX_COLLECTION].find_one_and_update(
+            {'$or': [
+                {'status': EMAIL_STATUS_PENDING, 'next_attempt_at': {'$lte': now}},
+                {'status': EMAIL_STATUS_SENDING, 'lease_until': {'$lt': now}}
+            ]},
+            {'$set': {
+                'status': EMAIL_STATUS_SENDING,
+                'lease_until': now + datetime.timedelta(seconds=EMAIL_LEASE_SECONDS)
+            }},
+            sort=[('next_attempt_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def mark_sent(self, email_id):
+        db[EMAIL_OUTBOX_COLLECTION].update_one(
+            {'_id': email_id},
+            {'$set': {'status': EMAIL_STATUS_SENT, 'sent_at': datetime.datetime.utcnow()},
+             '$inc': {'attempts': 1},
+             '$unset': {'lease_until': ''}}
+        )
+
+    def mark_failed(self, email_doc, error):
+        """Schedule a retry with exponential backoff, or give up after max attempts"""
+        attempts = email_doc.get('attempts', 0) + 1
+        update = {'attempts': attempts, 'last_error': str(error)}
+        if attempts >= EMAIL_MAX_ATTEMPTS:
+            update['status'] = EMAIL_STATUS_FAILED
+        else:
+            update['status'] = EMAIL_STATUS_PENDING
+            update['next_attempt_at'] = datetime.datetime.utcnow() + datetime.timedelta(
+                seconds=EMAIL_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+            )
+        db[EMAIL_OUTBOX_COLLECTION].update_one(
+            {'_id': email_doc['_id']},
+            {'$set': update, '$unset': {'lease_until': ''}}
+        )
+
+    def wait(self, timeout):
+        self._wakeup.wait(timeout)
+        self._wakeup.clear()
+
+class EmailSenderPool(BackgroundTask):
+    """Background workers that drain the outbox over reused SMTP connections"""
+
+    def __init__(self, outbox, workers=EMAIL_SENDER_WORKERS, batch_size=EMAIL_BATCH_SIZE,
+                 smtp_factory=connect_smtp, idle_probe_interval=EMAIL_IDLE_PROBE_SECONDS):
+        super().__init__()
+        self.outbox = outbox
+        self.workers = workers
+        self.batch_size = batch_size
+        self.smtp_factory = smtp_factory
+        self.idle_probe_interval = idle_probe_interval
+        # Each worker thread owns one connection, so track its last use per thread
+        self._local = threading.local()
+        self.sent = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the worker threads in the current process"""
+        self._start_threads('email-sender', self._run, count=self.workers)
+
+    def _run(self):
+        server = None
+        while True:
+            try:
+                server, processed = self.send_batch(server)
+            except Exception as e:
+                print(f"Email sender error: {e}")
+                server = self._close(server)
+                processed = 0
+            if not processed:
+                # Keep the connection open; _ensure_connection reconnects if it went stale
+                self.outbox.wait(EMAIL_POLL_INTERVAL_SECONDS)
+
+    def send_batch(self, server=None):
+        """Send up to batch_size due emails over one connection"""
+        processed = 0
+        while processed < self.batch_size:
+            email_doc = self.outbox.claim()
+            if email_doc is None:
+                break
+            processed += 1
+            
+            try:
+                server = self._ensure_connection(server)
+                msg = MIMEMultipart()
+                msg['Subject'] = email_doc['subject']
+                msg['From'] = SMTP_EMAIL
+                msg['To'] = email_doc['to']
+                msg.attach(MIMEText(email_doc['html_body'], 'html'))
+                server.sendmail(SMTP_EMAIL, [email_doc['to']], msg.as_string())
+                self._local.last_used = time.time()
+                self.outbox.mark_sent(email_doc['_id'])
+                self.sent += 1
+            except Exception as e:
+                print(f"❌ Failed to send email to {email_doc['to']}: {e}")
+                self.outbox.mark_failed(email_doc, e)
+                self.failed += 1
+                server = self._close(server)
+        
+        return server, processed
+
+    def _ensure_connection(self, server):
+        if server is not None:
+            # A connection used moments ago is trusted; a failed send closes it anyway
+            if time.time() - getattr(self._local, 'last_used', 0) < self.idle_probe_interval:
+                return server
+            try:
+                if server.noop()[0] == 250:
+                    self._local.last_used = time.time()
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(server)
+        server = self.smtp_factory()
+        self._local.last_used = time.time()
+        return server
+
+    @staticmethod
+    def _close(server):
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+        return None
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'sent': self.sent,
+            'failed': self.failed,
+            'pending': db[EMAIL_OUTBOX_COLLECTION].count_documents({'status': EMAIL_STATUS_PENDING})
+        }
+
+email_outbox = EmailOutbox()
+email_sender_pool = EmailSenderPool(email_outbox)
+
+class ResourceCatalog:
+    """In-memory catalog of distinct location/department values and counts, reloaded when the data version changes"""
+
+    def __init__(self, fields=CATALOG_FIELDS):
+        self.fields = fields
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def _load(self, field):
+        if rollups_ready():
+            dimension = self.fields[field]
+            groups = [(rollup['value'], rollup['count']) for rollup in read_rollups([dimension])[dimension]]
+        else:
+            groups = [
+                (group['_id'], group['count']) for group in
+                db[RESOURCES_COLLECTION].aggregate([{'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}])
+            ]
+        values = sorted(
+            ((normalize_value(value), value, count) for value, count in groups if value is not None),
+            key=lambda entry: entry[0]
+        )
+        return [entry[0] for entry in values], values
+
+    def get(self, field, prefix=None):
+        """Return [(value, count)] for a catalog field, optionally only values starting with prefix"""
+        try:
+            version = data_versions.get(RESOURCES_COLLECTION)
+        except Exception as e:
+            print(f"❌ Catalog version unavailable, loading directly: {e}")
+            version = None
+        
+        with self._lock:
+            entry = self._entries.get(field)
+            if version is not None and entry and entry[0] == version:
+                self.hits += 1
+                catalog = entry[1]
+            else:
+                catalog = None
+        
+        if catalog is None:
+            catalog = self._load(field)
+            with self._lock:
+                self.loads += 1
+                if version is not None:
+                    self._entries[field] = (version, catalog)
+        
+        normalized_values, values = catalog
+        if not prefix:
+            return [(value, count) for _, value, count in values]
+        
+        prefix = normalize_value(prefix)
+        matches = []
+        for normalized, value, count in values[bisect.bisect_left(normalized_values, prefix):]:
+            if not normalized.startswith(prefix):
+                break
+            matches.append((value, count))
+        return matches
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'fields': {field: len(entry[1][1]) for field, entry in self._entries.items()},
+                'hits': self.hits,
+                'loads': self.loads
+            }
+
+resource_catalog = ResourceCatalog()
 
 class AuthService:
     def register_user(self, data):
@@ -53,8 +591,9 @@ class AuthService:
             
             # Create user with Firebase (or mock if Firebase not available)
             user_uid = None
-            if firebase_initialized:
+            if init_firebase():
                 try:
+                    from firebase_admin import auth as firebase_auth
                     user_record = firebase_auth.create_user(
                         email=email,
                         password=password,
@@ -99,18 +638,15 @@ class AuthService:
 
     
     def send_admin_verification_email(self, admin_email, admin_name):
-        """Send verification email to master admin"""
+        """Queue verification email to master admin"""
         try:
-            if not SMTP_EMAIL or not SMTP_PASSWORD or not MASTER_EMAIL:
+            if not SMTP_EMAIL or not MASTER_EMAIL:
                 print("Email configuration not complete, skipping email")
                 return
             
-            approval_link = f"https://znlm131v-5000.inc1.devtunnels.ms/admin-verify?email={admin_email}"
-            
-            msg = MIMEMultipart()
-            msg['Subject'] = 'New Admin Account Verification Required'
-            msg['From'] = SMTP_EMAIL
-            msg['To'] = MASTER_EMAIL
+            approval_link = html.escape(
+                f"https://znlm131v-5000.inc1.devtunnels.ms/admin-verify?email={quote(admin_email)}"
+            )
             
             body = f"""
             <html>
@@ -118,8 +654,8 @@ class AuthService:
                 <h2>New Admin Account Verification</h2>
                 <p>A new admin account has been created and requires your approval:</p>
                 <ul>
-                    <li><strong>Name:</strong> {admin_name}</li>
-                    <li><strong>Email:</strong> {admin_email}</li>
+                    <li><strong>Name:</strong> {html.escape(admin_name or '')}</li>
+                    <li><strong>Email:</strong> {html.escape(admin_email)}</li>
                     <li><strong>Request Date:</strong> {datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC</li>
                 </ul>
                 <p>
@@ -135,18 +671,43 @@ class AuthService:
             </html>
             """
             
-            msg.attach(MIMEText(body, 'html'))
+            email_outbox.enqueue(MASTER_EMAIL, 'New Admin Account Verification Required', body)
             
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-            server.starttls()
-            server.login(SMTP_EMAIL, SMTP_PASSWORD)
-            server.sendmail(SMTP_EMAIL, MASTER_EMAIL, msg.as_string())
-            server.quit()
+            print(f"✅ Admin verification email queued for {admin_email}")
             
-            print(f"✅ Admin verification email sent for {admin_email}")
+        except Exception as e:
+            print(f"❌ Failed to queue admin verification email: {e}")
+    
+    def send_approval_notification(self, email, name, approved=True):
+        """Queue approval/rejection notification to the admin applicant"""
+        try:
+            if not SMTP_EMAIL:
+                print("Email configuration not complete, skipping email")
+                return
+            
+            if approved:
+                subject = 'Your Admin Account Has Been Approved'
+                status_text = 'approved. You can now log in to Campus Assets'
+            else:
+                subject = 'Your Admin Account Request Was Rejected'
+                status_text = 'rejected. Contact the master admin if you think this is a mistake'
+            
+            body = f"""
+            <html>
+            <body>
+                <h2>Admin Account Verification</h2>
+                <p>Hello {html.escape(name or email)},</p>
+                <p>Your admin account request has been {status_text}.</p>
+            </body>
+            </html>
+            """
+            
+            email_outbox.enqueue(email, subject, body)
+            
+            print(f"✅ Approval notification queued for {email}")
             
         except Exception as e:
-            print(f"❌ Failed to send admin verification email: {e}")
+            print(f"❌ Failed to queue approval notification: {e}")
     
     def login_user(self, data):
         """Login user with Firebase token or mock token"""
@@ -161,9 +722,15 @@ class AuthService:
                 email = id_token.replace('simulated_firebase_token_', '')
                 uid = f"mock_uid_{email.replace('@', '_').replace('.', '_')}"
             else:
-                # Try to verify with Firebase
+                # Verify locally against cached keys when the Firebase project is known
                 try:
-                    if firebase_initialized:
+                    token_verifier = get_firebase_token_verifier()
+                    if token_verifier is not None:
+                        decoded_token = token_verifier.verify(id_token)
+                        uid = decoded_token['uid']
+                        email = decoded_token.get('email')
+                    elif init_firebase():
+                        from firebase_admin import auth as firebase_auth
                         decoded_token = firebase_auth.verify_id_token(id_token)
                         uid = decoded_token['uid']
                         email = decoded_token.get('email')
@@ -181,11 +748,13 @@ class AuthService:
                 return format_response(error="Account not approved", status=403)
             
             # Create session token
+            expires_at = datetime.datetime.utcnow() + datetime.timedelta(hours=8)
             session_data = {
                 'uid': uid,
                 'email': user['email'],
                 'role': user['role'],
-                'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=8)
+                'jti': uuid.uuid4().hex,
+                'exp': expires_at
             }
             
             session_token = jwt.encode(session_data, JWT_SECRET, algorithm='HS256')
@@ -194,7 +763,8 @@ class AuthService:
             session_doc = {
                 'user_id': uid,
                 'session_token': session_token,
-                'expires_at': datetime.datetime.utcnow() + datetime.timedelta(hours=8),
+                'jti': session_data['jti'],
+                'expires_at': expires_at,
                 'created_at': datetime.datetime.utcnow(),
                 'ip_address': None
             }
@@ -250,16 +820,24 @@ class AuthService:
         except Exception as e:
             return format_response(error=f"Admin verification failed: {str(e)}", status=400)
     
-    def logout_user(self, request):
+    def logout_user(self, session_token):
         """Logout user by invalidating session"""
         try:
-            auth_header = request.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
+            if not session_token:
                 return format_response(error="No session token provided", status=400)
             
-            session_token = auth_header.split(' ')[1]
+            # Evict cached session before removing it from database
+            session_cache.invalidate(session_token)
+            
+            # Revoke the token ID so stateless verification rejects it too
+            token_data = jwt.decode(
+                session_token, JWT_SECRET, algorithms=['HS256'], options={'verify_exp': False}
+            )
+            if token_data.get('jti'):
+                revocation_list.revoke(
+                    token_data['jti'], datetime.datetime.utcfromtimestamp(token_data['exp'])
+                )
             
-            # Remove session from database
             result = db[SESSIONS_COLLECTION].delete_one({'session_token': session_token})
             
             if result.deleted_count == 0:
@@ -270,10 +848,9 @@ class AuthService:
         except Exception as e:
             return format_response(error=f"Logout failed: {str(e)}", status=400)
     
-    def get_user_profile(self, request):
+    def get_user_profile(self, user_data):
         """Get user profile information"""
         try:
-            user_data = get_user_from_token(request)
             if not user_data:
                 return format_response(error="Invalid session", status=401)
             
@@ -287,8 +864,8 @@ class AuthService:
                 'name': user.get('name', ''),
                 'role': user['role'],
                 'status': user['status'],
-                'created_at': user['created_at'].isoformat(),
-                'last_login': user['last_login'].isoformat() if user['last_login'] else None
+                'created_at': user['created_at'],
+                'last_login': user['last_login']
             }
             
             return format_response(data=profile_data, status=200)
@@ -297,60 +874,127 @@ class AuthService:
             return format_response(error=f"Failed to fetch profile: {str(e)}", status=400)
 
 class ResourceService:
-    def get_resources(self, filters, page=1, limit=10):
-        """Get resources with filtering and pagination"""
+    def _build_resource_query(self, filters):
+        """Build the MongoDB query for resource listing filters"""
+        query = {}
+        
+        # Apply filters (location_match/department_match: exact, prefix or contains)
+        for field in ['location', 'department']:
+            if field in filters and filters[field]:
+                mode = filters.get(f'{field}_match') or MATCH_CONTAINS
+                and_clause(query, compile_text_filter(field, filters[field], mode))
+        
+        if 'cost_min' in filters or 'cost_max' in filters:
+            cost_query = {}
+            if 'cost_min' in filters and filters['cost_min']:
+                cost_query['$gte'] = float(filters['cost_min'])
+            if 'cost_max' in filters and filters['cost_max']:
+                cost_query['$lte'] = float(filters['cost_max'])
+            if cost_query:
+                query['cost'] = cost_query
+        
+        if 'search' in filters and filters['search']:
+            and_clause(query, build_search_query(
+                filters['search'], ['description', 'sl_no', 'service_tag', 'identification_number']
+            ))
+        
+        return query
+    
+    def _count_resources(self, query, strategy, skip, limit):
+        """Return (total, total_is_exact) for a listing query"""
+        collection = db[RESOURCES_COLLECTION]
+        
+        if strategy == COUNT_ESTIMATED and not query:
+            return collection.estimated_document_count(), False
+        
+        if strategy in (COUNT_CACHED, COUNT_ESTIMATED):
+            total = resource_count_cache.get(query)
+            if total is None:
+                total = collection.count_documents(query)
+                resource_count_cache.set(query, total)
+            return total, True
+        
+        if strategy == COUNT_HAS_MORE:
+            cap = skip + limit + COUNT_CAP
+            total = collection.count_documents(query, limit=cap)
+            return total, total < cap
+        
+        return collection.count_documents(query), True
+    
+    def get_resources(self, filters, page=1, limit=10, cursor=None, count=None, fields=None, view=None,
+                      sort=None):
+        """Get resources with filtering and page or keyset (cursor) pagination"""
         try:
-            query = {}
-            
-            # Apply filters
-            if 'location' in filters and filters['location']:
-                query['location'] = {'$regex': filters['location'], '$options': 'i'}
-            
-            if 'department' in filters and filters['department']:
-                query['department'] = {'$regex': filters['department'], '$options': 'i'}
-            
-            if 'cost_min' in filters or 'cost_max' in filters:
-                cost_query = {}
-                if 'cost_min' in filters and filters['cost_min']:
-                    cost_query['$gte'] = float(filters['cost_min'])
-                if 'cost_max' in filters and filters['cost_max']:
-                    cost_query['$lte'] = float(filters['cost_max'])
-                if cost_query:
-                    query['cost'] = cost_query
-            
-            if 'search' in filters and filters['search']:
-                search_term = filters['search']
-                query['$or'] = [
-                    {'description': {'$regex': search_term, '$options': 'i'}},
-                    {'sl_no': {'$regex': search_term, '$options': 'i'}},
-                    {'service_tag': {'$regex': search_term, '$options': 'i'}},
-                    {'identification_number': {'$regex': search_term, '$options': 'i'}}
-                ]
+            if count is None:
+                count = COUNT_CACHED if cursor is None else COUNT_NONE
+            if count not in COUNT_STRATEGIES:
+                return format_response(
+                    error=f"Invalid count strategy. Use one of: {', '.join(COUNT_STRATEGIES)}",
+                    status=400
+                )
             
-            # Calculate pagination
-            skip = (page - 1) * limit
+            try:
+                sort = parse_sort(sort, default=RESOURCE_LIST_SORT)
+                projection, helper_fields = build_projection(
+                    fields, view, required=[field for field, _ in sort]
+                )
+                query = self._build_resource_query(filters)
+                find_query = build_keyset_query(query, sort, cursor) if cursor else query
+            except ValueError as e:
+                return format_response(error=str(e), status=400)
+            
+            skip = (page - 1) * limit if cursor is None else 0
+            total = None
+            total_is_exact = False
+            
+            # Fetch one extra row to learn whether another page exists
+            if count == COUNT_FACET and cursor is None:
+                facet = list(db[RESOURCES_COLLECTION].aggregate([
+                    {'$match': query},
+                    {'$facet': {
+                        'resources': [
+                            {'$sort': dict(sort)},
+                            {'$skip': skip},
+                            {'$limit': limit + 1},
+                            {'$project': projection}
+                        ],
+                        'total': [{'$count': 'count'}]
+                    }}
+                ]))[0]
+                resources = facet['resources']
+                total = facet['total'][0]['count'] if facet['total'] else 0
+                total_is_exact = True
+            else:
+                resources = list(
+                    db[RESOURCES_COLLECTION].find(find_query, projection)
+                    .sort(sort).skip(skip).limit(limit + 1)
+                )
+                if count != COUNT_NONE:
+                    total, total_is_exact = self._count_resources(query, count, skip, limit)
             
-            # Get resources
-            resources = list(db[RESOURCES_COLLECTION].find(query).skip(skip).limit(limit).sort('created_at', -1))
-            total = db[RESOURCES_COLLECTION].count_documents(query)
+            next_cursor = None
+            if len(resources) > limit:
+                resources = resources[:limit]
+                next_cursor = cursor_for(resources[-1], sort)
+            strip_fields(resources, helper_fields)
             
-            # Convert ObjectId to string
-            for resource in resources:
-                resource['_id'] = str(resource['_id'])
-                if 'created_at' in resource:
-                    resource['created_at'] = resource['created_at'].isoformat()
-                if 'updated_at' in resource:
-                    resource['updated_at'] = resource['updated_at'].isoformat()
+            if cursor is not None:
+                pagination = calculate_cursor_pagination_info(limit, next_cursor, total)
+            else:
+                pagination = {
+                    'page': page,
+                    'limit': limit,
+                    'total': total,
+                    'pages': (total + limit - 1) // limit if total is not None else None,
+                    'next_cursor': next_cursor
+                }
+            pagination['count'] = count
+            pagination['total_is_exact'] = total_is_exact
             
             return format_response(
                 data={
                     'resources': resources,
-                    'pagination': {
-                        'page': page,
-                        'limit': limit,
-                        'total': total,
-                        'pages': (total + limit - 1) // limit
-                    }
+                    'pagination': pagination
                 },
                 status=200
             )
@@ -358,7 +1002,31 @@ class ResourceService:
         except Exception as e:
             return format_response(error=f"Failed to fetch resources: {str(e)}", status=400)
     
-    def create_resource(self, data, request):
+    def stream_resources(self, filters, fields=None, view=None):
+        """Stream every resource matching the listing filters as NDJSON"""
+        try:
+            query = self._build_resource_query(filters)
+            projection, _ = build_projection(fields, view)
+        except ValueError as e:
+            return format_response(error=str(e), status=400)
+        
+        def generate():
+            cursor = (
+                db[RESOURCES_COLLECTION].find(query, projection)
+                .sort(RESOURCE_LIST_SORT).batch_size(STREAM_BATCH_SIZE)
+            )
+            try:
+                for resource in cursor:
+                    yield json_dumps(resource) + b'\n'
+            except Exception as e:
+                print(f"❌ Resource stream failed: {e}")
+                yield json_dumps({'error': f"Stream failed: {str(e)}"}) + b'\n'
+            finally:
+                cursor.close()
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    def create_resource(self, data, user_data):
         """Create a new resource"""
         try:
             # Validate required fields
@@ -366,8 +1034,6 @@ class ResourceService:
                 if field not in data or not data[field]:
                     return format_response(error=f"Missing required field: {field}", status=400)
             
-            # Get user data
-            user_data = get_user_from_token(request)
             if not user_data:
                 return format_response(error="Invalid session", status=401)
             
@@ -385,9 +1051,12 @@ class ResourceService:
                 'created_at': datetime.datetime.utcnow(),
                 'updated_at': datetime.datetime.utcnow()
             }
+            add_search_fields(resource_doc)
             
             # Insert resource
             result = db[RESOURCES_COLLECTION].insert_one(resource_doc)
+            update_rollups(added=[resource_doc])
+            _resources_changed()
             
             return format_response(
                 data={'resource_id': str(result.inserted_id)},
@@ -398,34 +1067,236 @@ class ResourceService:
         except Exception as e:
             return format_response(error=f"Failed to create resource: {str(e)}", status=400)
     
-    def get_resource(self, resource_id):
+    def _prepare_bulk_operation(self, operation, now, user_data):
+        """Validate one bulk item; return (write, resource_id, fields written) or raise ValueError"""
+        if not isinstance(operation, dict):
+            raise ValueError("Operation must be an object")
+        
+        op = operation.get('op')
+        data = operation.get('data') or {}
+        if not isinstance(data, dict):
+            raise ValueError("data must be an object")
+        
+        if op == 'create':
+            resource_doc = clean_resource_data(data)
+            for field in RESOURCE_REQUIRED_FIELDS:
+                if not resource_doc.get(field) and resource_doc.get(field) != 0:
+                    raise ValueError(f"Missing or invalid field: {field}")
+            
+            resource_doc.update({
+                '_id': ObjectId(),
+                'created_by': user_data['email'],
+                'created_at': now,
+                'updated_at': now
+            })
+            add_search_fields(resource_doc)
+            return InsertOne(resource_doc), str(resource_doc['_id']), resource_doc
+        
+        if op not in ('update', 'delete'):
+            raise ValueError("op must be one of: create, update, delete")
+        
+        resource_id = operation.get('id')
+        if not isinstance(resource_id, str) or not validate_object_id(resource_id):
+            raise ValueError("Invalid resource ID")
+        
+        if op == 'delete':
+            return DeleteOne({'_id': ObjectId(resource_id)}), resource_id, None
+        
+        data = {k: v for k, v in data.items() if v is not None and v != ''}
+        update_data = clean_resource_data(data)
+        invalid = [field for field in ('cost', 'procurement_date') if field in data and field not in update_data]
+        if invalid:
+            raise ValueError(f"Invalid field: {', '.join(invalid)}")
+        if not update_data:
+            raise ValueError("No fields provided for update")
+        
+        update_data['updated_at'] = now
+        update_data['updated_by'] = user_data['email']
+        add_search_fields(update_data)
+        return UpdateOne({'_id': ObjectId(resource_id)}, {'$set': update_data}), resource_id, update_data
+    
+    def bulk_resources(self, operations, user_data):
+        """Apply create/update/delete operations in unordered bulk_write batches, reporting each item"""
+        try:
+            if not user_data:
+                return format_response(error="Invalid session", status=401)
+            
+            if not isinstance(operations, list) or not operations:
+                return format_response(error="operations must be a non-empty list", status=400)
+            
+            if len(operations) > RESOURCE_BULK_MAX_OPERATIONS:
+                return format_response(
+                    error=f"Too many operations. Maximum is {RESOURCE_BULK_MAX_OPERATIONS}",
+                    status=400
+                )
+            
+            now = datetime.datetime.utcnow()
+            results = []
+            pending = []
+            
+            for index, operation in enumerate(operations):
+                item = operation if isinstance(operation, dict) else {}
+                result = {'index': index, 'op': item.get('op'), 'id': item.get('id')}
+                results.append(result)
+                try:
+                    write, result['id'], document = self._prepare_bulk_operation(operation, now, user_data)
+                    pending.append((index, write, document))
+                except ValueError as e:
+                    result.update(status='error', error=str(e))
+            
+            # Unordered batches give repeated targets no defined order
+            targeted = set()
+            for index, write, _ in pending:
+                if isinstance(write, InsertOne):
+                    continue
+                key = results[index]['id'].lower()
+                if key in targeted:
+                    results[index].update(status='error', error="Duplicate resource ID in request")
+                targeted.add(key)
+            pending = [entry for entry in pending if 'status' not in results[entry[0]]]
+            
+            # Existing targets, with the fields the dashboard rollups need
+            target_ids = {
+                ObjectId(results[index]['id']) for index, write, _ in pending
+                if not isinstance(write, InsertOne)
+            }
+            existing = {}
+            if target_ids:
+                existing = {
+                    str(doc['_id']): doc for doc in
+                    db[RESOURCES_COLLECTION].find({'_id': {'$in': list(target_ids)}}, ROLLUP_PROJECTION)
+                }
+                for index, write, _ in pending:
+                    if not isinstance(write, InsertOne) and results[index]['id'].lower() not in existing:
+                        results[index].update(status='error', error="Resource not found")
+                pending = [entry for entry in pending if 'status' not in results[entry[0]]]
+            
+            statuses = {'create': 'created', 'update': 'updated', 'delete': 'deleted'}
+            written = 0
+            removed = []
+            added = []
+            try:
+                for start in range(0, len(pending), RESOURCE_BULK_BATCH_SIZE):
+                    batch = pending[start:start + RESOURCE_BULK_BATCH_SIZE]
+                    failed = {}
+                    try:
+                        db[RESOURCES_COLLECTION].bulk_write([write for _, write, _ in batch], ordered=False)
+                    except BulkWriteError as e:
+                        failed = {error['index']: error.get('errmsg', 'Write failed') for error in e.details['writeErrors']}
+                    
+                    for position, (index, write, document) in enumerate(batch):
+                        if position in failed:
+                            results[index].update(status='error', error=failed[position])
+                            continue
+                        
+                        op = results[index]['op']
+                        results[index]['status'] = statuses[op]
+                        written += 1
+                        
+                        if op == 'create':
+                            added.append(document)
+                        else:
+                            previous = existing[results[index]['id'].lower()]
+                            removed.append(previous)
+                            if op == 'update':
+                                added.append({**previous, **document})
+            finally:
+                # Account for the batches already applied even if a later one raised
+                if written:
+                    update_rollups(removed=removed, added=added)
+                    _resources_changed()
+            
+            errors = sum(1 for result in results if result['status'] == 'error')
+            return format_response(
+                data={
+                    'results': results,
+                    'succeeded': len(results) - errors,
+                    'failed': errors
+                },
+                message=f"Applied {len(results) - errors} of {len(results)} operations",
+                status=200
+            )
+            
+        except Exception as e:
+            return format_response(error=f"Bulk operation failed: {str(e)}", status=400)
+    
+    def get_resource(self, resource_id, fields=None, view=None):
         """Get a specific resource"""
         try:
             if not ObjectId.is_valid(resource_id):
                 return format_response(error="Invalid resource ID", status=400)
             
-            resource = db[RESOURCES_COLLECTION].find_one({'_id': ObjectId(resource_id)})
+            try:
+                projection, _ = build_projection(fields, view)
+            except ValueError as e:
+                return format_response(error=str(e), status=400)
+            
+            resource = db[RESOURCES_COLLECTION].find_one({'_id': ObjectId(resource_id)}, projection)
             if not resource:
                 return format_response(error="Resource not found", status=404)
             
-            resource['_id'] = str(resource['_id'])
-            if 'created_at' in resource:
-                resource['created_at'] = resource['created_at'].isoformat()
-            if 'updated_at' in resource:
-                resource['updated_at'] = resource['updated_at'].isoformat()
-            
             return format_response(data=resource, status=200)
             
         except Exception as e:
             return format_response(error=f"Failed to fetch resource: {str(e)}", status=400)
     
-    def update_resource(self, resource_id, data, request):
+    def get_resources_by_ids(self, resource_ids, fields=None, view=None):
+        """Fetch several resources with one $in query, answering in request order"""
+        try:
+            if not isinstance(resource_ids, list) or not resource_ids:
+                return format_response(error="ids must be a non-empty list", status=400)
+            
+            if len(resource_ids) > RESOURCE_BATCH_MAX_IDS:
+                return format_response(
+                    error=f"Too many IDs. Maximum is {RESOURCE_BATCH_MAX_IDS}",
+                    status=400
+                )
+            
+            try:
+                projection, _ = build_projection(fields, view)
+            except ValueError as e:
+                return format_response(error=str(e), status=400)
+            
+            valid_ids = {
+                resource_id.lower() for resource_id in resource_ids
+                if isinstance(resource_id, str) and validate_object_id(resource_id)
+            }
+            
+            found = {}
+            if valid_ids:
+                for resource in db[RESOURCES_COLLECTION].find(
+                    {'_id': {'$in': [ObjectId(resource_id) for resource_id in valid_ids]}}, projection
+                ):
+                    found[str(resource['_id'])] = resource
+            
+            results = []
+            for resource_id in resource_ids:
+                key = resource_id.lower() if isinstance(resource_id, str) else None
+                if key not in valid_ids:
+                    results.append({'id': resource_id, 'found': False, 'error': "Invalid resource ID"})
+                elif key not in found:
+                    results.append({'id': resource_id, 'found': False, 'error': "Resource not found"})
+                else:
+                    results.append({'id': resource_id, 'found': True, 'resource': found[key]})
+            
+            return format_response(
+                data={
+                    'results': results,
+                    'found': sum(1 for result in results if result['found']),
+                    'requested': len(resource_ids)
+                },
+                status=200
+            )
+            
+        except Exception as e:
+            return format_response(error=f"Failed to fetch resources: {str(e)}", status=400)
+    
+    def update_resource(self, resource_id, data, user_data):
         """Update a resource"""
         try:
             if not ObjectId.is_valid(resource_id):
                 return format_response(error="Invalid resource ID", status=400)
             
-            user_data = get_user_from_token(request)
             if not user_data:
                 return format_response(error="Invalid session", status=401)
             
@@ -439,16 +1310,21 @@ class ResourceService:
             # Add metadata
             update_data['updated_at'] = datetime.datetime.utcnow()
             update_data['updated_by'] = user_data['email']
+            add_search_fields(update_data)
             
             # Update resource
-            result = db[RESOURCES_COLLECTION].update_one(
+            previous = db[RESOURCES_COLLECTION].find_one_and_update(
                 {'_id': ObjectId(resource_id)},
-                {'$set': update_data}
+                {'$set': update_data},
+                projection=ROLLUP_PROJECTION,
+                return_document=ReturnDocument.BEFORE
             )
             
-            if result.matched_count == 0:
+            if previous is None:
                 return format_response(error="Resource not found", status=404)
             
+            update_rollups(removed=[previous], added=[{**previous, **update_data}])
+            _resources_changed()
             return format_response(message="Resource updated successfully", status=200)
             
         except Exception as e:
@@ -460,95 +1336,142 @@ class ResourceService:
             if not ObjectId.is_valid(resource_id):
                 return format_response(error="Invalid resource ID", status=400)
             
-            result = db[RESOURCES_COLLECTION].delete_one({'_id': ObjectId(resource_id)})
+            previous = db[RESOURCES_COLLECTION].find_one_and_delete(
+                {'_id': ObjectId(resource_id)}, projection=ROLLUP_PROJECTION
+            )
             
-            if result.deleted_count == 0:
+            if previous is None:
                 return format_response(error="Resource not found", status=404)
             
+            update_rollups(removed=[previous])
+            _resources_changed()
             return format_response(message="Resource deleted successfully", status=200)
             
         except Exception as e:
             return format_response(error=f"Failed to delete resource: {str(e)}", status=400)
     
-    def search_resources(self, query, filters):
-        """Search resources with advanced filtering"""
+    def search_resources(self, query, filters, page=1, limit=SEARCH_DEFAULT_LIMIT, fields=None, view=None,
+                         sort=None):
+        """Search resources with the weighted text index, ranked by relevance"""
         try:
-            search_query = {}
-            
-            if query:
-                search_query['$or'] = [
-                    {'description': {'$regex': query, '$options': 'i'}},
-                    {'sl_no': {'$regex': query, '$options': 'i'}},
-                    {'service_tag': {'$regex': query, '$options': 'i'}},
-                    {'identification_number': {'$regex': query, '$options': 'i'}},
-                    {'location': {'$regex': query, '$options': 'i'}},
-                    {'department': {'$regex': query, '$options': 'i'}}
-                ]
+            limit = max(1, min(limit, SEARCH_MAX_LIMIT))
             
-            # Apply additional filters
-            if 'location' in filters and filters['location']:
-                search_query['location'] = {'$regex': filters['location'], '$options': 'i'}
+            try:
+                requested_sort = parse_sort(sort)
+                projection, _ = build_projection(fields, view)
+            except ValueError as e:
+                return format_response(error=str(e), status=400)
             
-            if 'department' in filters and filters['department']:
-                search_query['department'] = {'$regex': filters['department'], '$options': 'i'}
+            # Apply additional filters
+            filter_query = {}
+            for field in ['location', 'department']:
+                if field in filters and filters[field]:
+                    mode = filters.get(f'{field}_match') or MATCH_CONTAINS
+                    and_clause(filter_query, compile_text_filter(field, filters[field], mode))
             
-            resources = list(db[RESOURCES_COLLECTION].find(search_query).limit(50))
+            skip = (page - 1) * limit
+            terms = search_terms(query)
+            try:
+                resources, total = self._text_search(query, filter_query, requested_sort, projection, skip, limit)
+            except OperationFailure as e:
+                # $text needs resources_text_search, which only `flask indexes` creates
+                print(f"❌ Text search unavailable, falling back to regex: {e}")
+                regex_query = dict(filter_query)
+                for term in terms:
+                    and_clause(regex_query, build_search_query(term, list(RESOURCE_TEXT_WEIGHTS)))
+                resources = list(
+                    db[RESOURCES_COLLECTION].find(regex_query, projection)
+                    .sort(requested_sort or RESOURCE_LIST_SORT).skip(skip).limit(limit)
+                )
+                total = db[RESOURCES_COLLECTION].count_documents(regex_query)
             
-            # Convert ObjectId to string
             for resource in resources:
-                resource['_id'] = str(resource['_id'])
-                if 'created_at' in resource:
-                    resource['created_at'] = resource['created_at'].isoformat()
-                if 'updated_at' in resource:
-                    resource['updated_at'] = resource['updated_at'].isoformat()
+                resource['highlights'] = find_highlights(resource, terms, RESOURCE_TEXT_WEIGHTS)
             
-            return format_response(data=resources, status=200)
+            return format_response(
+                data={
+                    'resources': resources,
+                    'pagination': {
+                        'page': page,
+                        'limit': limit,
+                        'total': total,
+                        'pages': (total + limit - 1) // limit
+                    }
+                },
+                status=200
+            )
             
         except Exception as e:
             return format_response(error=f"Search failed: {str(e)}", status=400)
     
-    def dashboard_stats(self):
-        """Get dashboard statistics"""
-        try:
-            total_resources = db[RESOURCES_COLLECTION].count_documents({})
-            
-            # Resources by location
-            location_stats = list(db[RESOURCES_COLLECTION].aggregate([
-                {'$group': {'_id': '$location', 'count': {'$sum': 1}}},
-                {'$sort': {'count': -1}},
-                {'$limit': 10}
+    def _text_search(self, query, filter_query, requested_sort, projection, skip, limit):
+        """Run a $text search and return (resources, total)"""
+        search_query = dict(filter_query)
+        projection = dict(projection)
+        sort = requested_sort or RESOURCE_LIST_SORT
+        
+        if query:
+            search_query['$text'] = {'$search': query}
+            projection['score'] = {'$meta': 'textScore'}
+            if not requested_sort:
+                sort = [('score', {'$meta': 'textScore'}), ('_id', -1)]
+        
+        # A text match cannot be walked in another index's order, so an explicit
+        # sort reorders only the SEARCH_SORT_CAP most relevant matches
+        if query and requested_sort:
+            resources = list(db[RESOURCES_COLLECTION].aggregate([
+                {'$match': search_query},
+                {'$sort': {'score': {'$meta': 'textScore'}, '_id': -1}},
+                {'$limit': SEARCH_SORT_CAP},
+                {'$sort': dict(sort)},
+                {'$skip': skip},
+                {'$limit': limit},
+                {'$project': projection}
             ]))
+            return resources, min(db[RESOURCES_COLLECTION].count_documents(search_query), SEARCH_SORT_CAP)
+        
+        resources = list(
+            db[RESOURCES_COLLECTION].find(search_query, projection).sort(sort).skip(skip).limit(limit)
+        )
+        return resources, db[RESOURCES_COLLECTION].count_documents(search_query)
+    
+    def lookup_resources(self, fragment, limit=LOOKUP_DEFAULT_LIMIT):
+        """Find resources whose service tag or identification number contains a fragment"""
+        try:
+            if not fragment or not fragment.strip():
+                return format_response(error="Lookup fragment required", status=400)
             
-            # Resources by department
-            department_stats = list(db[RESOURCES_COLLECTION].aggregate([
-                {'$group': {'_id': '$department', 'count': {'$sum': 1}}},
-                {'$sort': {'count': -1}},
-                {'$limit': 10}
-            ]))
+            limit = max(1, min(limit, LOOKUP_MAX_LIMIT))
             
-            # Total cost
-            total_cost = list(db[RESOURCES_COLLECTION].aggregate([
-                {'$group': {'_id': None, 'total': {'$sum': '$cost'}}}
-            ]))
+            resources = list(
+                db[RESOURCES_COLLECTION].find(build_ngram_query(fragment), RESOURCE_PUBLIC_PROJECTION)
+                .sort(RESOURCE_LIST_SORT).limit(limit)
+            )
             
-            total_cost_value = total_cost[0]['total'] if total_cost else 0
+            return format_response(data=resources, status=200)
             
-            # Recent additions (last 7 days)
-            week_ago = datetime.datetime.utcnow() - datetime.timedelta(days=7)
-            recent_additions = db[RESOURCES_COLLECTION].count_documents({
-                'created_at': {'$gte': week_ago}
-            })
+        except Exception as e:
+            return format_response(error=f"Lookup failed: {str(e)}", status=400)
+    
+    def dashboard_stats(self, metrics=None):
+        """Get dashboard statistics from the rollups (one aggregation until they are seeded); ``metrics`` selects a subset"""
+        try:
+            try:
+                metrics = parse_dashboard_metrics(metrics)
+            except ValueError as e:
+                return format_response(error=str(e), status=400)
+            
+            def compute():
+                now = datetime.datetime.utcnow()
+                if rollups_ready():
+                    return read_dashboard_stats_from_rollups(metrics, now)
+                
+                pipeline = build_dashboard_stats_pipeline(metrics, now)
+                result = list(db[RESOURCES_COLLECTION].aggregate(pipeline))[0]
+                return read_dashboard_stats(result, metrics)
             
-            return format_response(
-                data={
-                    'total_resources': total_resources,
-                    'total_cost': total_cost_value,
-                    'recent_additions': recent_additions,
-                    'location_stats': location_stats,
-                    'department_stats': department_stats
-                },
-                status=200
-            )
+            stats = dashboard_cache.get_or_compute('dashboard_stats', tuple(metrics), compute)
+            return format_response(data=stats, status=200)
             
         except Exception as e:
             return format_response(error=f"Failed to fetch dashboard stats: {str(e)}", status=400)
@@ -556,67 +1479,124 @@ class ResourceService:
     def dashboard_charts(self, chart_type):
         """Get chart data for dashboard"""
         try:
-            chart_data = {}
-            
-            if chart_type in ['all', 'cost_trend']:
-                # Cost trend over time
-                cost_trend = list(db[RESOURCES_COLLECTION].aggregate([
-                    {'$group': {
-                        '_id': {
-                            'year': {'$year': '$created_at'},
-                            'month': {'$month': '$created_at'}
-                        },
-                        'total_cost': {'$sum': '$cost'},
-                        'count': {'$sum': 1}
-                    }},
-                    {'$sort': {'_id.year': 1, '_id.month': 1}},
-                    {'$limit': 12}
-                ]))
-                chart_data['cost_trend'] = cost_trend
-            
-            if chart_type in ['all', 'location_distribution']:
-                # Location distribution
-                location_dist = list(db[RESOURCES_COLLECTION].aggregate([
-                    {'$group': {'_id': '$location', 'count': {'$sum': 1}}},
-                    {'$sort': {'count': -1}}
-                ]))
-                chart_data['location_distribution'] = location_dist
-            
-            if chart_type in ['all', 'department_distribution']:
-                # Department distribution
-                dept_dist = list(db[RESOURCES_COLLECTION].aggregate([
-                    {'$group': {'_id': '$department', 'count': {'$sum': 1}}},
-                    {'$sort': {'count': -1}}
-                ]))
-                chart_data['department_distribution'] = dept_dist
+            def compute():
+                if rollups_ready():
+                    return self._dashboard_charts_from_rollups(chart_type)
+                return self._dashboard_charts_from_aggregation(chart_type)
             
+            chart_data = dashboard_cache.get_or_compute('dashboard_charts', (chart_type,), compute)
             return format_response(data=chart_data, status=200)
             
         except Exception as e:
             return format_response(error=f"Failed to fetch chart data: {str(e)}", status=400)
     
-    def recent_activity(self, limit=10):
+    def _dashboard_charts_from_aggregation(self, chart_type):
+        """Build the dashboard_charts payload by aggregating over resources"""
+        chart_data = {}
+        
+        if chart_type in ['all', 'cost_trend']:
+            # Cost trend over time
+            cost_trend = list(db[RESOURCES_COLLECTION].aggregate([
+                {'$group': {
+                    '_id': {
+                        'year': {'$year': '$created_at'},
+                        'month': {'$month': '$created_at'}
+                    },
+                    'total_cost': {'$sum': '$cost'},
+                    'count': {'$sum': 1}
+                }},
+                {'$sort': {'_id.year': 1, '_id.month': 1}},
+                {'$limit': 12}
+            ]))
+            chart_data['cost_trend'] = cost_trend
+        
+        if chart_type in ['all', 'procurement_trend']:
+            # Procurement spend by procurement month
+            procurement_trend = list(db[RESOURCES_COLLECTION].aggregate([
+                {'$match': {'procurement_date': {'$type': 'string'}}},
+                {'$group': {
+                    '_id': {'$substrCP': ['$procurement_date', 0, 7]},
+                    'total_cost': {'$sum': '$cost'},
+                    'count': {'$sum': 1}
+                }},
+                {'$project': {'value': '$_id', 'total_cost': 1, 'count': 1}}
+            ]))
+            chart_data['procurement_trend'] = _month_trend(procurement_trend)
+        
+        if chart_type in ['all', 'location_distribution']:
+            # Location distribution
+            location_dist = list(db[RESOURCES_COLLECTION].aggregate([
+                {'$group': {'_id': '$location', 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1}}
+            ]))
+            chart_data['location_distribution'] = location_dist
+        
+        if chart_type in ['all', 'department_distribution']:
+            # Department distribution
+            dept_dist = list(db[RESOURCES_COLLECTION].aggregate([
+                {'$group': {'_id': '$department', 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1}}
+            ]))
+            chart_data['department_distribution'] = dept_dist
+        
+        return chart_data
+    
+    def _dashboard_charts_from_rollups(self, chart_type):
+        """Build the dashboard_charts payload from the rollup collection"""
+        dimensions = {
+            'cost_trend': ROLLUP_CREATED_MONTH,
+            'procurement_trend': ROLLUP_PROCUREMENT_MONTH,
+            'location_distribution': ROLLUP_LOCATION,
+            'department_distribution': ROLLUP_DEPARTMENT
+        }
+        charts = [chart for chart in dimensions if chart_type in ('all', chart)]
+        rollups = read_rollups({dimensions[chart] for chart in charts})
+        
+        chart_data = {}
+        for chart in charts:
+            if chart.endswith('_trend'):
+                chart_data[chart] = _month_trend(rollups[dimensions[chart]])
+            else:
+                chart_data[chart] = [
+                    {'_id': rollup['value'], 'count': rollup['count']}
+                    for rollup in rollups[dimensions[chart]]
+                ]
+        return chart_data
+    
+    def recent_activity(self, limit=10, fields=None, view=None):
         """Get recent activity"""
         try:
-            recent_resources = list(db[RESOURCES_COLLECTION].find().sort('created_at', -1).limit(limit))
+            # Bound the cached result size, not just the number of entries
+            limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+            try:
+                projection, _ = build_projection(fields, view)
+            except ValueError as e:
+                return format_response(error=str(e), status=400)
             
-            for resource in recent_resources:
-                resource['_id'] = str(resource['_id'])
-                if 'created_at' in resource:
-                    resource['created_at'] = resource['created_at'].isoformat()
-                if 'updated_at' in resource:
-                    resource['updated_at'] = resource['updated_at'].isoformat()
+            recent_resources = dashboard_cache.get_or_compute(
+                'recent_activity', (limit, fields, view),
+                lambda: list(db[RESOURCES_COLLECTION].find({}, projection).sort('created_at', -1).limit(limit))
+            )
             
             return format_response(data=recent_resources, status=200)
             
         except Exception as e:
             return format_response(error=f"Failed to fetch recent activity: {str(e)}", status=400)
     
-    def get_unique_values(self, field):
-        """Get unique values for a field"""
+    def get_unique_values(self, field, prefix=None, counts=False):
+        """Get unique values for a field, optionally with asset counts or filtered by prefix"""
         try:
-            values = db[RESOURCES_COLLECTION].distinct(field)
-            return format_response(data=values, status=200)
+            if field not in CATALOG_FIELDS:
+                values = db[RESOURCES_COLLECTION].distinct(field)
+                return format_response(data=values, status=200)
+            
+            entries = resource_catalog.get(field, prefix)
+            if counts:
+                return format_response(
+                    data=[{'value': value, 'count': count} for value, count in entries],
+                    status=200
+                )
+            return format_response(data=[value for value, _ in entries], status=200)
             
         except Exception as e:
             return format_response(error=f"Failed to fetch unique values: {str(e)}", status=400)
@@ -629,11 +1609,10 @@ class AIService:
             "Content-Type": "application/json"
         }
     
-    def natural_crud(self, data, request):
+    def natural_crud(self, data, user_data):
         """Process natural language CRUD instructions"""
         try:
             instruction = data.get('instruction')
-            user_data = get_user_from_token(request)
             
             # Enhanced parsing prompt with more specific JSON format
             parsing_prompt = f"""
@@ -786,6 +1765,9 @@ class AIService:
 
     def _call_groq_api(self, prompt):
         """Call Groq API with better error handling"""
+        # Only AI endpoints need requests; load it on first use
+        import requests
+        
         try:
             payload = {
                 "model": "llama3-8b-8192",
@@ -839,8 +1821,11 @@ class AIService:
                 'created_at': datetime.datetime.utcnow(),
                 'updated_at': datetime.datetime.utcnow()
             }
+            add_search_fields(resource_doc)
             
             result = db[RESOURCES_COLLECTION].insert_one(resource_doc)
+            update_rollups(added=[resource_doc])
+            _resources_changed()
             
             return format_response(
                 data={'resource_id': str(result.inserted_id)},
@@ -854,21 +1839,9 @@ class AIService:
     def _execute_read(self, filters):
         """Execute READ operation"""
         try:
-            query = {}
-            for key, value in filters.items():
-                if key in ['location', 'department', 'description']:
-                    query[key] = {'$regex': value, '$options': 'i'}
-                else:
-                    query[key] = value
+            query = compile_resource_filters(filters)
             
-            resources = list(db[RESOURCES_COLLECTION].find(query).limit(10))
-            
-            for resource in resources:
-                resource['_id'] = str(resource['_id'])
-                if 'created_at' in resource:
-                    resource['created_at'] = resource['created_at'].isoformat()
-                if 'updated_at' in resource:
-                    resource['updated_at'] = resource['updated_at'].isoformat()
+            resources = list(db[RESOURCES_COLLECTION].find(query, RESOURCE_PUBLIC_PROJECTION).limit(10))
             
             return format_response(data=resources, status=200)
             
@@ -887,15 +1860,20 @@ class AIService:
             
             update_data['updated_at'] = datetime.datetime.utcnow()
             update_data['updated_by'] = user_data['email']
+            add_search_fields(update_data)
             
-            result = db[RESOURCES_COLLECTION].update_one(
+            previous = db[RESOURCES_COLLECTION].find_one_and_update(
                 {'_id': ObjectId(resource_id)},
-                {'$set': update_data}
+                {'$set': update_data},
+                projection=ROLLUP_PROJECTION,
+                return_document=ReturnDocument.BEFORE
             )
             
-            if result.matched_count == 0:
+            if previous is None:
                 return format_response(error="Resource not found", status=404)
             
+            update_rollups(removed=[previous], added=[{**previous, **update_data}])
+            _resources_changed()
             return format_response(message="Resource updated successfully via AI", status=200)
             
         except Exception as e:
@@ -907,21 +1885,24 @@ class AIService:
             if not resource_id or not ObjectId.is_valid(resource_id):
                 return format_response(error="Invalid resource ID", status=400)
             
-            result = db[RESOURCES_COLLECTION].delete_one({'_id': ObjectId(resource_id)})
+            previous = db[RESOURCES_COLLECTION].find_one_and_delete(
+                {'_id': ObjectId(resource_id)}, projection=ROLLUP_PROJECTION
+            )
             
-            if result.deleted_count == 0:
+            if previous is None:
                 return format_response(error="Resource not found", status=404)
             
+            update_rollups(removed=[previous])
+            _resources_changed()
             return format_response(message="Resource deleted successfully via AI", status=200)
             
         except Exception as e:
             return format_response(error=f"Delete operation failed: {str(e)}", status=400)
     
-    def chat(self, data, request):
+    def chat(self, data, user_data):
         """Handle chat queries about resources"""
         try:
             message = data.get('message')
-            user_data = get_user_from_token(request)
             
             # Get context about resources
             context = self._get_resource_context()
@@ -972,8 +1953,8 @@ class AIService:
             sample_resources = list(db[RESOURCES_COLLECTION].find().limit(5))
             
             # Get stats
-            locations = db[RESOURCES_COLLECTION].distinct('location')
-            departments = db[RESOURCES_COLLECTION].distinct('department')
+            locations = [value for value, _ in resource_catalog.get('location')]
+            departments = [value for value, _ in resource_catalog.get('department')]
             
             context = {
                 'total_resources': total_resources,
@@ -994,11 +1975,9 @@ class AIService:
         except Exception as e:
             return "No resource context available"
     
-    def chat_history(self, user_id, page, limit, request):
-        """Get chat history"""
+    def chat_history(self, user_id, page, limit, user_data, cursor=None):
+        """Get chat history, paged by (timestamp, _id) when a cursor is given"""
         try:
-            user_data = get_user_from_token(request)
-            
             # If no user_id provided, use current user
             if not user_id:
                 user_id = user_data['uid']
@@ -1007,15 +1986,30 @@ class AIService:
             if user_data['role'] != ADMIN_ROLE and user_id != user_data['uid']:
                 return format_response(error="Access denied", status=403)
             
-            skip = (page - 1) * limit
+            query = {'user_id': user_id}
             
-            history = list(db[CHAT_HISTORY_COLLECTION].find(
-                {'user_id': user_id}
-            ).sort('timestamp', -1).skip(skip).limit(limit))
+            if cursor is not None:
+                if cursor:
+                    query = build_keyset_query(query, CHAT_HISTORY_SORT, cursor)
+                
+                history = list(db[CHAT_HISTORY_COLLECTION].find(query).sort(CHAT_HISTORY_SORT).limit(limit + 1))
+                next_cursor = None
+                if len(history) > limit:
+                    history = history[:limit]
+                    next_cursor = cursor_for(history[-1], CHAT_HISTORY_SORT)
+            else:
+                skip = (page - 1) * limit
+                
+                history = list(db[CHAT_HISTORY_COLLECTION].find(query).sort(CHAT_HISTORY_SORT).skip(skip).limit(limit))
             
-            for chat in history:
-                chat['_id'] = str(chat['_id'])
-                chat['timestamp'] = chat['timestamp'].isoformat()
+            if cursor is not None:
+                return format_response(
+                    data={
+                        'history': history,
+                        'pagination': calculate_cursor_pagination_info(limit, next_cursor)
+                    },
+                    status=200
+                )
             
             return format_response(data=history, status=200)
             
@@ -1031,12 +2025,7 @@ class AIService:
                 return format_response(error="No fields provided for update", status=400)
             
             # Build query from filters
-            query = {}
-            for key, value in filters.items():
-                if key in ['location', 'department', 'description']:
-                    query[key] = {'$regex': value, '$options': 'i'}
-                else:
-                    query[key] = value
+            query = compile_resource_filters(filters)
             
             # Prepare update data
             update_data = {k: v for k, v in fields.items() if v is not None}
@@ -1045,9 +2034,20 @@ class AIService:
             
             update_data['updated_at'] = datetime.datetime.utcnow()
             update_data['updated_by'] = user_data['email']
-            
-            # Update resources
-            result = db[RESOURCES_COLLECTION].update_many(query, {'$set': update_data})
+            add_search_fields(update_data)
+            
+            # Update resources; when rollup fields change, pin the update to the
+            # documents read so their rollup contributions can be moved
+            if set(update_data) & set(ROLLUP_SOURCE_FIELDS):
+                previous = list(db[RESOURCES_COLLECTION].find(query, ROLLUP_PROJECTION))
+                result = db[RESOURCES_COLLECTION].update_many(
+                    {'_id': {'$in': [doc['_id'] for doc in previous]}},
+                    {'$set': update_data}
+                )
+                update_rollups(removed=previous, added=[{**doc, **update_data} for doc in previous])
+            else:
+                result = db[RESOURCES_COLLECTION].update_many(query, {'$set': update_data})
+            _resources_changed()
             
             return format_response(
                 data={
@@ -1070,21 +2070,18 @@ class AIService:
                 return format_response(error="No filters provided for delete", status=400)
             
             # Build query from filters
-            query = {}
-            for key, value in filters.items():
-                if key in ['location', 'department', 'description']:
-                    query[key] = {'$regex': value, '$options': 'i'}
-                else:
-                    query[key] = value
+            query = compile_resource_filters(filters)
             
-            # Count resources to be deleted
-            count = db[RESOURCES_COLLECTION].count_documents(query)
+            # Read the resources to be deleted for the dashboard rollups
+            previous = list(db[RESOURCES_COLLECTION].find(query, ROLLUP_PROJECTION))
             
-            if count == 0:
+            if not previous:
                 return format_response(error="No resources found matching the criteria", status=404)
             
             # Delete resources
-            result = db[RESOURCES_COLLECTION].delete_many(query)
+            result = db[RESOURCES_COLLECTION].delete_many({'_id': {'$in': [doc['_id'] for doc in previous]}})
+            update_rollups(removed=previous)
+            _resources_changed()
             
             return format_response(
                 data={
@@ -1098,18 +2095,23 @@ class AIService:
         except Exception as e:
             return format_response(error=f"Bulk delete operation failed: {str(e)}", status=400)
 
+def _load_pandas():
+    """Import pandas on first use; only upload/export endpoints need it"""
+    import pandas as pd
+    return pd
+
 class FileService:
-    def upload_csv(self, file, request):
+    def upload_csv(self, file, user_data):
         """Upload and process CSV file"""
         try:
+            pd = _load_pandas()
+            
             if not file or not file.filename:
                 return format_response(error="No file provided", status=400)
             
             if not file.filename.endswith('.csv'):
                 return format_response(error="File must be CSV format", status=400)
             
-            user_data = get_user_from_token(request)
-            
             # Read CSV
             df = pd.read_csv(file)
             
@@ -1127,6 +2129,7 @@ class FileService:
             success_count = 0
             error_count = 0
             errors = []
+            imported = []
             
             for index, row in df.iterrows():
                 try:
@@ -1142,15 +2145,21 @@ class FileService:
                     resource_doc['created_by'] = user_data['email']
                     resource_doc['created_at'] = datetime.datetime.utcnow()
                     resource_doc['updated_at'] = datetime.datetime.utcnow()
+                    add_search_fields(resource_doc)
                     
                     # Insert resource
                     db[RESOURCES_COLLECTION].insert_one(resource_doc)
+                    imported.append(resource_doc)
                     success_count += 1
                     
                 except Exception as e:
                     error_count += 1
                     errors.append(f"Row {index + 1}: {str(e)}")
             
+            if success_count:
+                update_rollups(added=imported)
+                _resources_changed()
+            
             return format_response(
                 data={
                     'success_count': success_count,
@@ -1164,17 +2173,17 @@ class FileService:
         except Exception as e:
             return format_response(error=f"CSV upload failed: {str(e)}", status=500)
     
-    def upload_excel(self, file, request):
+    def upload_excel(self, file, user_data):
         """Upload and process Excel file"""
         try:
+            pd = _load_pandas()
+            
             if not file or not file.filename:
                 return format_response(error="No file provided", status=400)
             
             if not file.filename.endswith(('.xlsx', '.xls')):
                 return format_response(error="File must be Excel format", status=400)
             
-            user_data = get_user_from_token(request)
-            
             # Read Excel
             df = pd.read_excel(file)
             
@@ -1192,6 +2201,7 @@ class FileService:
             success_count = 0
             error_count = 0
             errors = []
+            imported = []
             
             for index, row in df.iterrows():
                 try:
@@ -1203,14 +2213,20 @@ class FileService:
                     resource_doc['created_by'] = user_data['email']
                     resource_doc['created_at'] = datetime.datetime.utcnow()
                     resource_doc['updated_at'] = datetime.datetime.utcnow()
+                    add_search_fields(resource_doc)
                     
                     db[RESOURCES_COLLECTION].insert_one(resource_doc)
+                    imported.append(resource_doc)
                     success_count += 1
                     
                 except Exception as e:
                     error_count += 1
                     errors.append(f"Row {index + 1}: {str(e)}")
             
+            if success_count:
+                update_rollups(added=imported)
+                _resources_changed()
+            
             return format_response(
                 data={
                     'success_count': success_count,
@@ -1227,6 +2243,8 @@ class FileService:
     def export_csv(self, filters):
         """Export resources to CSV"""
         try:
+            pd = _load_pandas()
+            
             # Build query from filters
             query = {}
             if 'location' in filters and filters['location']:
@@ -1235,7 +2253,7 @@ class FileService:
                 query['department'] = filters['department']
             
             # Get resources
-            resources = list(db[RESOURCES_COLLECTION].find(query))
+            resources = list(db[RESOURCES_COLLECTION].find(query, RESOURCE_PUBLIC_PROJECTION))
             
             if not resources:
                 return format_response(error="No data found", status=404)
@@ -1271,6 +2289,8 @@ class FileService:
     def export_excel(self, filters):
         """Export resources to Excel"""
         try:
+            pd = _load_pandas()
+            
             # Build query from filters
             query = {}
             if 'location' in filters and filters['location']:
@@ -1279,7 +2299,7 @@ class FileService:
                 query['department'] = filters['department']
             
             # Get resources
-            resources = list(db[RESOURCES_COLLECTION].find(query))
+            resources = list(db[RESOURCES_COLLECTION].find(query, RESOURCE_PUBLIC_PROJECTION))
             
             if not resources:
                 return format_response(error="No data found", status=404)
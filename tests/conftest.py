@@ -0,0 +1,89 @@
+import datetime
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config only builds the lazy database proxy when a URI is set; the client
+# behind it is replaced with mongomock by the `mongo` fixture
+os.environ.setdefault('MONGODB_URI', 'mongodb://localhost:27017')
+os.environ.setdefault('DATABASE_NAME', 'campus_assets_test')
+os.environ.setdefault('MONGO_WARM_UP', 'false')
+
+import config
+import services
+import utils
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """An empty mongomock database behind config.db, with process caches cleared"""
+    mongomock = pytest.importorskip('mongomock')
+    
+    monkeypatch.setattr(config.connection_manager, '_client', mongomock.MongoClient())
+    monkeypatch.setattr(config.connection_manager, '_pid', os.getpid())
+    
+    utils.session_cache.clear()
+    utils.resource_count_cache.invalidate()
+    utils.dashboard_cache.invalidate()
+    utils.data_versions._versions.clear()
+    services.resource_catalog.invalidate()
+    
+    yield config.db
+
+@pytest.fixture
+def admin_user():
+    return {'uid': 'admin-1', 'email': 'admin@example.com', 'role': 'admin'}
+
+def body(response):
+    """Decode the JSON body of a format_response tuple"""
+    resp, status = response
+    return json.loads(resp.get_data()), status
+
+@pytest.fixture
+def seed_state(monkeypatch):
+    """A fresh rollup seed state that rechecks the meta document on every ready()"""
+    state = utils.RollupSeed(enabled=True, check_interval=0)
+    monkeypatch.setattr(utils, 'rollup_seed', state)
+    return state
+
+@pytest.fixture
+def unseeded(monkeypatch):
+    """Rollups disabled, so the dashboard aggregates over resources"""
+    monkeypatch.setattr(utils, 'rollup_seed', utils.RollupSeed(enabled=False))
+
+def make_resource(i=0, **fields):
+    """A valid resource payload; location, department and cost vary with i"""
+    doc = {
+        'sl_no': str(i),
+        'description': 'Dell Monitor',
+        'service_tag': f'TAG{i:04d}',
+        'identification_number': f'ID-{i:05d}',
+        'procurement_date': f'2025-0{1 + i % 3}-15',
+        'cost': float(100 * (i + 1)),
+        'location': ['Lab 1', 'Library', 'Admin Block'][i % 3],
+        'department': ['CSE', 'ECE'][i % 2]
+    }
+    doc.update(fields)
+    return doc
+
+def seed_resources(mongo, count):
+    """Insert count resources with search fields; pairs share created_at so _id breaks ties"""
+    now = datetime.datetime(2026, 1, 1)
+    docs = [
+        utils.add_search_fields(make_resource(
+            i,
+            description=f'Monitor {i}',
+            procurement_date='2025-01-01',
+            cost=float(i * 100),
+            location='Lab 1' if i % 2 else 'Library',
+            department='CSE' if i % 3 else 'ECE',
+            created_at=now - datetime.timedelta(minutes=i // 2),
+            updated_at=now
+        ))
+        for i in range(count)
+    ]
+    mongo[utils.RESOURCES_COLLECTION].insert_many(docs)
+    return docs
@@ -0,0 +1,115 @@
+import datetime
+import uuid
+
+import flask
+import jwt
+import pytest
+
+import config
+import services
+import utils
+
+class FakeRequest:
+    def __init__(self, token):
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+def issue_token(mongo, session=True):
+    expires_at = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    payload = {'uid': 'u1', 'email': 'u1@example.com', 'role': 'viewer', 'jti': uuid.uuid4().hex, 'exp': expires_at}
+    token = jwt.encode(payload, utils.JWT_SECRET, algorithm='HS256')
+    if session:
+        mongo[utils.SESSIONS_COLLECTION].insert_one(
+            {'session_token': token, 'jti': payload['jti'], 'expires_at': expires_at}
+        )
+    return token, payload
+
+@pytest.fixture
+def revocations(monkeypatch):
+    revocation_list = utils.RevocationList()
+    monkeypatch.setattr(utils, 'revocation_list', revocation_list)
+    return revocation_list
+
+def test_stateless_mode_rejects_revoked_tokens(mongo, monkeypatch, revocations):
+    monkeypatch.setattr(utils, 'AUTH_MODE', utils.AUTH_MODE_STATELESS)
+    token, payload = issue_token(mongo, session=False)
+    
+    assert utils.get_user_from_token(FakeRequest(token))['jti'] == payload['jti']
+    
+    revocations.revoke(payload['jti'], payload['exp'])
+    assert utils.get_user_from_token(FakeRequest(token)) is None
+
+def test_session_mode_never_starts_revocation_sync(mongo, monkeypatch, revocations):
+    monkeypatch.setattr(utils, 'AUTH_MODE', config.AUTH_MODE_SESSION)
+    token, payload = issue_token(mongo)
+    
+    assert utils.get_user_from_token(FakeRequest(token))['jti'] == payload['jti']
+    # Second call is served from the session cache
+    assert utils.get_user_from_token(FakeRequest(token))['jti'] == payload['jti']
+    assert revocations._threads == []
+
+def test_session_mode_rejects_deleted_sessions(mongo, monkeypatch, revocations):
+    monkeypatch.setattr(utils, 'AUTH_MODE', config.AUTH_MODE_SESSION)
+    token, _ = issue_token(mongo)
+    
+    mongo[utils.SESSIONS_COLLECTION].delete_one({'session_token': token})
+    assert utils.get_user_from_token(FakeRequest(token)) is None
+
+def test_session_cache_caps_entries_at_session_expiry():
+    cache = utils.SessionCache(max_size=2, ttl=300)
+    cache.set('expired', {'uid': 'a'}, datetime.datetime.utcnow() - datetime.timedelta(seconds=1))
+    assert cache.get('expired') is None
+    
+    for token in ('t1', 't2', 't3'):
+        cache.set(token, {'uid': token}, datetime.datetime.utcnow() + datetime.timedelta(hours=1))
+    assert cache.get('t1') is None
+    assert cache.get('t3') == {'uid': 't3'}
+    assert cache.stats()['evictions'] == 1
+
+def test_validated_sessions_are_served_from_cache_until_logout(mongo, monkeypatch, revocations):
+    monkeypatch.setattr(utils, 'AUTH_MODE', config.AUTH_MODE_SESSION)
+    token, payload = issue_token(mongo)
+    
+    assert utils.get_user_from_token(FakeRequest(token))['uid'] == payload['uid']
+    hits = utils.session_cache.hits
+    assert utils.get_user_from_token(FakeRequest(token))['uid'] == payload['uid']
+    assert utils.session_cache.hits == hits + 1
+    
+    services.AuthService().logout_user(token)
+    assert utils.get_user_from_token(FakeRequest(token)) is None
+
+def test_request_identity_is_resolved_once(monkeypatch):
+    calls = []
+    
+    def resolve(request):
+        calls.append(request)
+        return {'uid': 'u1', 'role': utils.ADMIN_ROLE}
+    
+    monkeypatch.setattr(utils, 'get_user_from_token', resolve)
+    
+    @utils.login_required
+    @utils.admin_required
+    def view():
+        return utils.get_current_user()
+    
+    app = flask.Flask(__name__)
+    with app.test_request_context(headers={'Authorization': 'Bearer token'}):
+        assert view() == {'uid': 'u1', 'role': utils.ADMIN_ROLE}
+        assert utils.get_current_token() == 'token'
+    assert len(calls) == 1
+    
+    with app.test_request_context():
+        assert view()[1] == 401
+    assert len(calls) == 1
+
+def test_revocations_fail_closed_until_the_first_sync(mongo, monkeypatch, revocations):
+    class Unreachable:
+        def __getitem__(self, name):
+            raise RuntimeError('mongo unreachable')
+    
+    monkeypatch.setattr(revocations, '_start_threads', lambda *args, **kwargs: None)
+    monkeypatch.setattr(utils, 'db', Unreachable())
+    assert revocations.is_revoked('jti-1')
+    
+    monkeypatch.setattr(utils, 'db', mongo)
+    assert not revocations.is_revoked('jti-1')
+    assert revocations.last_sync is not None
@@ -0,0 +1,42 @@
+import pytest
+
+import services
+import utils
+
+from conftest import body, seed_resources
+
+def test_results_follow_request_order(mongo):
+    docs = seed_resources(mongo, 3)
+    missing = str(utils.ObjectId())
+    ids = [str(docs[2]['_id']), 'not-an-id', missing, str(docs[0]['_id']).upper(), 42]
+    
+    data, status = body(services.ResourceService().get_resources_by_ids(ids, fields='service_tag'))
+    
+    assert status == 200
+    results = data['data']['results']
+    assert [result['id'] for result in results] == ids
+    assert [result['found'] for result in results] == [True, False, False, True, False]
+    assert results[0]['resource'] == {'_id': str(docs[2]['_id']), 'service_tag': 'TAG0002'}
+    assert results[3]['resource']['service_tag'] == 'TAG0000'
+    assert [results[i]['error'] for i in (1, 2, 4)] == ['Invalid resource ID', 'Resource not found', 'Invalid resource ID']
+    assert data['data']['found'] == 2
+    assert data['data']['requested'] == 5
+
+def test_repeated_ids_are_answered_each_time(mongo):
+    docs = seed_resources(mongo, 1)
+    resource_id = str(docs[0]['_id'])
+    
+    data, _ = body(services.ResourceService().get_resources_by_ids([resource_id, resource_id]))
+    assert [result['found'] for result in data['data']['results']] == [True, True]
+
+@pytest.mark.parametrize('ids', [[], None, 'abc'])
+def test_ids_must_be_a_non_empty_list(mongo, ids):
+    data, status = body(services.ResourceService().get_resources_by_ids(ids))
+    assert status == 400
+    assert data['error'] == 'ids must be a non-empty list'
+
+def test_id_count_is_capped(mongo):
+    ids = [str(utils.ObjectId()) for _ in range(services.RESOURCE_BATCH_MAX_IDS + 1)]
+    data, status = body(services.ResourceService().get_resources_by_ids(ids))
+    assert status == 400
+    assert data['error'].startswith('Too many IDs')
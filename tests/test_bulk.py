@@ -0,0 +1,70 @@
+import pytest
+
+import services
+import utils
+
+from conftest import body, make_resource
+
+def rollup_count(mongo, dimension, value):
+    doc = mongo[utils.RESOURCE_ROLLUPS_COLLECTION].find_one({'_id': utils._rollup_id(dimension, value)})
+    return doc['count'] if doc else 0
+
+@pytest.fixture
+def existing_ids(mongo, admin_user):
+    data, _ = body(services.ResourceService().bulk_resources(
+        [{'op': 'create', 'data': make_resource(sl_no=str(i))} for i in range(3)], admin_user
+    ))
+    return [result['id'] for result in data['data']['results']]
+
+def test_partial_failure_reports_each_item(mongo, admin_user, existing_ids):
+    data, status = body(services.ResourceService().bulk_resources([
+        {'op': 'update', 'id': existing_ids[0], 'data': {'location': 'Library'}},
+        {'op': 'delete', 'id': existing_ids[1]},
+        {'op': 'delete', 'id': str(utils.ObjectId())},
+        {'op': 'create', 'data': {'description': 'missing fields'}},
+        {'op': 'archive', 'id': existing_ids[2]},
+    ], admin_user))
+    
+    assert status == 200
+    assert [result['status'] for result in data['data']['results']] == ['updated', 'deleted', 'error', 'error', 'error']
+    assert data['data']['results'][2]['error'] == 'Resource not found'
+    assert rollup_count(mongo, utils.ROLLUP_ALL, None) == 2
+    assert rollup_count(mongo, utils.ROLLUP_LOCATION, 'Library') == 1
+    assert rollup_count(mongo, utils.ROLLUP_LOCATION, 'Lab 1') == 1
+
+def test_duplicate_targets_are_rejected(mongo, admin_user, existing_ids):
+    data, _ = body(services.ResourceService().bulk_resources([
+        {'op': 'update', 'id': existing_ids[0], 'data': {'location': 'Library'}},
+        {'op': 'delete', 'id': existing_ids[0].upper()},
+    ], admin_user))
+    
+    results = data['data']['results']
+    assert results[0]['status'] == 'updated'
+    assert results[1] == dict(results[1], status='error', error='Duplicate resource ID in request')
+    assert mongo[utils.RESOURCES_COLLECTION].count_documents({}) == 3
+    assert rollup_count(mongo, utils.ROLLUP_ALL, None) == 3
+
+def test_applied_batches_are_accounted_when_a_later_batch_fails(mongo, admin_user, monkeypatch):
+    monkeypatch.setattr(services, 'RESOURCE_BULK_BATCH_SIZE', 2)
+    collection = type(mongo[utils.RESOURCES_COLLECTION])
+    bulk_write = collection.bulk_write
+    calls = []
+    
+    def failing_bulk_write(self, requests, *args, **kwargs):
+        if self.name == utils.RESOURCES_COLLECTION:
+            calls.append(len(requests))
+        if len(calls) > 1 and self.name == utils.RESOURCES_COLLECTION:
+            raise ConnectionError('primary stepped down')
+        return bulk_write(self, requests, *args, **kwargs)
+    
+    monkeypatch.setattr(collection, 'bulk_write', failing_bulk_write)
+    version = utils.data_versions.get(utils.RESOURCES_COLLECTION)
+    
+    data, status = body(services.ResourceService().bulk_resources(
+        [{'op': 'create', 'data': make_resource(sl_no=str(i))} for i in range(4)], admin_user
+    ))
+    
+    assert status == 400
+    assert mongo[utils.RESOURCES_COLLECTION].count_documents({}) == 2
+    assert rollup_count(mongo, utils.ROLLUP_ALL, None) == 2
+    assert utils.data_versions.get(utils.RESOURCES_COLLECTION) != version
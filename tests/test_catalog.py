@@ -0,0 +1,56 @@
+import datetime
+
+import pytest
+
+import services
+import utils
+
+from conftest import body
+
+LOCATIONS = ['Lab 1', 'Lab 2', 'Lab 2', 'Library', 'Admin Block', 'lab 10']
+
+@pytest.fixture
+def existing_resources(mongo):
+    # Written before the rollups existed
+    mongo[utils.RESOURCES_COLLECTION].insert_many([
+        {'location': location, 'department': 'CSE', 'cost': 10.0, 'created_at': datetime.datetime.utcnow()}
+        for location in LOCATIONS
+    ])
+
+def test_catalog_reads_resources_until_rollups_are_seeded(existing_resources, seed_state):
+    catalog = services.ResourceCatalog()
+    
+    assert not utils.rollups_ready()
+    assert catalog.get('location') == [
+        ('Admin Block', 1), ('Lab 1', 1), ('lab 10', 1), ('Lab 2', 2), ('Library', 1)
+    ]
+    assert catalog.get('department') == [('CSE', 6)]
+
+def test_catalog_matches_after_seeding(existing_resources, seed_state):
+    before = services.ResourceCatalog().get('location')
+    seed_state.seed()
+    
+    assert utils.rollups_ready()
+    assert services.ResourceCatalog().get('location') == before
+
+def test_prefix_lookup_is_case_insensitive(existing_resources, seed_state):
+    catalog = services.ResourceCatalog()
+    
+    assert catalog.get('location', 'LAB') == [('Lab 1', 1), ('lab 10', 1), ('Lab 2', 2)]
+    assert catalog.get('location', 'lab 1') == [('Lab 1', 1), ('lab 10', 1)]
+    assert catalog.get('location', 'zz') == []
+
+def test_unique_values_endpoint_reflects_writes(existing_resources, seed_state, admin_user):
+    service = services.ResourceService()
+    seed_state.seed()
+    
+    data, _ = body(service.get_unique_values('location', prefix='lib', counts=True))
+    assert data['data'] == [{'value': 'Library', 'count': 1}]
+    
+    body(service.create_resource({
+        'sl_no': '7', 'description': 'UPS', 'service_tag': 'T7', 'identification_number': 'I7',
+        'procurement_date': '2025-01-01', 'cost': 5, 'location': 'Library', 'department': 'ECE'
+    }, admin_user))
+    
+    data, _ = body(service.get_unique_values('location', prefix='lib', counts=True))
+    assert data['data'] == [{'value': 'Library', 'count': 2}]
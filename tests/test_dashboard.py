@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+import services
+import utils
+
+from conftest import body
+
+@pytest.fixture
+def resources(mongo):
+    now = datetime.datetime.utcnow()
+    docs = [
+        {'cost': 100.0, 'location': 'Lab 1', 'department': 'CSE', 'created_at': now - datetime.timedelta(days=1)},
+        {'cost': 250.0, 'location': 'Lab 1', 'department': 'ECE', 'created_at': now - datetime.timedelta(days=3)},
+        {'cost': 50.0, 'location': 'Library', 'department': 'CSE', 'created_at': now - datetime.timedelta(days=30)},
+    ]
+    mongo[utils.RESOURCES_COLLECTION].insert_many(docs)
+    return docs
+
+def test_metrics_default_to_all():
+    assert services.parse_dashboard_metrics(None) == services.DASHBOARD_METRICS
+    assert services.parse_dashboard_metrics('total_cost, location_stats') == ['total_cost', 'location_stats']
+
+@pytest.mark.parametrize('metrics', ['bogus', 'total_cost,bogus', ' , '])
+def test_unknown_metrics_are_rejected(metrics):
+    with pytest.raises(ValueError):
+        services.parse_dashboard_metrics(metrics)
+
+def test_pipeline_only_builds_requested_facets():
+    now = datetime.datetime.utcnow()
+    facets = services.build_dashboard_stats_pipeline(['department_stats'], now)[-1]['$facet']
+    assert list(facets) == ['department_stats']
+    
+    facets = services.build_dashboard_stats_pipeline(['total_cost', 'location_stats'], now)[-1]['$facet']
+    assert set(facets) == {'totals', 'location_stats'}
+
+def test_stats_come_from_one_aggregation(mongo, unseeded, resources):
+    data, status = body(services.ResourceService().dashboard_stats())
+    
+    assert status == 200
+    stats = data['data']
+    assert stats['total_resources'] == 3
+    assert stats['total_cost'] == 400.0
+    assert stats['recent_additions'] == 2
+    assert stats['location_stats'][0] == {'_id': 'Lab 1', 'count': 2}
+    assert {group['_id']: group['count'] for group in stats['department_stats']} == {'CSE': 2, 'ECE': 1}
+
+def test_subset_returns_only_requested_metrics(mongo, unseeded, resources):
+    data, _ = body(services.ResourceService().dashboard_stats('total_cost,recent_additions'))
+    assert data['data'] == {'total_cost': 400.0, 'recent_additions': 2}
+
+def test_empty_collection_reports_zeroes(mongo, unseeded):
+    data, _ = body(services.ResourceService().dashboard_stats('total_resources,total_cost,location_stats'))
+    assert data['data'] == {'total_resources': 0, 'total_cost': 0, 'location_stats': []}
+
+def test_invalid_metrics_are_a_bad_request(mongo):
+    data, status = body(services.ResourceService().dashboard_stats('bogus'))
+    assert status == 400
+    assert data['error'].startswith('Invalid metrics')
@@ -0,0 +1,93 @@
+import smtplib
+
+import pytest
+
+import services
+
+class FakeSMTP:
+    def __init__(self, noop_error=None):
+        self.noop_error = noop_error
+        self.noops = 0
+        self.sent = []
+        self.closed = False
+
+    def noop(self):
+        self.noops += 1
+        if self.noop_error is not None:
+            raise self.noop_error
+        return (250, b'OK')
+
+    def sendmail(self, sender, recipients, message):
+        self.sent.append((recipients, message))
+
+    def quit(self):
+        self.closed = True
+
+@pytest.fixture
+def outbox(mongo):
+    return services.EmailOutbox()
+
+def test_busy_connection_is_not_probed(outbox):
+    connections = []
+    def factory():
+        connections.append(FakeSMTP())
+        return connections[-1]
+    pool = services.EmailSenderPool(outbox, smtp_factory=factory, idle_probe_interval=30)
+    
+    for i in range(3):
+        outbox.enqueue(f'user{i}@example.com', 'Hello', '<p>Hi</p>')
+    server, processed = pool.send_batch()
+    
+    assert processed == 3
+    assert len(connections) == 1
+    assert len(server.sent) == 3
+    assert server.noops == 0
+
+def test_idle_connection_is_probed_and_replaced_on_socket_error(outbox):
+    stale = FakeSMTP(noop_error=ConnectionResetError('reset by peer'))
+    fresh = FakeSMTP()
+    pool = services.EmailSenderPool(outbox, smtp_factory=lambda: fresh, idle_probe_interval=30)
+    
+    outbox.enqueue('user@example.com', 'Hello', '<p>Hi</p>')
+    server, processed = pool.send_batch(stale)
+    
+    assert processed == 1
+    assert stale.noops == 1 and stale.closed
+    assert server is fresh and len(fresh.sent) == 1
+
+def test_idle_probe_catches_smtp_errors(outbox):
+    stale = FakeSMTP(noop_error=smtplib.SMTPServerDisconnected('gone'))
+    fresh = FakeSMTP()
+    pool = services.EmailSenderPool(outbox, smtp_factory=lambda: fresh, idle_probe_interval=0)
+    
+    assert pool._ensure_connection(stale) is fresh
+
+def test_approval_notification_escapes_name(mongo, monkeypatch):
+    monkeypatch.setattr(services, 'SMTP_EMAIL', 'noreply@example.com')
+    services.AuthService().send_approval_notification('user@example.com', '<script>x</script>')
+    
+    email = mongo[services.EMAIL_OUTBOX_COLLECTION].find_one({'to': 'user@example.com'})
+    assert '<script>' not in email['html_body']
+    assert '&lt;script&gt;x&lt;/script&gt;' in email['html_body']
+
+class FailingSMTP(FakeSMTP):
+    def sendmail(self, sender, recipients, message):
+        raise smtplib.SMTPRecipientsRefused({recipients[0]: (550, b'No such user')})
+
+def test_failed_sends_back_off_then_give_up(mongo, outbox, monkeypatch):
+    monkeypatch.setattr(services, 'EMAIL_MAX_ATTEMPTS', 2)
+    pool = services.EmailSenderPool(outbox, smtp_factory=FailingSMTP)
+    email_id = outbox.enqueue('user@example.com', 'Hello', '<p>Hi</p>')
+    
+    pool.send_batch()
+    email = mongo[services.EMAIL_OUTBOX_COLLECTION].find_one({'_id': email_id})
+    assert email['status'] == services.EMAIL_STATUS_PENDING
+    assert email['attempts'] == 1
+    assert email['next_attempt_at'] > email['created_at']
+    # Not due yet
+    assert outbox.claim() is None
+    
+    pool.outbox.mark_failed(email, 'still failing')
+    email = mongo[services.EMAIL_OUTBOX_COLLECTION].find_one({'_id': email_id})
+    assert email['status'] == services.EMAIL_STATUS_FAILED
+    assert pool.failed == 1
@@ -0,0 +1,87 @@
+import datetime
+
+import pytest
+
+import services
+import utils
+
+from conftest import body, make_resource
+
+def legacy_resource(**fields):
+    """A resource written before the shadow fields and trigram arrays existed"""
+    return make_resource(**dict({
+        'sl_no': '1',
+        'service_tag': '7HX2K91',
+        'identification_number': 'CA-100234',
+        'location': '  Lab   1 ',
+        'created_at': datetime.datetime(2024, 1, 1),
+        'updated_at': datetime.datetime(2024, 1, 1)
+    }, **fields))
+
+@pytest.fixture
+def resources(mongo):
+    collection = mongo[utils.RESOURCES_COLLECTION]
+    legacy_id = collection.insert_one(legacy_resource()).inserted_id
+    current_id = collection.insert_one(utils.add_search_fields(legacy_resource(
+        sl_no='2', service_tag='9QZ7HX2', identification_number='CA-200999', location='Lab 1', department='ECE'
+    ))).inserted_id
+    return {'legacy': str(legacy_id), 'current': str(current_id)}
+
+def listed_ids(filters):
+    data, status = body(services.ResourceService().get_resources(filters, limit=50))
+    assert status == 200
+    return {resource['_id'] for resource in data['data']['resources']}
+
+@pytest.mark.parametrize('mode, value', [
+    ('exact', 'lab 1'),
+    ('prefix', 'LAB'),
+    ('contains', 'b 1'),
+])
+def test_filters_match_documents_without_shadow_fields(resources, mode, value):
+    ids = listed_ids({'location': value, 'location_match': mode})
+    assert ids == {resources['legacy'], resources['current']}
+
+def test_location_and_department_filters_combine(resources):
+    assert listed_ids({'location': 'lab', 'department': 'cse'}) == {resources['legacy']}
+    assert listed_ids({'location': 'lab', 'department': 'ece', 'search': 'monitor'}) == {resources['current']}
+
+def test_exact_filter_does_not_match_longer_raw_values(resources, mongo):
+    mongo[utils.RESOURCES_COLLECTION].insert_one(legacy_resource(location='Lab 10'))
+    assert listed_ids({'location': 'lab 1', 'location_match': 'exact'}) == {resources['legacy'], resources['current']}
+
+def test_ai_read_matches_documents_without_shadow_fields(resources):
+    data, status = body(services.AIService()._execute_read({'location': 'lab 1', 'department': 'cse'}))
+    assert status == 200
+    assert [resource['_id'] for resource in data['data']] == [resources['legacy']]
+
+def test_filter_input_is_escaped(resources):
+    assert listed_ids({'location': '.*', 'location_match': 'contains'}) == set()
+
+def lookup_ids(fragment):
+    data, status = body(services.ResourceService().lookup_resources(fragment))
+    assert status == 200
+    return {resource['_id'] for resource in data['data']}
+
+def test_lookup_matches_documents_without_trigram_arrays(resources):
+    assert lookup_ids('7hx2') == {resources['legacy'], resources['current']}
+    assert lookup_ids('100234') == {resources['legacy']}
+    assert lookup_ids('hx') == {resources['legacy'], resources['current']}
+
+def test_lookup_requires_the_whole_fragment(resources, mongo):
+    # Has every trigram of "abcabd" but not the fragment itself
+    mongo[utils.RESOURCES_COLLECTION].insert_one(utils.add_search_fields(legacy_resource(service_tag='ABDABCAB')))
+    mongo[utils.RESOURCES_COLLECTION].insert_one(legacy_resource(service_tag='ABDABCAB'))
+    assert lookup_ids('abcabd') == set()
+
+def test_backfill_adds_search_fields(resources, mongo):
+    assert utils.backfill_search_fields() == 1
+    
+    legacy = mongo[utils.RESOURCES_COLLECTION].find_one({'sl_no': '1'})
+    assert legacy['location_norm'] == 'lab 1'
+    assert legacy['service_tag_grams'] == utils.ngrams('7HX2K91')
+    assert lookup_ids('7hx2') == {resources['legacy'], resources['current']}
+    assert listed_ids({'location': 'lab 1', 'location_match': 'exact'}) == {resources['legacy'], resources['current']}
+
+def test_ngrams_are_normalized_and_distinct():
+    assert utils.ngrams(' AAaa ') == ['aaa']
+    assert utils.ngrams('ab') == []
@@ -0,0 +1,144 @@
+import datetime
+import threading
+import time
+
+import jwt
+import pytest
+
+import services
+
+pytest.importorskip('cryptography')
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+def make_certificate(key=None):
+    key = key or rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'test')])
+    now = datetime.datetime.utcnow()
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return certificate.public_bytes(serialization.Encoding.PEM).decode('utf-8')
+
+class CountingSource:
+    def __init__(self, certificates, release=None):
+        self.certificates = certificates
+        self.release = release
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return dict(self.certificates), 3600
+
+@pytest.fixture(scope='module')
+def certificates():
+    return {'k1': make_certificate()}
+
+def make_verifier(source):
+    verifier = services.FirebaseTokenVerifier('project', source, min_refresh_interval=60)
+    verifier._ensure_refresher = lambda: None
+    return verifier
+
+def test_unknown_kids_refetch_at_most_once_per_interval(certificates):
+    source = CountingSource(certificates)
+    verifier = make_verifier(source)
+    
+    assert verifier._get_key('k1') is not None
+    assert source.fetches == 1
+    
+    for _ in range(5):
+        assert verifier._get_key('forged') is None
+    assert source.fetches == 1
+    
+    verifier._last_fetch -= 120
+    for _ in range(5):
+        assert verifier._get_key('forged') is None
+    assert source.fetches == 2
+
+def test_stale_keys_are_served_while_a_refresh_runs(certificates):
+    release = threading.Event()
+    source = CountingSource(certificates)
+    verifier = make_verifier(source)
+    verifier._get_key('k1')
+    
+    source.release = release
+    verifier._expires_at = 0
+    verifier._last_fetch -= 120
+    refresher = threading.Thread(target=verifier._get_key, args=('k1',))
+    refresher.start()
+    deadline = time.time() + 5
+    while source.fetches < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert source.fetches == 2
+    
+    # The refresh is blocked; other callers get the stale key without waiting
+    started = time.time()
+    assert verifier._get_key('k1') is not None
+    assert time.time() - started < 1
+    assert source.fetches == 2
+    
+    release.set()
+    refresher.join(5)
+    assert verifier._expires_at > time.time()
+
+def test_expired_keys_bypass_the_refresh_throttle(certificates):
+    source = CountingSource(certificates)
+    verifier = make_verifier(source)
+    verifier._get_key('k1')
+    
+    verifier._expires_at = 0
+    assert verifier._get_key('k1') is not None
+    assert source.fetches == 2
+    assert verifier._expires_at > time.time()
+
+def test_failed_refresh_serves_stale_keys(certificates):
+    source = CountingSource(certificates)
+    verifier = make_verifier(source)
+    verifier._get_key('k1')
+    
+    def unreachable():
+        raise OSError('certificate endpoint unreachable')
+    
+    source.fetch = unreachable
+    verifier._expires_at = 0
+    assert verifier._get_key('k1') is not None
+
+def test_failed_first_fetch_is_raised(certificates):
+    source = CountingSource(certificates)
+    verifier = make_verifier(source)
+    
+    def unreachable():
+        raise OSError('certificate endpoint unreachable')
+    
+    source.fetch = unreachable
+    with pytest.raises(OSError):
+        verifier._get_key('k1')
+
+def test_verify_checks_signature_audience_and_issuer():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    verifier = make_verifier(CountingSource({'k1': make_certificate(key)}))
+    now = int(time.time())
+    claims = {
+        'sub': 'firebase-uid', 'aud': 'project', 'iss': 'https://securetoken.google.com/project',
+        'iat': now, 'exp': now + 600
+    }
+    
+    token = jwt.encode(claims, key, algorithm='RS256', headers={'kid': 'k1'})
+    assert verifier.verify(token)['uid'] == 'firebase-uid'
+    
+    wrong_audience = jwt.encode(dict(claims, aud='other'), key, algorithm='RS256', headers={'kid': 'k1'})
+    with pytest.raises(jwt.InvalidAudienceError):
+        verifier.verify(wrong_audience)
+    
+    unknown_kid = jwt.encode(claims, key, algorithm='RS256', headers={'kid': 'k2'})
+    with pytest.raises(ValueError):
+        verifier.verify(unknown_kid)
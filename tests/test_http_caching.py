@@ -0,0 +1,51 @@
+import gzip
+import json
+
+import flask
+import pytest
+
+import utils
+
+@pytest.fixture
+def client(mongo):
+    app = flask.Flask(__name__)
+    app.after_request(utils.compress_response)
+    app.calls = 0
+    
+    @app.route('/items')
+    @utils.conditional_get(utils.RESOURCES_COLLECTION)
+    def items():
+        app.calls += 1
+        return utils.format_response(data=[{'name': f'item {i}'} for i in range(200)])
+    
+    client = app.test_client()
+    client.app = app
+    return client
+
+def test_matching_etag_returns_304_until_data_changes(client):
+    first = client.get('/items')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    
+    second = client.get('/items', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert client.app.calls == 1
+    
+    utils.data_versions.bump(utils.RESOURCES_COLLECTION)
+    third = client.get('/items', headers={'If-None-Match': etag})
+    assert third.status_code == 200
+    assert third.headers['ETag'] != etag
+
+def test_large_bodies_are_gzipped_with_their_own_tag(client):
+    plain = client.get('/items')
+    compressed = client.get('/items', headers={'Accept-Encoding': 'gzip'})
+    
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert json.loads(gzip.decompress(compressed.get_data()))['data'] == json.loads(plain.get_data())['data']
+    
+    revalidated = client.get('/items', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']
+    })
+    assert revalidated.status_code == 304
@@ -0,0 +1,24 @@
+import utils
+
+def test_index_check_creates_maintenance_indexes(mongo):
+    check = utils.IndexCheck(mode='fail')
+    missing = check.run_once()
+    
+    ttl_indexes = [
+        index for index in mongo[utils.SESSIONS_COLLECTION].index_information().values()
+        if index.get('expireAfterSeconds') == 0
+    ]
+    assert ttl_indexes
+    assert not any(index['collection'] == utils.SESSIONS_COLLECTION for index in missing)
+    assert any(index['collection'] == utils.RESOURCES_COLLECTION for index in missing)
+    assert not check.healthy()
+
+def test_index_check_warn_mode_stays_healthy(mongo):
+    check = utils.IndexCheck(mode='warn')
+    assert check.run_once()
+    assert check.healthy()
+
+def test_index_check_off_never_starts(mongo):
+    check = utils.IndexCheck(mode='off')
+    check.start()
+    assert check._threads == []
@@ -0,0 +1,126 @@
+import base64
+import datetime
+import json
+
+import pytest
+
+import services
+import utils
+
+from conftest import body, seed_resources
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+def test_cursor_paging_visits_every_resource_once(mongo):
+    docs = seed_resources(mongo, 25)
+    service = services.ResourceService()
+    
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        data, status = body(service.get_resources({}, limit=10, cursor=cursor))
+        assert status == 200
+        seen.extend(resource['_id'] for resource in data['data']['resources'])
+        cursor = data['data']['pagination']['next_cursor']
+    
+    assert len(seen) == 25
+    assert set(seen) == {str(doc['_id']) for doc in docs}
+
+@pytest.mark.parametrize('values', [
+    [{'$ne': None}, {'$ne': None}],
+    [{'$gt': ''}, 'x'],
+    [True, 1],
+    [['a'], 1],
+])
+def test_crafted_cursor_values_are_rejected(mongo, values):
+    seed_resources(mongo, 3)
+    
+    with pytest.raises(ValueError):
+        utils.decode_cursor(raw_cursor(values))
+    
+    data, status = body(services.ResourceService().get_resources({}, cursor=raw_cursor(values)))
+    assert status == 400
+    assert data['error'] == 'Invalid cursor'
+
+@pytest.mark.parametrize('sort', ['procurement_date', '-procurement_date'])
+def test_cursor_paging_crosses_null_sort_values(mongo, sort):
+    docs = seed_resources(mongo, 7)
+    collection = mongo[utils.RESOURCES_COLLECTION]
+    for i, doc in enumerate(docs):
+        collection.update_one({'_id': doc['_id']}, {'$set': {'procurement_date': f'2025-01-0{i}' if i > 3 else None}})
+    collection.update_one({'_id': docs[0]['_id']}, {'$unset': {'procurement_date': ''}})
+    
+    dates = []
+    cursor = ''
+    while cursor is not None:
+        data, status = body(services.ResourceService().get_resources({}, limit=2, cursor=cursor, sort=sort))
+        assert status == 200
+        dates.extend(resource.get('procurement_date') for resource in data['data']['resources'])
+        cursor = data['data']['pagination']['next_cursor']
+    
+    dated = ['2025-01-04', '2025-01-05', '2025-01-06']
+    assert dates == ([None] * 4 + dated if sort == 'procurement_date' else dated[::-1] + [None] * 4)
+
+def test_cursor_round_trips_sort_key_types():
+    values = [datetime.datetime(2026, 1, 1), utils.ObjectId(), 'Lab 1', 3, 2.5, None]
+    assert utils.decode_cursor(utils.encode_cursor(values)) == values
+
+def test_page_mode_defaults_to_cached_count(mongo):
+    seed_resources(mongo, 25)
+    service = services.ResourceService()
+    hits = utils.resource_count_cache.hits
+    
+    first, _ = body(service.get_resources({}, page=2, limit=10))
+    second, _ = body(service.get_resources({}, page=3, limit=10))
+    
+    assert first['data']['pagination']['count'] == 'cached'
+    assert first['data']['pagination']['total'] == 25
+    assert len(second['data']['resources']) == 5
+    assert utils.resource_count_cache.hits == hits + 1
+
+def test_facet_count_is_opt_in_and_matches(mongo):
+    seed_resources(mongo, 25)
+    service = services.ResourceService()
+    
+    default, _ = body(service.get_resources({'location': 'lab'}, page=2, limit=5))
+    facet, _ = body(service.get_resources({'location': 'lab'}, page=2, limit=5, count='facet'))
+    
+    assert facet['data']['pagination']['count'] == 'facet'
+    assert facet['data']['pagination']['total'] == default['data']['pagination']['total'] == 12
+    assert [r['_id'] for r in facet['data']['resources']] == [r['_id'] for r in default['data']['resources']]
+
+def test_chat_history_cursor_paging(mongo, admin_user):
+    timestamp = datetime.datetime(2026, 1, 1)
+    mongo[services.CHAT_HISTORY_COLLECTION].insert_many([
+        {'user_id': admin_user['uid'], 'message': f'm{i}', 'timestamp': timestamp + datetime.timedelta(minutes=i // 3)}
+        for i in range(7)
+    ])
+    service = services.AIService()
+    
+    messages = []
+    cursor = ''
+    while cursor is not None:
+        data, status = body(service.chat_history(None, 1, 3, admin_user, cursor=cursor))
+        assert status == 200
+        messages.extend(entry['message'] for entry in data['data']['history'])
+        cursor = data['data']['pagination']['next_cursor']
+    
+    assert sorted(messages) == [f'm{i}' for i in range(7)]
+    
+    data, status = body(service.chat_history(None, 1, 3, admin_user, cursor=raw_cursor([{'$gt': ''}, 'x'])))
+    assert status == 400
+
+def test_has_more_count_is_capped(mongo, monkeypatch):
+    seed_resources(mongo, 25)
+    monkeypatch.setattr(services, 'COUNT_CAP', 3)
+    
+    data, _ = body(services.ResourceService().get_resources({}, page=1, limit=10, count='has_more'))
+    assert data['data']['pagination']['total'] == 13
+    assert data['data']['pagination']['total_is_exact'] is False
+    
+    data, _ = body(services.ResourceService().get_resources({}, page=2, limit=10, count='has_more'))
+    assert data['data']['pagination']['total'] == 23
+    
+    data, status = body(services.ResourceService().get_resources({}, count='bogus'))
+    assert status == 400
@@ -0,0 +1,38 @@
+import pytest
+
+import services
+import utils
+
+from conftest import body, seed_resources
+
+def test_build_projection_fields_views_and_helpers():
+    assert utils.build_projection() == ({field: 0 for field in utils.RESOURCE_INTERNAL_FIELDS}, [])
+    assert utils.build_projection(view='full')[1] == []
+    
+    projection, added = utils.build_projection('sl_no, cost', required=['created_at', '_id'])
+    assert projection == {'sl_no': 1, 'cost': 1, 'created_at': 1}
+    assert added == ['created_at']
+    
+    with pytest.raises(ValueError):
+        utils.build_projection('location_norm')
+    with pytest.raises(ValueError):
+        utils.build_projection(view='tiny')
+
+def test_listing_returns_only_requested_fields(mongo):
+    seed_resources(mongo, 3)
+    
+    data, _ = body(services.ResourceService().get_resources({}, fields='sl_no,cost'))
+    assert {tuple(sorted(resource)) for resource in data['data']['resources']} == {('_id', 'cost', 'sl_no')}
+    
+    data, _ = body(services.ResourceService().get_resources({}, view='card', cursor=''))
+    resource = data['data']['resources'][0]
+    assert set(resource) == {'_id'} | set(utils.RESOURCE_VIEWS['card'])
+
+def test_internal_fields_are_never_returned(mongo):
+    docs = seed_resources(mongo, 1)
+    
+    data, _ = body(services.ResourceService().get_resource(str(docs[0]['_id'])))
+    assert not set(utils.RESOURCE_INTERNAL_FIELDS) & set(data['data'])
+    
+    data, status = body(services.ResourceService().get_resource(str(docs[0]['_id']), fields='bogus'))
+    assert status == 400
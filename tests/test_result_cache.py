@@ -0,0 +1,75 @@
+import services
+import utils
+
+from conftest import body, make_resource, seed_resources
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+def test_results_are_reused_per_method_and_args(mongo):
+    cache = utils.ResultCache(ttls={'stats': 60})
+    compute = Counter()
+    
+    assert cache.get_or_compute('stats', ('a',), compute) == 1
+    assert cache.get_or_compute('stats', ('a',), compute) == 1
+    assert cache.get_or_compute('stats', ('b',), compute) == 2
+    assert cache.stats()['methods']['stats'] == dict(cache.stats()['methods']['stats'], hits=1, misses=2)
+
+def test_methods_without_a_ttl_are_never_cached(mongo):
+    cache = utils.ResultCache(ttls={})
+    compute = Counter()
+    
+    cache.get_or_compute('charts', (), compute)
+    cache.get_or_compute('charts', (), compute)
+    assert compute.calls == 2
+
+def test_data_version_change_is_a_miss(mongo):
+    cache = utils.ResultCache(ttls={'stats': 60})
+    compute = Counter()
+    
+    cache.get_or_compute('stats', (), compute)
+    utils.data_versions.bump(utils.RESOURCES_COLLECTION)
+    assert cache.get_or_compute('stats', (), compute) == 2
+
+def test_least_recently_used_entry_is_evicted(mongo):
+    cache = utils.ResultCache(ttls={'stats': 60}, max_size=2)
+    compute = Counter()
+    
+    cache.get_or_compute('stats', ('a',), compute)
+    cache.get_or_compute('stats', ('b',), compute)
+    cache.get_or_compute('stats', ('a',), compute)
+    cache.get_or_compute('stats', ('c',), compute)
+    
+    assert cache.get_or_compute('stats', ('a',), compute) == 1
+    assert cache.get_or_compute('stats', ('b',), compute) == 4
+
+def test_dashboard_is_refreshed_after_a_write(mongo, admin_user, unseeded):
+    service = services.ResourceService()
+    hits = utils.dashboard_cache.stats()['methods'].get('dashboard_stats', {}).get('hits', 0)
+    
+    before, _ = body(service.dashboard_stats('total_resources'))
+    cached, _ = body(service.dashboard_stats('total_resources'))
+    assert before['data'] == cached['data'] == {'total_resources': 0}
+    assert utils.dashboard_cache.stats()['methods']['dashboard_stats']['hits'] == hits + 1
+    
+    _, status = body(service.create_resource(make_resource(), admin_user))
+    assert status == 201
+    
+    after, _ = body(service.dashboard_stats('total_resources'))
+    assert after['data'] == {'total_resources': 1}
+
+def test_recent_activity_limit_is_clamped_before_caching(mongo):
+    seed_resources(mongo, services.SEARCH_MAX_LIMIT + 5)
+    service = services.ResourceService()
+    
+    data, status = body(service.recent_activity(1000000))
+    assert status == 200
+    assert len(data['data']) == services.SEARCH_MAX_LIMIT
+    
+    service.recent_activity(services.SEARCH_MAX_LIMIT)
+    assert utils.dashboard_cache.stats()['size'] == 1
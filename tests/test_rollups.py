@@ -0,0 +1,102 @@
+import datetime
+
+import pytest
+
+import services
+import utils
+
+from conftest import body, make_resource
+
+METRICS = services.parse_dashboard_metrics(None)
+
+def by_id(groups):
+    return sorted(groups, key=lambda group: str(group['_id']))
+
+def assert_rollups_match_aggregation(mongo):
+    now = datetime.datetime.utcnow()
+    pipeline = services.build_dashboard_stats_pipeline(METRICS, now)
+    expected = services.read_dashboard_stats(list(mongo[utils.RESOURCES_COLLECTION].aggregate(pipeline))[0], METRICS)
+    actual = services.read_dashboard_stats_from_rollups(METRICS, now)
+    
+    assert actual['total_resources'] == expected['total_resources']
+    assert actual['total_cost'] == pytest.approx(expected['total_cost'])
+    assert actual['recent_additions'] == expected['recent_additions']
+    for metric in ('location_stats', 'department_stats'):
+        assert by_id(actual[metric]) == by_id(expected[metric])
+    
+    service = services.ResourceService()
+    for chart in ('location_distribution', 'department_distribution', 'cost_trend'):
+        rollup_chart = service._dashboard_charts_from_rollups(chart)[chart]
+        aggregation_chart = service._dashboard_charts_from_aggregation(chart)[chart]
+        assert by_id(rollup_chart) == by_id(aggregation_chart)
+
+def test_rollups_track_creates_updates_and_deletes(mongo, admin_user, seed_state):
+    service = services.ResourceService()
+    seed_state.seed()
+    
+    ids = []
+    for i in range(6):
+        data, status = body(service.create_resource(make_resource(i), admin_user))
+        assert status == 201
+        ids.append(data['data']['resource_id'])
+    assert_rollups_match_aggregation(mongo)
+    
+    body(service.update_resource(ids[0], {'location': 'Library', 'cost': 5000}, admin_user))
+    body(service.update_resource(ids[1], {'department': 'MECH'}, admin_user))
+    assert_rollups_match_aggregation(mongo)
+    
+    body(service.delete_resource(ids[2]))
+    body(service.delete_resource(ids[3]))
+    assert_rollups_match_aggregation(mongo)
+
+def test_dashboard_aggregates_until_rollups_are_seeded(mongo, admin_user, seed_state):
+    # Resources that existed before the rollups did
+    mongo[utils.RESOURCES_COLLECTION].insert_many([
+        dict(make_resource(i), created_at=datetime.datetime.utcnow()) for i in range(4)
+    ])
+    service = services.ResourceService()
+    first_id = str(mongo[utils.RESOURCES_COLLECTION].find_one()['_id'])
+    body(service.delete_resource(first_id))
+    
+    assert not utils.rollups_ready()
+    data, _ = body(service.dashboard_stats('total_resources'))
+    assert data['data']['total_resources'] == 3
+    
+    seed_state.seed()
+    assert utils.rollups_ready()
+    assert_rollups_match_aggregation(mongo)
+
+def test_seeding_marks_rollups_ready_for_other_processes(mongo, seed_state):
+    mongo[utils.RESOURCES_COLLECTION].insert_one(dict(make_resource(0), created_at=datetime.datetime.utcnow()))
+    utils.reconcile_rollups()
+    
+    assert utils.rollups_ready()
+    assert mongo[utils.RESOURCE_ROLLUPS_COLLECTION].find_one({'_id': utils.ROLLUP_META_ID})
+    # The meta document survives later reconciles
+    utils.reconcile_rollups()
+    assert mongo[utils.RESOURCE_ROLLUPS_COLLECTION].find_one({'_id': utils.ROLLUP_META_ID})
+
+def test_negative_rollups_are_not_served(mongo, seed_state, capsys):
+    utils.update_rollups(removed=[dict(make_resource(0), created_at=datetime.datetime.utcnow())])
+    
+    assert utils.read_rollups([utils.ROLLUP_LOCATION])[utils.ROLLUP_LOCATION] == []
+    assert 'reconcile-rollups' in capsys.readouterr().out
+
+def test_periodic_reconcile_repairs_drift_once_due(mongo, seed_state):
+    mongo[utils.RESOURCES_COLLECTION].insert_one(dict(make_resource(0), created_at=datetime.datetime.utcnow()))
+    rollups = mongo[utils.RESOURCE_ROLLUPS_COLLECTION]
+    
+    assert seed_state.run_once()['checked'] > 0
+    assert utils.rollups_ready()
+    
+    # An increment lost to a failed write
+    rollups.update_one({'_id': utils._rollup_id(utils.ROLLUP_ALL, None)}, {'$inc': {'count': 1}})
+    assert seed_state.run_once() is None
+    
+    rollups.update_one({'_id': utils.ROLLUP_META_ID}, {'$set': {
+        'reconciled_at': datetime.datetime.utcnow() - datetime.timedelta(seconds=seed_state.reconcile_interval + 1)
+    }})
+    version = utils.data_versions.get(utils.RESOURCES_COLLECTION)
+    assert seed_state.run_once()['corrected'] == 1
+    assert_rollups_match_aggregation(mongo)
+    assert utils.data_versions.get(utils.RESOURCES_COLLECTION) != version
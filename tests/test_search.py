@@ -0,0 +1,37 @@
+from pymongo.errors import OperationFailure
+
+import services
+import utils
+
+from conftest import body, seed_resources
+
+def test_search_terms_drop_negations_and_keep_phrases():
+    assert utils.search_terms('Dell "HP Laptop" -broken') == ['dell', 'hp laptop']
+    assert utils.search_terms('') == []
+
+def test_highlights_match_at_word_starts():
+    document = {'description': 'Dell Monitors and monitor arms', 'location': 'Lab 1', 'cost': 10}
+    highlights = utils.find_highlights(document, ['monitor'], ['description', 'location', 'department'])
+    
+    assert highlights == {'description': [[5, 12], [18, 25]]}
+    assert utils.find_highlights({'description': 'supermonitor'}, ['monitor'], ['description']) == {}
+
+def test_search_falls_back_to_regex_without_the_text_index(mongo, monkeypatch):
+    seed_resources(mongo, 12)
+    collection = type(mongo[utils.RESOURCES_COLLECTION])
+    find = collection.find
+    
+    def find_without_text_index(self, filter=None, *args, **kwargs):
+        if filter and '$text' in filter:
+            raise OperationFailure('text index required for $text query', code=27)
+        return find(self, filter, *args, **kwargs)
+    
+    monkeypatch.setattr(collection, 'find', find_without_text_index)
+    data, status = body(services.ResourceService().search_resources(
+        'monitor 11', {'location': 'Lab 1'}, limit=2, fields='description,location'
+    ))
+    
+    assert status == 200
+    assert [resource['description'] for resource in data['data']['resources']] == ['Monitor 11']
+    assert data['data']['resources'][0]['highlights'] == {'description': [[0, 7], [8, 10]]}
+    assert data['data']['pagination'] == {'page': 1, 'limit': 2, 'total': 1, 'pages': 1}
@@ -0,0 +1,48 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+
+import utils
+
+from bson.decimal128 import Decimal128
+
+def sample():
+    return {
+        '_id': utils.ObjectId('65a1b2c3d4e5f60718293a4b'),
+        'created_at': datetime.datetime(2026, 1, 2, 3, 4, 5),
+        'procurement_date': datetime.date(2025, 12, 31),
+        'cost': Decimal128('1234.50'),
+        'tax': Decimal('10.25'),
+        'tags': ['a', 'b']
+    }
+
+EXPECTED = {
+    '_id': '65a1b2c3d4e5f60718293a4b',
+    'created_at': '2026-01-02T03:04:05',
+    'procurement_date': '2025-12-31',
+    'cost': 1234.5,
+    'tax': 10.25,
+    'tags': ['a', 'b']
+}
+
+def test_stdlib_encoder_handles_bson_types():
+    assert json.loads(utils._stdlib_dumps(sample())) == EXPECTED
+
+def test_orjson_encoder_matches_stdlib():
+    pytest.importorskip('orjson')
+    assert json.loads(utils._orjson_dumps(sample())) == EXPECTED
+
+def test_format_response_wraps_documents():
+    response, status = utils.format_response(data=[sample()], message='ok', status=201)
+    assert status == 201
+    assert response.mimetype == 'application/json'
+    payload = json.loads(response.get_data())
+    assert payload['data'] == [EXPECTED]
+    assert payload['message'] == 'ok'
+    assert payload['status'] == 201
+
+def test_unknown_types_raise():
+    with pytest.raises(TypeError):
+        utils._stdlib_dumps({'value': object()})
@@ -0,0 +1,39 @@
+import datetime
+import threading
+
+import utils
+
+def test_reaper_removes_only_expired_sessions_in_batches(mongo):
+    now = datetime.datetime.utcnow()
+    sessions = mongo[utils.SESSIONS_COLLECTION]
+    sessions.insert_many(
+        [{'session_token': f'old{i}', 'expires_at': now - datetime.timedelta(minutes=i + 1)} for i in range(5)] +
+        [{'session_token': 'live', 'expires_at': now + datetime.timedelta(hours=1)}]
+    )
+    
+    reaper = utils.SessionReaper(interval=60, batch_size=2)
+    assert reaper.run_once() == 5
+    assert [doc['session_token'] for doc in sessions.find()] == ['live']
+    assert reaper.stats()['total_removed'] == 5
+    assert reaper.run_once() == 0
+
+def test_reaper_disabled_with_zero_interval():
+    reaper = utils.SessionReaper(interval=0)
+    reaper.start()
+    assert reaper._threads == []
+
+def test_background_threads_start_once_per_process():
+    release = threading.Event()
+    task = utils.BackgroundTask()
+    
+    task._start_threads('test-task', release.wait, count=2)
+    first = list(task._threads)
+    task._start_threads('test-task', release.wait, count=2)
+    assert task._threads == first
+    assert [thread.name for thread in first] == ['test-task-0', 'test-task-1']
+    
+    # A forked worker inherits the attributes but not the threads
+    task._pid = -1
+    task._start_threads('test-task', release.wait)
+    assert len(task._threads) == 1 and task._threads[0] not in first
+    release.set()
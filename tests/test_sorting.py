@@ -0,0 +1,49 @@
+import pytest
+
+import services
+import utils
+
+from conftest import body, seed_resources
+
+@pytest.mark.parametrize('param, expected', [
+    ('cost', [('cost', 1), ('_id', 1)]),
+    ('-cost', [('cost', -1), ('_id', -1)]),
+    (' cost', [('cost', 1), ('_id', 1)]),
+    ('location,-cost', [('location', 1), ('cost', -1), ('_id', -1)]),
+    ('-location,cost', [('location', -1), ('cost', 1), ('_id', 1)]),
+])
+def test_index_backed_sorts_are_accepted(param, expected):
+    assert utils.parse_sort(param) == expected
+
+@pytest.mark.parametrize('param', ['description', 'location,cost', 'cost,cost', '_id', '-', 'cost,location'])
+def test_unsupported_sorts_are_rejected(param):
+    with pytest.raises(ValueError):
+        utils.parse_sort(param)
+
+def test_missing_sort_uses_default():
+    assert utils.parse_sort('', default=['fallback']) == ['fallback']
+    assert utils.parse_sort(' , ', default=['fallback']) == ['fallback']
+
+def test_cursor_paging_follows_requested_sort(mongo):
+    seed_resources(mongo, 15)
+    service = services.ResourceService()
+    
+    costs = []
+    cursor = ''
+    while cursor is not None:
+        data, status = body(service.get_resources({}, limit=4, cursor=cursor, sort='-cost', fields='cost'))
+        assert status == 200
+        costs.extend(resource['cost'] for resource in data['data']['resources'])
+        cursor = data['data']['pagination']['next_cursor']
+    
+    assert costs == sorted((float(i * 100) for i in range(15)), reverse=True)
+
+def test_sort_keys_outside_projection_are_not_returned(mongo):
+    seed_resources(mongo, 3)
+    data, _ = body(services.ResourceService().get_resources({}, sort='location', fields='cost'))
+    assert all(set(resource) == {'_id', 'cost'} for resource in data['data']['resources'])
+
+def test_invalid_sort_is_a_bad_request(mongo):
+    data, status = body(services.ResourceService().get_resources({}, sort='description'))
+    assert status == 400
+    assert data['error'].startswith('Unsupported sort')
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+import config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_client_is_created_on_first_use_and_reset_after_fork(monkeypatch):
+    manager = config.ConnectionManager('mongodb://127.0.0.1:1', 'campus_assets_test')
+    assert manager._client is None
+    
+    client = manager.get_client()
+    assert manager.get_client() is client
+    assert manager.get_db().name == 'campus_assets_test'
+    
+    # A forked child sees a different pid and builds its own client
+    monkeypatch.setattr(manager, '_pid', -1)
+    assert manager.get_client() is not client
+    
+    manager.reset()
+    assert manager._client is None
+    client.close()
+
+def test_lazy_database_resolves_through_the_manager():
+    manager = config.ConnectionManager('mongodb://127.0.0.1:1', 'campus_assets_test')
+    database = config.LazyDatabase(manager)
+    assert manager._client is None
+    
+    assert database['resources'].name == 'resources'
+    assert manager._client is not None
+    manager.close()
+
+def test_heavy_modules_are_not_imported_at_startup():
+    script = (
+        "import sys, services; "
+        "print(','.join(m for m in ('pandas', 'requests', 'firebase_admin') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True,
+        env=dict(os.environ, MONGODB_URI='mongodb://127.0.0.1:1')
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == ''
@@ -0,0 +1,39 @@
+import json
+
+import flask
+
+import services
+import utils
+
+from conftest import body, seed_resources
+
+def read_lines(response):
+    return [json.loads(line) for line in response.get_data().splitlines()]
+
+def test_stream_writes_one_document_per_line_in_listing_order(mongo):
+    docs = seed_resources(mongo, 7)
+    expected = sorted(docs, key=lambda doc: (doc['created_at'], doc['_id']), reverse=True)
+    
+    with flask.Flask(__name__).test_request_context():
+        response = services.ResourceService().stream_resources({'location': 'Lab 1'}, fields='service_tag')
+        assert response.mimetype == 'application/x-ndjson'
+        lines = read_lines(response)
+    
+    assert [line['service_tag'] for line in lines] == [
+        doc['service_tag'] for doc in expected if doc['location'] == 'Lab 1'
+    ]
+    assert all(set(line) == {'_id', 'service_tag'} for line in lines)
+
+def test_stream_hides_internal_fields(mongo):
+    seed_resources(mongo, 2)
+    
+    with flask.Flask(__name__).test_request_context():
+        lines = read_lines(services.ResourceService().stream_resources({}))
+    
+    assert len(lines) == 2
+    assert not any(field in line for line in lines for field in utils.RESOURCE_INTERNAL_FIELDS)
+
+def test_invalid_projection_is_rejected_before_streaming(mongo):
+    data, status = body(services.ResourceService().stream_resources({}, fields='cost,warranty'))
+    assert status == 400
+    assert data['error']
@@ -1,10 +1,462 @@
 from functools import wraps
-from flask import request, jsonify
+from flask import request, g, Response, make_response
 import re
+import json
+import gzip
+import uuid
 import jwt
-from datetime import datetime
+import hashlib
+import threading
+import time
+import os
+import base64
+from collections import OrderedDict
+from datetime import datetime, date
+from decimal import Decimal
+from bson import json_util
+from bson.objectid import ObjectId
+from bson.decimal128 import Decimal128
+from pymongo import UpdateOne, ReplaceOne, DeleteOne, ReturnDocument
 
-from config import JWT_SECRET, ADMIN_ROLE, VIEWER_ROLE, db, SESSIONS_COLLECTION
+from config import (
+    JWT_SECRET, ADMIN_ROLE, VIEWER_ROLE, db, SESSIONS_COLLECTION,
+    SESSION_CACHE_MAX_SIZE, SESSION_CACHE_TTL_SECONDS,
+    AUTH_MODE, AUTH_MODE_STATELESS, REVOKED_TOKENS_COLLECTION,
+    REVOCATION_SYNC_INTERVAL_SECONDS, SESSION_REAPER_INTERVAL_SECONDS,
+    SESSION_REAPER_BATCH_SIZE, INDEX_REGISTRY, HOT_QUERIES, INDEX_STARTUP_CHECK,
+    MAINTENANCE_INDEX_COLLECTIONS,
+    COUNT_CACHE_MAX_SIZE, COUNT_CACHE_TTL_SECONDS, RESOURCES_COLLECTION,
+    NORMALIZED_FIELDS, RESOURCE_INTERNAL_FIELDS, MATCH_EXACT, MATCH_PREFIX,
+    MATCH_CONTAINS, MATCH_MODES, NGRAM_SIZE, NGRAM_FIELDS, RESOURCE_FIELDS,
+    RESOURCE_VIEWS, JSON_ENCODER, JSON_ENCODER_ORJSON, DATA_VERSIONS_COLLECTION,
+    DATA_VERSION_CACHE_SECONDS, COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY, RESOURCE_SORT_INDEXES, RESOURCE_ROLLUPS_COLLECTION,
+    ROLLUP_ALL, ROLLUP_LOCATION, ROLLUP_DEPARTMENT, ROLLUP_CREATED_MONTH,
+    ROLLUP_PROCUREMENT_MONTH, ROLLUP_SOURCE_FIELDS, RESULT_CACHE_MAX_SIZE,
+    RESULT_CACHE_TTLS, DASHBOARD_USE_ROLLUPS, ROLLUP_META_ID, ROLLUP_SEED_CHECK_SECONDS,
+    ROLLUP_RECONCILE_INTERVAL_SECONDS
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class SessionCache:
+    """Bounded LRU/TTL cache of validated sessions keyed by token hash, per process"""
+
+    def __init__(self, max_size=SESSION_CACHE_MAX_SIZE, ttl=SESSION_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        """Return the cached token payload or None on a miss"""
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, token, payload, session_expires_at):
+        """Cache a payload until the TTL or the session expiry, whichever is first"""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        
+        now = time.time()
+        expires_at = min(now + self.ttl, (session_expires_at - datetime.utcnow()).total_seconds() + now)
+        if expires_at <= now:
+            return
+        
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, token):
+        """Drop a token from the cache (logout, expiry)"""
+        with self._lock:
+            if self._entries.pop(self._key(token), None) is not None:
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+session_cache = SessionCache()
+
+class CountCache:
+    """Bounded TTL cache of count_documents results keyed by normalized filter"""
+
+    def __init__(self, max_size=COUNT_CACHE_MAX_SIZE, ttl=COUNT_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(query):
+        return json_util.dumps(query, sort_keys=True)
+
+    def get(self, query):
+        key = self._key(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, query, count):
+        key = self._key(query)
+        with self._lock:
+            self._entries[key] = (count, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+resource_count_cache = CountCache()
+
+class DataVersions:
+    """Per-collection data version counters that back read endpoint ETags, cached locally for ttl seconds"""
+
+    def __init__(self, ttl=DATA_VERSION_CACHE_SECONDS):
+        self.ttl = ttl
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.bumps = 0
+
+    @staticmethod
+    def _token(doc):
+        return f"{doc['epoch']}:{doc['version']}" if doc else 'none'
+
+    def get(self, collection):
+        """Return the current version token of a collection"""
+        now = time.time()
+        with self._lock:
+            entry = self._versions.get(collection)
+            if entry and now - entry[1] < self.ttl:
+                return entry[0]
+        
+        token = self._token(db[DATA_VERSIONS_COLLECTION].find_one({'_id': collection}))
+        with self._lock:
+            self._versions[collection] = (token, now)
+            self.refreshes += 1
+        return token
+
+    def bump(self, collection):
+        """Record a write to a collection"""
+        doc = db[DATA_VERSIONS_COLLECTION].find_one_and_update(
+            {'_id': collection},
+            {'$inc': {'version': 1}, '$setOnInsert': {'epoch': uuid.uuid4().hex[:8]}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        token = self._token(doc)
+        with self._lock:
+            self._versions[collection] = (token, time.time())
+            self.bumps += 1
+        return token
+
+    def stats(self):
+        with self._lock:
+            return {
+                'versions': {collection: entry[0] for collection, entry in self._versions.items()},
+                'refreshes': self.refreshes,
+                'bumps': self.bumps
+            }
+
+data_versions = DataVersions()
+
+class ResultCache:
+    """Bounded LRU cache of read-method results with per-method TTLs, invalidated by data version"""
+
+    def __init__(self, ttls=RESULT_CACHE_TTLS, max_size=RESULT_CACHE_MAX_SIZE, collection=RESOURCES_COLLECTION):
+        self.ttls = ttls
+        self.max_size = max_size
+        self.collection = collection
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.invalidations = 0
+
+    def _method_stats(self, method):
+        return self._stats.setdefault(method, {'hits': 0, 'misses': 0, 'served_age_total': 0.0, 'max_served_age': 0.0})
+
+    def get_or_compute(self, method, args, compute):
+        """Return the cached result of method(*args), calling compute() on a miss"""
+        try:
+            version = data_versions.get(self.collection)
+        except Exception as e:
+            print(f"❌ Result cache bypassed, data version unavailable: {e}")
+            return compute()
+        
+        key = (method,) + tuple(args)
+        now = time.time()
+        with self._lock:
+            stats = self._method_stats(method)
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now and entry[3] == version:
+                self._entries.move_to_end(key)
+                age = now - entry[1]
+                stats['hits'] += 1
+                stats['served_age_total'] += age
+                stats['max_served_age'] = max(stats['max_served_age'], age)
+                return entry[0]
+            self._entries.pop(key, None)
+            stats['misses'] += 1
+        
+        value = compute()
+        with self._lock:
+            self._entries[key] = (value, now, now + self.ttls.get(method, 0), version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            methods = {}
+            for method, stats in self._stats.items():
+                lookups = stats['hits'] + stats['misses']
+                methods[method] = {
+                    'ttl': self.ttls.get(method, 0),
+                    'hits': stats['hits'],
+                    'misses': stats['misses'],
+                    'hit_ratio': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+                    'avg_served_age_seconds': round(stats['served_age_total'] / stats['hits'], 3) if stats['hits'] else 0.0,
+                    'max_served_age_seconds': round(stats['max_served_age'], 3)
+                }
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'invalidations': self.invalidations,
+                'methods': methods
+            }
+
+dashboard_cache = ResultCache()
+
+class BackgroundTask:
+    """Base for tasks whose daemon threads are started once per worker process"""
+
+    def __init__(self):
+        self._threads = []
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _start_threads(self, name, target, count=1):
+        # Threads do not survive fork, so start them again in each worker process
+        if self._threads and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = []
+            for i in range(count):
+                thread = threading.Thread(target=target, name=name if count == 1 else f'{name}-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+class RevocationList(BackgroundTask):
+    """In-memory denylist of logged-out token IDs (jti), synced from MongoDB in the background"""
+
+    def __init__(self, sync_interval=REVOCATION_SYNC_INTERVAL_SECONDS):
+        super().__init__()
+        self.sync_interval = sync_interval
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self.last_sync = None
+
+    def revoke(self, jti, expires_at):
+        """Revoke a token ID until its expiry"""
+        with self._lock:
+            self._revoked[jti] = expires_at
+        
+        db[REVOKED_TOKENS_COLLECTION].update_one(
+            {'jti': jti},
+            {'$set': {'jti': jti, 'expires_at': expires_at, 'revoked_at': datetime.utcnow()}},
+            upsert=True
+        )
+
+    def is_revoked(self, jti):
+        """Check a token ID against the local denylist"""
+        self._start_threads('revocation-sync', self._run)
+        # Fail closed until a sync has succeeded
+        if self.last_sync is None:
+            self.sync()
+            if self.last_sync is None:
+                return True
+        with self._lock:
+            return jti in self._revoked
+
+    def sync(self):
+        """Reload unexpired revocations from the database"""
+        try:
+            now = datetime.utcnow()
+            revoked = {
+                doc['jti']: doc['expires_at']
+                for doc in db[REVOKED_TOKENS_COLLECTION].find(
+                    {'expires_at': {'$gt': now}}, {'jti': 1, 'expires_at': 1}
+                )
+            }
+            with self._lock:
+                # Keep local revocations the database has not returned yet
+                for jti, expires_at in self._revoked.items():
+                    if expires_at > now:
+                        revoked.setdefault(jti, expires_at)
+                self._revoked = revoked
+            self.last_sync = now
+        except Exception as e:
+            print(f"Revocation list sync failed: {e}")
+
+    def _run(self):
+        while True:
+            self.sync()
+            time.sleep(self.sync_interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._revoked),
+                'last_sync': self.last_sync.isoformat() if self.last_sync else None,
+                'sync_interval_seconds': self.sync_interval
+            }
+
+revocation_list = RevocationList()
+
+def reap_expired_sessions(batch_size=SESSION_REAPER_BATCH_SIZE):
+    """Delete expired sessions in batches and return how many were removed"""
+    removed = 0
+    now = datetime.utcnow()
+    
+    while True:
+        expired_ids = [
+            doc['_id'] for doc in db[SESSIONS_COLLECTION].find(
+                {'expires_at': {'$lt': now}}, {'_id': 1}
+            ).limit(batch_size)
+        ]
+        if not expired_ids:
+            break
+        
+        result = db[SESSIONS_COLLECTION].delete_many({'_id': {'$in': expired_ids}})
+        removed += result.deleted_count
+        
+        if len(expired_ids) < batch_size:
+            break
+    
+    return removed
+
+class SessionReaper(BackgroundTask):
+    """Background task that removes expired sessions ahead of MongoDB's TTL monitor"""
+
+    def __init__(self, interval=SESSION_REAPER_INTERVAL_SECONDS, batch_size=SESSION_REAPER_BATCH_SIZE):
+        super().__init__()
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_run = None
+        self.last_removed = 0
+        self.total_removed = 0
+
+    def start(self):
+        """Start the reaper thread in the current process"""
+        if self.interval <= 0:
+            return
+        self._start_threads('session-reaper', self._run)
+
+    def run_once(self):
+        """Reap one round of expired sessions and record the result"""
+        removed = reap_expired_sessions(self.batch_size)
+        self.last_run = datetime.utcnow()
+        self.last_removed = removed
+        self.total_removed += removed
+        if removed:
+            print(f"🧹 Removed {removed} expired sessions")
+        return removed
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Session reaper error: {e}")
+            time.sleep(self.interval)
+
+    def stats(self):
+        return {
+            'interval_seconds': self.interval,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_removed': self.last_removed,
+            'total_removed': self.total_removed
+        }
+
+session_reaper = SessionReaper()
 
 def validate_email(email):
     """Validate email format"""
@@ -14,6 +466,28 @@ def validate_email(email):
     regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(regex, email) is not None
 
+def _json_default(obj):
+    """Encode the BSON and Python types that appear in Mongo documents"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal128):
+        obj = obj.to_decimal()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _orjson_dumps(obj):
+    return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+# ObjectId, datetime and Decimal values are encoded directly, so services can
+# return Mongo documents without converting them first
+json_dumps = _orjson_dumps if JSON_ENCODER == JSON_ENCODER_ORJSON and orjson else _stdlib_dumps
+
 def format_response(data=None, message=None, error=None, status=200):
     """Format standard API response"""
     response = {}
@@ -30,7 +504,70 @@ def format_response(data=None, message=None, error=None, status=200):
     response['status'] = status
     response['timestamp'] = datetime.utcnow().isoformat()
     
-    return jsonify(response), status
+    return Response(json_dumps(response), mimetype='application/json'), status
+
+def _etag_matches(if_none_match, etag):
+    """Check If-None-Match, including tags compress_response suffixed with an encoding"""
+    return any(if_none_match.contains(etag + suffix) for suffix in ('', '-gzip', '-br'))
+
+def conditional_get(*collections, window_seconds=None):
+    """Serve a read endpoint with an ETag derived from data versions, answering 304 before the view runs"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                parts = [request.full_path] + [data_versions.get(collection) for collection in collections]
+            except Exception as e:
+                print(f"❌ Data version lookup failed: {e}")
+                return f(*args, **kwargs)
+            
+            if window_seconds:
+                parts.append(int(time.time() // window_seconds))
+            etag = hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+            
+            if _etag_matches(request.if_none_match, etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
+def compress_response(response):
+    """Gzip or brotli encode large JSON bodies for clients that accept it (after_request hook)"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return response
+    
+    accepted = request.accept_encodings
+    if brotli and accepted['br']:
+        encoding = 'br'
+        body = brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    elif accepted['gzip']:
+        encoding = 'gzip'
+        body = gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL)
+    else:
+        return response
+    
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    
+    # Each encoding is a different representation, so it gets its own tag
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    
+    return response
 
 def validate_request_data(data, required_fields):
     """Validate required fields in request data"""
@@ -50,18 +587,43 @@ def validate_request_data(data, required_fields):
     
     return None
 
+def get_bearer_token(request):
+    """Extract the raw bearer token from the Authorization header"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    
+    return auth_header.split(' ')[1]
+
 def get_user_from_token(request):
     """Extract user data from JWT token"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
+        token = get_bearer_token(request)
+        if not token:
             return None
         
-        token = auth_header.split(' ')[1]
+        # Serve recently validated sessions from the in-process cache
+        cached_token = session_cache.get(token)
+        if cached_token is not None:
+            # Session mode enforces logout by deleting the session, so only
+            # stateless tokens need the revocation list
+            if (AUTH_MODE == AUTH_MODE_STATELESS and cached_token.get('jti')
+                    and revocation_list.is_revoked(cached_token['jti'])):
+                session_cache.invalidate(token)
+                return None
+            return cached_token
         
         # Decode JWT token
         decoded_token = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
         
+        # Stateless mode trusts the signed exp claim and only checks revocations.
+        # Tokens issued without a jti fall back to the session lookup.
+        if AUTH_MODE == AUTH_MODE_STATELESS and decoded_token.get('jti'):
+            if revocation_list.is_revoked(decoded_token['jti']):
+                return None
+            session_cache.set(token, decoded_token, datetime.utcfromtimestamp(decoded_token['exp']))
+            return decoded_token
+        
         # Check if session exists in database
         session = db[SESSIONS_COLLECTION].find_one({'session_token': token})
         if not session:
@@ -70,20 +632,36 @@ def get_user_from_token(request):
         # Check if session is expired
         if session['expires_at'] < datetime.utcnow():
             # Remove expired session
+            session_cache.invalidate(token)
             db[SESSIONS_COLLECTION].delete_one({'session_token': token})
             return None
         
+        session_cache.set(token, decoded_token, session['expires_at'])
+        
         return decoded_token
         
     except Exception as e:
         print(f"Token validation error: {e}")
         return None
 
+def get_current_user():
+    """Resolve the authenticated user once per request and memoize it on flask.g"""
+    if 'current_user' not in g:
+        g.session_token = get_bearer_token(request)
+        g.current_user = get_user_from_token(request) if g.session_token else None
+    
+    return g.current_user
+
+def get_current_token():
+    """Return the session token of the current request"""
+    get_current_user()
+    return g.session_token
+
 def login_required(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_data = get_user_from_token(request)
+        user_data = get_current_user()
         if not user_data:
             return format_response(error="Authentication required", status=401)
         
@@ -95,7 +673,7 @@ def admin_required(f):
     """Decorator to require admin role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_data = get_user_from_token(request)
+        user_data = get_current_user()
         if not user_data:
             return format_response(error="Authentication required", status=401)
         
@@ -110,7 +688,7 @@ def viewer_or_admin_required(f):
     """Decorator to require viewer or admin role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_data = get_user_from_token(request)
+        user_data = get_current_user()
         if not user_data:
             return format_response(error="Authentication required", status=401)
         
@@ -143,6 +721,126 @@ def paginate_query(query, page, limit):
     skip = (page - 1) * limit
     return query.skip(skip).limit(limit)
 
+# Types a keyset cursor may carry: the sort key values of a resource or chat row
+CURSOR_VALUE_TYPES = (datetime, ObjectId, str, int, float)
+
+def encode_cursor(values):
+    """Encode the sort key values of the last row into an opaque cursor"""
+    raw = json_util.dumps(values).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor created by encode_cursor; raises ValueError if invalid"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json_util.loads(raw.decode('utf-8'))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    
+    # Only plain sort key values; anything else (e.g. {"$ne": null}) would be
+    # spliced into the seek query as an operator. None comes from documents
+    # missing the sort field.
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, CURSOR_VALUE_TYPES):
+            raise ValueError("Invalid cursor")
+    
+    return values
+
+def build_keyset_query(query, sort, cursor):
+    """Add a seek condition after the cursor position to a query"""
+    last_values = decode_cursor(cursor)
+    if len(last_values) != len(sort):
+        raise ValueError("Invalid cursor")
+    
+    # For [(a, -1), (_id, -1)]: {a < va} OR {a == va AND _id < vid}, served by the compound index.
+    # Nulls sort first but never match $lt/$gt, so they get their own clauses.
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        prefix = {prev_field: last_values[j] for j, (prev_field, _) in enumerate(sort[:i])}
+        value = last_values[i]
+        if value is None:
+            # Nothing follows the null block in a descending walk
+            if direction == 1:
+                clauses.append(dict(prefix, **{field: {'$ne': None}}))
+        else:
+            clauses.append(dict(prefix, **{field: {'$lt' if direction == -1 else '$gt': value}}))
+            if direction == -1:
+                clauses.append(dict(prefix, **{field: None}))
+    
+    seek = {'$or': clauses}
+    return {'$and': [query, seek]} if query else seek
+
+def cursor_for(document, sort):
+    """Build the cursor pointing just after a document"""
+    return encode_cursor([document.get(field) for field, _ in sort])
+
+def format_sort(sort):
+    """Render a sort as its ?sort= spelling, e.g. location,-cost"""
+    return ','.join(('-' if direction == -1 else '') + field for field, direction in sort if field != '_id')
+
+def parse_sort(sort_param, supported=RESOURCE_SORT_INDEXES, default=None):
+    """Parse ?sort=-cost,location into an index-backed sort with an _id tiebreak; raises ValueError"""
+    if not sort_param:
+        return default
+    
+    sort = []
+    for part in sort_param.split(','):
+        # A literal '+' arrives as a space in query strings
+        part = part.strip()
+        if not part:
+            continue
+        direction = -1 if part.startswith('-') else 1
+        field = part.lstrip('+-').strip()
+        if not field or field == '_id' or field in dict(sort):
+            raise ValueError(f"Invalid sort field: {field or part}")
+        sort.append((field, direction))
+    
+    if not sort:
+        return default
+    sort.append(('_id', sort[-1][1]))
+    
+    for keys in supported:
+        if sort == list(keys) or sort == [(field, -direction) for field, direction in keys]:
+            return sort
+    
+    raise ValueError(
+        f"Unsupported sort. Use one of: {'; '.join(format_sort(keys) for keys in supported)} "
+        f"(or any of these with every direction reversed)"
+    )
+
+def build_projection(fields=None, view=None, required=()):
+    """Compile ?fields= or ?view= into (projection, added helper fields); raises ValueError"""
+    if fields:
+        selected = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in selected if field not in RESOURCE_FIELDS and field != '_id']
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    elif view:
+        if view not in RESOURCE_VIEWS:
+            raise ValueError(f"Invalid view. Use one of: {', '.join(RESOURCE_VIEWS)}")
+        selected = RESOURCE_VIEWS[view]
+    else:
+        selected = None
+    
+    if selected is None:
+        return {field: 0 for field in RESOURCE_INTERNAL_FIELDS}, []
+    
+    added = [field for field in required if field != '_id' and field not in selected]
+    return {field: 1 for field in list(selected) + added}, added
+
+def strip_fields(documents, fields):
+    """Remove helper fields added by build_projection from documents in place"""
+    if fields:
+        for document in documents:
+            for field in fields:
+                document.pop(field, None)
+    return documents
+
 def build_search_query(search_term, fields):
     """Build MongoDB search query"""
     if not search_term:
@@ -151,11 +849,374 @@ def build_search_query(search_term, fields):
     search_conditions = []
     for field in fields:
         search_conditions.append({
-            field: {'$regex': search_term, '$options': 'i'}
+            field: {'$regex': re.escape(search_term), '$options': 'i'}
         })
     
     return {'$or': search_conditions}
 
+def search_terms(text):
+    """Split a $text search string into lowercase terms, ignoring negations"""
+    return [
+        term.strip('"').lower()
+        for term in re.findall(r'"[^"]+"|\S+', text or '')
+        if not term.startswith('-') and term.strip('"')
+    ]
+
+def find_highlights(document, terms, fields):
+    """Return {field: [[start, end], ...]} spans where search terms start a word"""
+    highlights = {}
+    patterns = [re.compile(r'\b' + re.escape(term), re.IGNORECASE) for term in terms]
+    
+    for field in fields:
+        value = document.get(field)
+        if value is None:
+            continue
+        
+        spans = sorted(
+            [match.start(), match.end()]
+            for pattern in patterns
+            for match in pattern.finditer(str(value))
+        )
+        if spans:
+            highlights[field] = spans
+    
+    return highlights
+
+def normalize_value(value):
+    """Case-fold and collapse whitespace for shadow fields and filter values"""
+    return ' '.join(str(value).split()).casefold()
+
+def ngrams(value, n=NGRAM_SIZE):
+    """Return the sorted distinct n-grams of a normalized value"""
+    normalized = normalize_value(value)
+    return sorted({normalized[i:i + n] for i in range(len(normalized) - n + 1)})
+
+def build_ngram_query(fragment, fields=NGRAM_FIELDS):
+    """Build a substring lookup over identifier fields using their trigram arrays"""
+    normalized = normalize_value(fragment)
+    grams = ngrams(normalized)
+    pattern = {'$regex': re.escape(normalized), '$options': 'i'}
+    
+    clauses = []
+    for field, gram_field in fields.items():
+        # The regex drops candidates whose trigrams occur in another order;
+        # documents not yet backfilled fall back to the regex alone
+        if grams:
+            clauses.append({gram_field: {'$all': grams}, field: pattern})
+            clauses.append({gram_field: {'$exists': False}, field: pattern})
+        else:
+            clauses.append({field: pattern})
+    
+    return {'$or': clauses}
+
+def add_search_fields(doc):
+    """Set the normalized shadow fields and trigram arrays for fields present in doc"""
+    for field in RESOURCE_INTERNAL_FIELDS:
+        doc.pop(field, None)
+    
+    for field, shadow_field in NORMALIZED_FIELDS.items():
+        if doc.get(field) is not None:
+            doc[shadow_field] = normalize_value(doc[field])
+    
+    for field, gram_field in NGRAM_FIELDS.items():
+        if doc.get(field) is not None:
+            doc[gram_field] = ngrams(doc[field])
+    
+    return doc
+
+def _raw_text_condition(normalized, mode):
+    """Case-insensitive regex on a raw field equivalent to a filter on its shadow field"""
+    pattern = r'\s+'.join(re.escape(word) for word in normalized.split(' '))
+    if mode == MATCH_EXACT:
+        pattern = r'^\s*' + pattern + r'\s*$'
+    elif mode == MATCH_PREFIX:
+        pattern = r'^\s*' + pattern
+    return {'$regex': pattern, '$options': 'i'}
+
+def compile_text_filter(field, value, mode=MATCH_CONTAINS):
+    """Compile a user-supplied text filter into its cheapest index-backed form"""
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Invalid match mode: {mode}")
+    
+    shadow_field = NORMALIZED_FIELDS.get(field)
+    if shadow_field:
+        normalized = normalize_value(value)
+        if mode == MATCH_EXACT:
+            condition = normalized
+        elif mode == MATCH_PREFIX:
+            condition = {'$regex': '^' + re.escape(normalized)}
+        else:
+            condition = {'$regex': re.escape(normalized)}
+        # Documents written before the shadow field existed match on the raw field until backfilled
+        return {'$or': [
+            {shadow_field: condition},
+            {shadow_field: {'$exists': False}, field: _raw_text_condition(normalized, mode)}
+        ]}
+    
+    if mode == MATCH_EXACT:
+        return {field: value}
+    if mode == MATCH_PREFIX:
+        return {field: {'$regex': '^' + re.escape(str(value)), '$options': 'i'}}
+    return {field: {'$regex': re.escape(str(value)), '$options': 'i'}}
+
+def and_clause(query, clause):
+    """AND a filter clause into a query in place, going through $and when its keys collide"""
+    if not clause:
+        return query
+    if any(key in query for key in clause):
+        query.setdefault('$and', []).append(clause)
+    else:
+        query.update(clause)
+    return query
+
+def compile_resource_filters(filters, text_fields=('location', 'department', 'description'), match_modes=None):
+    """Compile a {field: value} filter dict, matching text fields by match mode"""
+    match_modes = match_modes or {}
+    query = {}
+    
+    for field, value in filters.items():
+        if field in text_fields:
+            and_clause(query, compile_text_filter(field, value, match_modes.get(field, MATCH_CONTAINS)))
+        else:
+            and_clause(query, {field: value})
+    
+    return query
+
+def backfill_search_fields(batch_size=1000):
+    """Recompute derived search fields for every resource and return how many changed"""
+    updated = 0
+    operations = []
+    source_fields = list(NORMALIZED_FIELDS) + list(NGRAM_FIELDS)
+    projection = {field: 1 for field in source_fields}
+    
+    for doc in db[RESOURCES_COLLECTION].find({}, projection):
+        fields = add_search_fields({field: doc.get(field) for field in source_fields})
+        fields = {k: v for k, v in fields.items() if k in RESOURCE_INTERNAL_FIELDS}
+        if fields:
+            operations.append(UpdateOne({'_id': doc['_id']}, {'$set': fields}))
+        
+        if len(operations) >= batch_size:
+            updated += db[RESOURCES_COLLECTION].bulk_write(operations, ordered=False).modified_count
+            operations = []
+    
+    if operations:
+        updated += db[RESOURCES_COLLECTION].bulk_write(operations, ordered=False).modified_count
+    
+    return updated
+
+def _rollup_month(value):
+    """Return YYYY-MM for a datetime or a YYYY-MM-DD string"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m')
+    if isinstance(value, str) and len(value) >= 7:
+        return value[:7]
+    return None
+
+def rollup_groups(resource):
+    """Return the (dimension, value) rollup groups a resource counts towards"""
+    def group_value(value):
+        return value if value is None or isinstance(value, str) else str(value)
+    
+    return [
+        (ROLLUP_ALL, None),
+        (ROLLUP_LOCATION, group_value(resource.get('location'))),
+        (ROLLUP_DEPARTMENT, group_value(resource.get('department'))),
+        (ROLLUP_CREATED_MONTH, _rollup_month(resource.get('created_at'))),
+        (ROLLUP_PROCUREMENT_MONTH, _rollup_month(resource.get('procurement_date')))
+    ]
+
+def _rollup_cost(resource):
+    cost = resource.get('cost')
+    if isinstance(cost, bool) or not isinstance(cost, (int, float)) or cost != cost:
+        return 0
+    return cost
+
+def _rollup_id(dimension, value):
+    return json_util.dumps([dimension, value])
+
+def rollup_delta(removed=(), added=()):
+    """Net {(dimension, value): [count, total_cost]} change for documents leaving and entering resources"""
+    delta = {}
+    for resources, sign in ((removed, -1), (added, 1)):
+        for resource in resources:
+            if not resource:
+                continue
+            cost = _rollup_cost(resource)
+            for group in rollup_groups(resource):
+                entry = delta.setdefault(group, [0, 0])
+                entry[0] += sign
+                entry[1] += sign * cost
+    return {group: entry for group, entry in delta.items() if entry[0] or entry[1]}
+
+def update_rollups(removed=(), added=()):
+    """Apply a write to the dashboard rollups with $inc; removed/added are the documents before/after it"""
+    delta = rollup_delta(removed, added)
+    if not delta:
+        return
+    
+    try:
+        db[RESOURCE_ROLLUPS_COLLECTION].bulk_write([
+            UpdateOne(
+                {'_id': _rollup_id(dimension, value)},
+                {'$inc': {'count': count, 'total_cost': cost},
+                 '$setOnInsert': {'dimension': dimension, 'value': value}},
+                upsert=True
+            )
+            for (dimension, value), (count, cost) in delta.items()
+        ], ordered=False)
+    except Exception as e:
+        # The resource write already happened; the next reconcile repairs the drift
+        print(f"❌ Failed to update dashboard rollups: {e}")
+
+def read_rollups(dimensions):
+    """Return {dimension: [rollup, ...]} for non-empty groups, largest count first"""
+    rollups = {dimension: [] for dimension in dimensions}
+    for rollup in db[RESOURCE_ROLLUPS_COLLECTION].find(
+        {'dimension': {'$in': list(dimensions)}, 'count': {'$ne': 0}}
+    ).sort([('dimension', 1), ('count', -1)]):
+        if rollup['count'] < 0:
+            print(f"❌ Rollup {rollup['_id']} has count {rollup['count']}; run `flask reconcile-rollups`")
+            continue
+        rollups[rollup['dimension']].append(rollup)
+    return rollups
+
+def reconcile_rollups(batch_size=1000):
+    """Recompute the rollups from resources, correct drifted groups and record the run in the meta document"""
+    resources = db[RESOURCES_COLLECTION].find(
+        {}, {field: 1 for field in ROLLUP_SOURCE_FIELDS}
+    ).batch_size(batch_size)
+    expected = {_rollup_id(*group): (group, entry) for group, entry in rollup_delta(added=resources).items()}
+    existing = {
+        rollup['_id']: rollup
+        for rollup in db[RESOURCE_ROLLUPS_COLLECTION].find({'dimension': {'$exists': True}})
+    }
+    
+    operations = []
+    for rollup_id, ((dimension, value), (count, cost)) in expected.items():
+        current = existing.get(rollup_id)
+        if current and current.get('count') == count and abs(current.get('total_cost', 0) - cost) < 1e-6:
+            continue
+        operations.append(ReplaceOne(
+            {'_id': rollup_id},
+            {'dimension': dimension, 'value': value, 'count': count, 'total_cost': cost},
+            upsert=True
+        ))
+    corrected = len(operations)
+    
+    for rollup_id in existing:
+        if rollup_id not in expected:
+            operations.append(DeleteOne({'_id': rollup_id}))
+    
+    for start in range(0, len(operations), batch_size):
+        db[RESOURCE_ROLLUPS_COLLECTION].bulk_write(operations[start:start + batch_size], ordered=False)
+    
+    db[RESOURCE_ROLLUPS_COLLECTION].update_one(
+        {'_id': ROLLUP_META_ID}, {'$set': {'reconciled_at': datetime.utcnow()}}, upsert=True
+    )
+    
+    return {'checked': len(expected), 'corrected': corrected, 'removed': len(operations) - corrected}
+
+class RollupSeed(BackgroundTask):
+    """Background task that seeds the dashboard rollups and periodically reconciles them"""
+
+    def __init__(self, enabled=DASHBOARD_USE_ROLLUPS, check_interval=ROLLUP_SEED_CHECK_SECONDS,
+                 reconcile_interval=ROLLUP_RECONCILE_INTERVAL_SECONDS):
+        super().__init__()
+        self.enabled = enabled
+        self.check_interval = check_interval
+        self.reconcile_interval = reconcile_interval
+        self._seeded = False
+        self._checked_at = 0
+        self._lock = threading.Lock()
+        self.last_seed = None
+        self.last_reconcile = None
+
+    def ready(self):
+        """Return True once a reconcile has counted the existing resources, rechecking every check_interval"""
+        if not self.enabled:
+            return False
+        if self._seeded:
+            return True
+        
+        now = time.time()
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = now
+        
+        try:
+            self._seeded = db[RESOURCE_ROLLUPS_COLLECTION].find_one({'_id': ROLLUP_META_ID}) is not None
+        except Exception as e:
+            print(f"❌ Rollup seed check failed: {e}")
+        return self._seeded
+
+    def seed(self):
+        """Reconcile the rollups from resources and mark them ready"""
+        result = reconcile_rollups()
+        self._seeded = True
+        self.last_seed = result
+        return result
+
+    def run_once(self):
+        """Seed the rollups, or reconcile them if the last reconcile is older than the interval"""
+        meta = db[RESOURCE_ROLLUPS_COLLECTION].find_one({'_id': ROLLUP_META_ID})
+        changed = False
+        if meta is None:
+            seeded = self.seed()
+            print(f"✅ Seeded dashboard rollups: {seeded['checked']} groups")
+            changed = bool(seeded['corrected'] or seeded['removed'])
+            # Increments that landed while the seed scanned may have been overwritten
+            result = reconcile_rollups()
+        else:
+            self._seeded = True
+            reconciled_at = meta.get('reconciled_at')
+            if self.reconcile_interval <= 0 or (
+                reconciled_at and (datetime.utcnow() - reconciled_at).total_seconds() < self.reconcile_interval
+            ):
+                return None
+            result = reconcile_rollups()
+        
+        self.last_reconcile = result
+        if result['corrected'] or result['removed']:
+            print(f"🔧 Reconciled dashboard rollups: {result['corrected']} corrected, {result['removed']} removed")
+            changed = True
+        if changed:
+            data_versions.bump(RESOURCES_COLLECTION)
+        return result
+
+    def start(self):
+        """Start the seed and reconcile thread in the current process"""
+        if not self.enabled:
+            return
+        self._start_threads('rollup-seed', self._run)
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Dashboard rollup reconcile failed: {e}")
+                time.sleep(self.check_interval)
+                continue
+            if self.reconcile_interval <= 0:
+                return
+            time.sleep(self.reconcile_interval)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'seeded': self._seeded,
+            'reconcile_interval_seconds': self.reconcile_interval,
+            'last_seed': self.last_seed,
+            'last_reconcile': self.last_reconcile
+        }
+
+rollup_seed = RollupSeed()
+
+def rollups_ready():
+    """True when the dashboard and catalog should read the rollups"""
+    return rollup_seed.ready()
+
 def validate_date_format(date_string):
     """Validate date format (YYYY-MM-DD)"""
     if not date_string:
@@ -309,3 +1370,170 @@ def calculate_pagination_info(total_items, page, limit):
         'has_prev': page > 1,
         'has_next': page < total_pages
     }
+
+def calculate_cursor_pagination_info(limit, next_cursor, total=None):
+    """Calculate pagination information for cursor (keyset) pagination"""
+    info = {
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None
+    }
+    
+    if total is not None:
+        info['total'] = total
+    
+    return info
+
+def summarize_import_times(importtime_output, top=15):
+    """Summarize `python -X importtime` output by top-level import"""
+    top_level = []
+    
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        
+        package = parts[2]
+        # Nested imports are indented two spaces per level after the separator
+        if len(package) - len(package.lstrip()) > 1:
+            continue
+        
+        top_level.append({
+            'module': package.strip(),
+            'self_ms': int(parts[0]) / 1000,
+            'cumulative_ms': int(parts[1]) / 1000
+        })
+    
+    top_level.sort(key=lambda entry: entry['cumulative_ms'], reverse=True)
+    
+    return {
+        'total_ms': round(sum(entry['cumulative_ms'] for entry in top_level), 1),
+        'slowest': top_level[:top]
+    }
+
+def _index_matches(existing, spec):
+    # Text indexes are stored as _fts/_ftsx keys; compare their weights instead
+    if any(direction == 'text' for _, direction in spec['keys']):
+        return existing.get('weights') == spec['options'].get('weights')
+    
+    if [tuple(key) for key in existing['key']] != [tuple(key) for key in spec['keys']]:
+        return False
+    for option, value in spec['options'].items():
+        if option != 'name' and existing.get(option) != value:
+            return False
+    return True
+
+def verify_indexes(registry=INDEX_REGISTRY):
+    """Return the declared indexes that are missing or differ from the registry"""
+    problems = []
+    
+    for collection, specs in registry.items():
+        existing = list(db[collection].index_information().values())
+        for spec in specs:
+            if not any(_index_matches(index, spec) for index in existing):
+                problems.append({
+                    'collection': collection,
+                    'keys': spec['keys'],
+                    'options': spec['options'],
+                    'serves': spec['serves']
+                })
+    
+    return problems
+
+def ensure_indexes(registry=INDEX_REGISTRY):
+    """Create every declared index; create_index is a no-op for existing ones"""
+    created = []
+    
+    for collection, specs in registry.items():
+        for spec in specs:
+            name = db[collection].create_index(spec['keys'], **spec['options'])
+            created.append({'collection': collection, 'name': name, 'serves': spec['serves']})
+    
+    return created
+
+def _plan_stages(plan):
+    """Flatten a query plan tree into (stage, index_name) pairs"""
+    stages = [(plan.get('stage'), plan.get('indexName'))]
+    
+    children = list(plan.get('inputStages', []))
+    if 'inputStage' in plan:
+        children.append(plan['inputStage'])
+    if 'queryPlan' in plan:
+        children.append(plan['queryPlan'])
+    
+    for child in children:
+        stages.extend(_plan_stages(child))
+    
+    return stages
+
+def explain_hot_queries(hot_queries=HOT_QUERIES):
+    """Explain each hot query and report which index serves it"""
+    report = []
+    
+    for hot_query in hot_queries:
+        cursor = db[hot_query['collection']].find(hot_query['filter'])
+        if hot_query.get('sort'):
+            cursor = cursor.sort(hot_query['sort'])
+        
+        winning_plan = cursor.explain()['queryPlanner']['winningPlan']
+        stages = _plan_stages(winning_plan)
+        
+        report.append({
+            'name': hot_query['name'],
+            'collection': hot_query['collection'],
+            'indexes': [index for stage, index in stages if index],
+            'collscan': any(stage == 'COLLSCAN' for stage, index in stages)
+        })
+    
+    return report
+
+class IndexCheck(BackgroundTask):
+    """Background startup task that creates the maintenance indexes and verifies the rest"""
+
+    def __init__(self, mode=INDEX_STARTUP_CHECK, maintenance_collections=MAINTENANCE_INDEX_COLLECTIONS):
+        super().__init__()
+        self.mode = mode
+        self.maintenance_collections = maintenance_collections
+        self.last_run = None
+        self.missing = []
+        self.error = None
+
+    def start(self):
+        """Run the check once in a thread of the current process"""
+        if self.mode == 'off':
+            return
+        self._start_threads('index-check', self.run_once)
+
+    def run_once(self):
+        """Create the maintenance indexes, then report missing declared indexes"""
+        try:
+            ensure_indexes({
+                collection: INDEX_REGISTRY[collection] for collection in self.maintenance_collections
+            })
+            self.missing = verify_indexes()
+            self.error = None
+        except Exception as e:
+            self.error = str(e)
+            print(f"❌ Index verification failed: {e}")
+            return self.missing
+        
+        self.last_run = datetime.utcnow()
+        for index in self.missing:
+            print(f"❌ Missing index on {index['collection']} {index['keys']} (serves {', '.join(index['serves'])})")
+        return self.missing
+
+    def healthy(self):
+        return self.mode != 'fail' or not self.missing
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'missing': [f"{index['collection']} {index['keys']}" for index in self.missing],
+            'error': self.error
+        }
+
+index_check = IndexCheck()